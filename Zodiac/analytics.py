@@ -0,0 +1,145 @@
+# analytics.py
+# ----------------------------------------------------
+# Parallel forecasting and scoring across processes
+# ----------------------------------------------------
+# Large catalogs are split into row chunks that are fitted and scored in a
+# ProcessPoolExecutor, one chunk per task, so every core works on the
+# forecast. Nothing bulky is pickled: the products x months history is
+# copied once into a shared-memory block that the workers map as a NumPy
+# array, and they write their results into a second shared block. Only
+# chunk bounds travel through the pool's pipes.
+#
+#     for start, stop, result, scores in iter_forecast(history.units):
+#         ...                     # chunks arrive as soon as each one finishes
+#
+# Small catalogs (below ANALYTICS_CONFIG['min_parallel_rows']) and
+# single-core machines run the same chunks in-process, as starting worker
+# processes would cost more than it saves.
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+import forecast
+
+
+ANALYTICS_CONFIG = {
+    'workers': None,                # Worker processes (None: one per core)
+    'chunk_rows': 10_000,           # Products per task
+    'min_parallel_rows': 50_000,    # Below this, chunks are fitted in-process
+}
+
+# Rows of the shared result block: the Forecast fields, then the score
+RESULT_FIELDS = forecast.Forecast._fields + ("score",)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def worker_count():
+    return ANALYTICS_CONFIG['workers'] or os.cpu_count() or 1
+
+
+def get_executor():
+    """
+    Process-wide analytics pool. Workers are spawned rather than forked:
+    the parent runs Tk and worker threads, neither of which survive a fork.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=worker_count(), mp_context=get_context("spawn"))
+        return _executor
+
+
+def shutdown():
+    """Stop the analytics pool (queued chunks are cancelled)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# -----------------------
+# Worker side
+# -----------------------
+def _fit_chunk(units_name, out_name, shape, start, stop, horizon, confidence):
+    units_shm = SharedMemory(name=units_name)
+    out_shm = SharedMemory(name=out_name)
+    try:
+        _fill(units_shm, out_shm, shape, start, stop, horizon, confidence)
+    finally:
+        units_shm.close()
+        out_shm.close()
+    return start, stop
+
+
+def _fill(units_shm, out_shm, shape, start, stop, horizon, confidence):
+    # The array views must be gone before the blocks are closed
+    units = np.ndarray(shape, dtype=np.float64, buffer=units_shm.buf)[start:stop]
+    out = np.ndarray((len(RESULT_FIELDS), shape[0]), dtype=np.float64, buffer=out_shm.buf)
+    result = forecast.fit_trends(units, horizon, confidence)
+    out[:-1, start:stop] = result
+    out[-1, start:stop] = forecast.movement_score(units, result)
+
+
+# -----------------------
+# Parent side
+# -----------------------
+def _chunk_bounds(rows, chunk_rows):
+    return [(start, min(start + chunk_rows, rows)) for start in range(0, rows, chunk_rows)]
+
+
+def _as_forecast(block):
+    result = forecast.Forecast(*block[:-1])
+    return result._replace(observed=result.observed.astype(np.int64)), block[-1]
+
+
+def iter_forecast(units, horizon=forecast.HORIZON, confidence=forecast.CONFIDENCE, chunk_rows=None):
+    """
+    Fit and score every row of `units` (products x months) in chunks.
+
+    Yields (start, stop, Forecast, scores) for rows [start, stop) in the
+    order chunks finish, which is not necessarily row order. Closing the
+    generator early cancels the chunks that have not started.
+    """
+    units = np.ascontiguousarray(units, dtype=np.float64)
+    bounds = _chunk_bounds(len(units), chunk_rows or ANALYTICS_CONFIG['chunk_rows'])
+
+    if len(units) < ANALYTICS_CONFIG['min_parallel_rows'] or worker_count() < 2:
+        for start, stop in bounds:
+            chunk = units[start:stop]
+            result = forecast.fit_trends(chunk, horizon, confidence)
+            yield start, stop, result, forecast.movement_score(chunk, result)
+        return
+
+    units_shm = SharedMemory(create=True, size=units.nbytes)
+    out_shm = SharedMemory(create=True, size=len(RESULT_FIELDS) * units.shape[0] * 8)
+    futures = []
+    try:
+        np.ndarray(units.shape, dtype=np.float64, buffer=units_shm.buf)[:] = units
+        out = np.ndarray((len(RESULT_FIELDS), units.shape[0]), dtype=np.float64, buffer=out_shm.buf)
+
+        executor = get_executor()
+        futures = [
+            executor.submit(_fit_chunk, units_shm.name, out_shm.name, units.shape,
+                            start, stop, horizon, confidence)
+            for start, stop in bounds
+        ]
+        for future in as_completed(futures):
+            start, stop = future.result()
+            result, scores = _as_forecast(out[:, start:stop].copy())
+            yield start, stop, result, scores
+    finally:
+        for future in futures:
+            future.cancel()
+        out = None
+        units_shm.close()
+        units_shm.unlink()
+        out_shm.close()
+        out_shm.unlink()
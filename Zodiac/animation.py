@@ -0,0 +1,100 @@
+# animation.py
+# ----------------------------------------------------
+# Frame scheduler for Tk animations
+# ----------------------------------------------------
+# One after() tick on the Tk event loop drives every registered animation,
+# so animations never touch widgets from other threads and cost nothing
+# while the window is minimised or hidden.
+
+from itertools import cycle
+
+
+class FrameScheduler:
+    """
+    Runs registered animation callbacks from a single periodic after() tick.
+
+    Args:
+        window: the Tk/Toplevel window whose visibility gates the animations.
+        tick_ms: base frame interval; every animation period is rounded to a
+            whole number of ticks.
+    """
+
+    def __init__(self, window, tick_ms=40):
+        self.window = window
+        self.tick_ms = tick_ms
+        self.frame = 0
+        self._animations = []
+        self._after_id = None
+        self._running = False
+
+        window.bind("<Map>", self._on_map, add="+")
+        window.bind("<Unmap>", self._on_unmap, add="+")
+
+    # ----------------------------------------------------
+    # Registration
+    # ----------------------------------------------------
+    def register(self, callback, every_ms):
+        """Call `callback()` every `every_ms` milliseconds; returns a handle."""
+        handle = [callback, max(1, round(every_ms / self.tick_ms))]
+        self._animations.append(handle)
+        return handle
+
+    def register_frames(self, frames, apply, every_ms):
+        """Cycle through `frames` forever, passing each one to apply(frame)."""
+        frames = cycle(frames)
+        return self.register(lambda: apply(next(frames)), every_ms)
+
+    def unregister(self, handle):
+        if handle in self._animations:
+            self._animations.remove(handle)
+
+    # ----------------------------------------------------
+    # Start / stop
+    # ----------------------------------------------------
+    def start(self):
+        self._running = True
+        self._schedule()
+
+    def stop(self):
+        self._running = False
+        self._cancel()
+
+    def _schedule(self):
+        if self._running and self._after_id is None:
+            self._after_id = self.window.after(self.tick_ms, self._tick)
+
+    def _cancel(self):
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+            self._after_id = None
+
+    # ----------------------------------------------------
+    # Frame tick
+    # ----------------------------------------------------
+    def _tick(self):
+        self._after_id = None
+        if not self._running:
+            return
+        if not self.is_visible():
+            # Paused until the window is mapped again (see _on_map)
+            return
+
+        for callback, every in list(self._animations):
+            if self.frame % every == 0:
+                callback()
+        self.frame += 1
+        self._schedule()
+
+    def is_visible(self):
+        try:
+            return self.window.state() not in ("iconic", "withdrawn") and bool(self.window.winfo_viewable())
+        except Exception:
+            return False
+
+    def _on_map(self, event):
+        if event.widget is self.window:
+            self._schedule()
+
+    def _on_unmap(self, event):
+        if event.widget is self.window:
+            self._cancel()
@@ -0,0 +1,89 @@
+# asset_cache.py
+# ----------------------------------------------------
+# On-disk cache of pre-rendered image assets
+# ----------------------------------------------------
+# Resizing and blurring the home-screen background costs hundreds of
+# milliseconds of CPU. The processed result is written once to the cache
+# directory, keyed by the source file (path, mtime, size) and the render
+# parameters, and later launches load it straight into a Tk PhotoImage.
+#
+# Cached files are binary PPM: Tk reads them natively without PIL having
+# to decode anything.
+
+import hashlib
+import os
+import tempfile
+
+
+CACHE_DIR = os.environ.get(
+    "ZODIAC_ASSET_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "assets")
+)
+
+# Bump when the rendering pipeline changes so old entries are ignored
+RENDER_VERSION = 1
+
+
+def cache_key(source, size, blur_radius=0, resample="LANCZOS"):
+    """Hex digest identifying one rendering of `source`."""
+    stat = os.stat(source)
+    parts = (
+        RENDER_VERSION, os.path.abspath(source), stat.st_mtime_ns, stat.st_size,
+        tuple(size), blur_radius, resample,
+    )
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:20]
+
+
+def cache_path(source, size, blur_radius=0, resample="LANCZOS"):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    key = cache_key(source, size, blur_radius, resample)
+    return os.path.join(CACHE_DIR, f"{stem}-{size[0]}x{size[1]}-{key}.ppm")
+
+
+def cached(source, size, blur_radius=0, resample="LANCZOS"):
+    """Path of an up-to-date cached rendering, or None."""
+    try:
+        path = cache_path(source, size, blur_radius, resample)
+    except OSError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+def render(source, size, blur_radius=0, resample="LANCZOS"):
+    """
+    Resize (and optionally blur) `source`, store it in the cache and return
+    the cached file's path. Safe to call from a worker thread: the file is
+    written under a temporary name and moved into place atomically.
+    """
+    from PIL import Image, ImageFilter
+
+    path = cache_path(source, size, blur_radius, resample)
+    with Image.open(source) as image:
+        image = image.convert("RGB").resize(tuple(size), getattr(Image.Resampling, resample))
+    if blur_radius:
+        image = image.filter(ImageFilter.GaussianBlur(blur_radius))
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, format="PPM")
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    _prune_stale(path)
+    return path
+
+
+def _prune_stale(current):
+    """Remove older renderings of the same asset at the same size."""
+    prefix = os.path.basename(current).rsplit("-", 1)[0] + "-"
+    for name in os.listdir(CACHE_DIR):
+        full = os.path.join(CACHE_DIR, name)
+        if name.startswith(prefix) and name.endswith(".ppm") and full != current:
+            try:
+                os.unlink(full)
+            except OSError:
+                pass
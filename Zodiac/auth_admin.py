@@ -7,8 +7,8 @@ import tkinter as tk
 from tkinter import messagebox
 import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
-from db import get_connection
-from dashboard_admin import open_admin_dashboard
+from db import pooled_connection
+from tasks import TaskScope
 
 
 FONT_FAMILY = "Segoe UI"
@@ -39,9 +39,17 @@ def open_admin_page():
     password_entry = ttkb.Entry(window, show="*", width=40)
     password_entry.pack(pady=4)
 
+    tasks = TaskScope(window)
+
     # ----------------------------------------------------
     # Login function
     # ----------------------------------------------------
+    def fetch_password_hash(admin_id):
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT password_hash FROM admin_credentials WHERE admin_id=%s", (admin_id,))
+            return cursor.fetchone()
+
     def handle_admin_login():
         admin_id = admin_id_entry.get().strip()
         password = password_entry.get().strip()
@@ -50,30 +58,29 @@ def open_admin_page():
             messagebox.showwarning("Input Error", "Please enter Admin ID and Password.")
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT password_hash FROM admin_credentials WHERE admin_id=%s", (admin_id,))
-        row = cursor.fetchone()
-        conn.close()
+        def check(row):
+            if not row:
+                messagebox.showerror("Error", "Invalid Admin ID.")
+                return
 
-        if not row:
-            messagebox.showerror("Error", "Invalid Admin ID.")
-            return
+            import hashlib
+            hashed_pass = hashlib.sha256(password.encode()).hexdigest()
 
-        import hashlib
-        hashed_pass = hashlib.sha256(password.encode()).hexdigest()
+            if hashed_pass == row[0]:
+                messagebox.showinfo("Success", "Admin authenticated successfully.")
+                window.destroy()
+                from dashboard_admin import open_admin_dashboard
+                open_admin_dashboard(admin_id)
+            else:
+                messagebox.showerror("Error", "Incorrect password.")
 
-        if hashed_pass == row[0]:
-            messagebox.showinfo("Success", "Admin authenticated successfully.")
-            window.destroy()
-            open_admin_dashboard(admin_id)
-        else:
-            messagebox.showerror("Error", "Incorrect password.")
+        tasks.submit(fetch_password_hash, admin_id, on_done=check, busy=[login_button])
 
-    ttkb.Button(
+    login_button = ttkb.Button(
         window, text="Login", bootstyle="primary",
         width=18, command=handle_admin_login
-    ).pack(pady=30)
+    )
+    login_button.pack(pady=30)
 
     # ----------------------------------------------------
     # Exit Button
@@ -7,8 +7,8 @@ import tkinter as tk
 from tkinter import messagebox
 import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
-from db import get_connection
-from dashboard_customer import open_customer_dashboard
+from db import pooled_connection
+from tasks import TaskScope
 
 FONT_FAMILY = "Segoe UI"
 ACCENT_COLOR = "#9B8AFB"
@@ -33,6 +33,8 @@ def open_customer_page():
     notebook.add(login_frame, text="Login")
     notebook.add(register_frame, text="Register")
 
+    tasks = TaskScope(window)
+
     # ----------------------------------------------------
     # LOGIN TAB
     # ----------------------------------------------------
@@ -53,6 +55,15 @@ def open_customer_page():
     # -----------------------
     # LOGIN HANDLER FUNCTION
     # -----------------------
+    def find_user(email, password):
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, username FROM users WHERE email=%s AND password=%s",
+                (email, password)
+            )
+            return cursor.fetchone()
+
     def handle_login():
         email = email_login.get().strip()
         password = password_login.get().strip()
@@ -61,21 +72,16 @@ def open_customer_page():
             messagebox.showwarning("Input Error", "Please enter both email and password!")
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT id, username FROM users WHERE email=%s AND password=%s",
-            (email, password)
-        )
-        user = cursor.fetchone()
-        conn.close()
-
-        if user:
-            messagebox.showinfo("Success", "Login successful!")
-            window.destroy()
-            open_customer_dashboard(user[0], user[1])
-        else:
-            messagebox.showerror("Error", "Invalid email or password!")
+        def check(user):
+            if user:
+                messagebox.showinfo("Success", "Login successful!")
+                window.destroy()
+                from dashboard_customer import open_customer_dashboard
+                open_customer_dashboard(user[0], user[1])
+            else:
+                messagebox.showerror("Error", "Invalid email or password!")
+
+        tasks.submit(find_user, email, password, on_done=check, busy=[login_button])
 
     # -----------------------
     # LOGIN BUTTON (FIXED)
@@ -83,12 +89,13 @@ def open_customer_page():
     button_frame = ttkb.Frame(login_frame)
     button_frame.pack(pady=30)
 
-    ttkb.Button(
+    login_button = ttkb.Button(
         button_frame, text="Login",
         bootstyle="primary",
         width=20,
         command=handle_login
-    ).pack(pady=5)
+    )
+    login_button.pack(pady=5)
 
     ttkb.Button(
         button_frame, text="Cancel",
@@ -132,31 +139,39 @@ def open_customer_page():
             messagebox.showwarning("Input Error", "All fields are required!")
             return
 
-        conn = get_connection()
-        cursor = conn.cursor()
+        def registered(created):
+            if not created:
+                messagebox.showerror("Error", "Email already registered!")
+                return
 
-        cursor.execute("SELECT * FROM users WHERE email=%s", (email,))
-        if cursor.fetchone():
-            messagebox.showerror("Error", "Email already registered!")
-            conn.close()
-            return
+            messagebox.showinfo("Success", "Registration successful! You can now login.")
+            name_reg.delete(0, tk.END)
+            email_reg.delete(0, tk.END)
+            password_reg.delete(0, tk.END)
+            phone_reg.delete(0, tk.END)
 
-        cursor.execute(
-            "INSERT INTO users (username, email, password, role) VALUES (%s, %s, %s, 'customer')",
-            (name, email, password)
-        )
-        conn.commit()
-        conn.close()
+        tasks.submit(create_user, name, email, password, on_done=registered, busy=[register_button])
 
-        messagebox.showinfo("Success", "Registration successful! You can now login.")
-        name_reg.delete(0, tk.END)
-        email_reg.delete(0, tk.END)
-        password_reg.delete(0, tk.END)
-        phone_reg.delete(0, tk.END)
+    def create_user(name, email, password):
+        """Insert the customer; returns False if the email is already taken."""
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
 
-    ttkb.Button(
+            cursor.execute("SELECT * FROM users WHERE email=%s", (email,))
+            if cursor.fetchone():
+                return False
+
+            cursor.execute(
+                "INSERT INTO users (username, email, password, role) VALUES (%s, %s, %s, 'customer')",
+                (name, email, password)
+            )
+            conn.commit()
+            return True
+
+    register_button = ttkb.Button(
         register_frame, text="Register",
         bootstyle="success",
         width=20,
         command=handle_register
-    ).pack(pady=25)
+    )
+    register_button.pack(pady=25)
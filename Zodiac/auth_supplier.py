@@ -7,8 +7,8 @@ import tkinter as tk
 from tkinter import messagebox
 import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
-from db import get_connection
-from dashboard_supplier import open_supplier_dashboard
+from db import pooled_connection
+from tasks import TaskScope
 
 
 FONT_FAMILY = "Segoe UI"
@@ -38,9 +38,17 @@ def open_supplier_page():
     password_entry = ttkb.Entry(window, show="*", width=40)
     password_entry.pack(pady=4)
 
+    tasks = TaskScope(window)
+
     # ----------------------------------------------------
     # Login Handler (Using Plain Password Column)
     # ----------------------------------------------------
+    def fetch_password(supplier_id):
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT password FROM supplier_credentials WHERE supplier_id = %s", (supplier_id,))
+            return cursor.fetchone()
+
     def handle_supplier_login():
         supplier_id = supplier_id_entry.get().strip()
         password = password_entry.get().strip()
@@ -49,33 +57,32 @@ def open_supplier_page():
             messagebox.showwarning("Input Error", "Please enter Supplier ID and Password.")
             return
 
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT password FROM supplier_credentials WHERE supplier_id = %s", (supplier_id,))
-            row = cursor.fetchone()
-            conn.close()
-        except Exception as e:
+        def connection_failed(e):
             messagebox.showerror("Database Error", f"Error while connecting to database:\n{e}")
-            return
 
-        if not row:
-            messagebox.showerror("Error", "Invalid Supplier ID.")
-            return
+        def check(row):
+            if not row:
+                messagebox.showerror("Error", "Invalid Supplier ID.")
+                return
 
-        stored_password = row[0]
+            stored_password = row[0]
 
-        if password == stored_password:
-            messagebox.showinfo("Success", "Supplier authenticated successfully.")
-            window.destroy()
-            open_supplier_dashboard(supplier_id)
-        else:
-            messagebox.showerror("Error", "Incorrect password.")
+            if password == stored_password:
+                messagebox.showinfo("Success", "Supplier authenticated successfully.")
+                window.destroy()
+                from dashboard_supplier import open_supplier_dashboard
+                open_supplier_dashboard(supplier_id)
+            else:
+                messagebox.showerror("Error", "Incorrect password.")
 
-    ttkb.Button(
+        tasks.submit(fetch_password, supplier_id, on_done=check, on_error=connection_failed,
+                     busy=[login_button])
+
+    login_button = ttkb.Button(
         window, text="Login", bootstyle="primary",
         width=18, command=handle_supplier_login
-    ).pack(pady=30)
+    )
+    login_button.pack(pady=30)
 
     # ----------------------------------------------------
     # Cancel Button
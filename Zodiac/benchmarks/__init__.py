@@ -0,0 +1,9 @@
+# benchmarks/__init__.py
+# ----------------------------------------------------
+# Performance benchmarks for Zodiac
+# ----------------------------------------------------
+# Run from the Zodiac directory:
+#
+#     python -m benchmarks.run --scale 1e5
+#
+# See benchmarks/run.py for options (baseline comparison, backend, ...).
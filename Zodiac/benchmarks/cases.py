@@ -0,0 +1,294 @@
+# benchmarks/cases.py
+# ----------------------------------------------------
+# Hot-path benchmark cases
+# ----------------------------------------------------
+# Each case is registered with @case(name). The decorated function does
+# any (untimed) setup and returns a zero-argument callable; the runner
+# times that callable, which should return the number of rows it handled.
+# Raise Skip when a case cannot run here (missing dependency, no display).
+#
+# Product reads are served from the catalog cache (db.get_catalog()), so
+# the plain cases drop it before every call and time the query; the
+# [cached] cases time the cache hit.
+
+import importlib
+import os
+from datetime import timedelta
+
+import db
+from benchmarks import datagen
+
+
+CASES = []
+
+
+class Skip(Exception):
+    """Raised by a case that cannot run in the current environment."""
+
+
+def case(name):
+    def register(fn):
+        CASES.append((name, fn))
+        return fn
+    return register
+
+
+def _require(module_name):
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        raise Skip(f"{module_name} unavailable: {e}")
+
+
+# -----------------------
+# Data layer
+# -----------------------
+def _cold(fn):
+    """`fn` with the catalog cache dropped first, so it reads the database."""
+    def call():
+        db.invalidate_catalog()
+        return fn()
+    return call
+
+
+@case("db.get_all_products")
+def bench_get_all_products(ctx):
+    return _cold(lambda: len(db.get_all_products()))
+
+
+@case("db.get_all_products[cached]")
+def bench_get_all_products_cached(ctx):
+    db.get_all_products()
+    return lambda: len(db.get_all_products())
+
+
+@case("db.get_orders_by_type[customer_request]")
+def bench_customer_orders(ctx):
+    return lambda: len(db.get_orders_by_type("customer_request"))
+
+
+@case("db.get_orders_by_type[restock_request]")
+def bench_restock_orders(ctx):
+    return lambda: len(db.get_orders_by_type("restock_request"))
+
+
+@case("db.get_supplier_queue")
+def bench_supplier_queue(ctx):
+    supplier_id = db.get_supplier_id_for_login("sup00001")
+    return lambda: len(db.get_supplier_queue(supplier_id))
+
+
+@case("db.iter_orders_by_type_batches[customer_request,tuple]")
+def bench_stream_customer_orders(ctx):
+    def consume():
+        return sum(len(b) for b in db.iter_orders_by_type_batches("customer_request", row_mode="tuple"))
+    return consume
+
+
+@case("db.get_products_page[first]")
+def bench_products_first_page(ctx):
+    return lambda: len(db.get_products_page(limit=36))
+
+
+@case("db.get_products_page[middle]")
+def bench_products_middle_page(ctx):
+    def fetch():
+        key = db.get_product_key_at(db.count_products() // 2)
+        return len(db.get_products_page(after=key, limit=36))
+    return fetch
+
+
+@case("db.get_product_anchor_keys")
+def bench_product_anchor_keys(ctx):
+    return lambda: len(db.get_product_anchor_keys())
+
+
+# -----------------------
+# Dashboard queries
+# -----------------------
+@case("dashboard_admin.fetch_products")
+def bench_admin_fetch_products(ctx):
+    dashboard_admin = _require("dashboard_admin")
+    return _cold(lambda: len(dashboard_admin.fetch_products()))
+
+
+@case("dashboard_admin.fetch_products[cached]")
+def bench_admin_fetch_products_cached(ctx):
+    dashboard_admin = _require("dashboard_admin")
+    dashboard_admin.fetch_products()
+    return lambda: len(dashboard_admin.fetch_products())
+
+
+@case("dashboard_admin.fetch_orders")
+def bench_admin_fetch_orders(ctx):
+    dashboard_admin = _require("dashboard_admin")
+    return lambda: len(dashboard_admin.fetch_orders())
+
+
+# -----------------------
+# Demand prediction
+# -----------------------
+@case("ml_model.predict_demand")
+def bench_ml_predict_demand(ctx):
+    pd = _require("pandas")
+    ml_model = _require("ml_model")
+    products = db.get_all_products()
+    frame = pd.DataFrame({
+        "Name": [p["name"] for p in products],
+        "Price (per unit)": [float(p["price_per_unit"]) for p in products],
+        "Monthly Sales": [p["monthly_sales"] for p in products],
+    })
+    return lambda: len(ml_model.predict_demand(frame.copy()))
+
+
+@case("dashboard_admin.predict_demand")
+def bench_admin_predict_demand(ctx):
+    dashboard_admin = _require("dashboard_admin")
+    return lambda: len(dashboard_admin.predict_demand())
+
+
+@case("forecast.load_history")
+def bench_forecast_history(ctx):
+    forecast = _require("forecast")
+    return lambda: len(forecast.load_history().product_ids)
+
+
+@case("forecast.fit_trends")
+def bench_forecast_fit(ctx):
+    forecast = _require("forecast")
+    units = forecast.load_history().units
+    return lambda: len(forecast.fit_trends(units).predicted)
+
+
+@case("analytics.iter_forecast")
+def bench_analytics_forecast(ctx):
+    analytics = _require("analytics")
+    units = analytics.forecast.load_history().units
+    return lambda: sum(stop - start for start, stop, _, _ in analytics.iter_forecast(units))
+
+
+@case("forecast.forecast_products[cached]")
+def bench_forecast_cached(ctx):
+    forecast = _require("forecast")
+    forecast.forecast_products()        # fit once; the timed calls hit model_cache
+    return lambda: len(forecast.forecast_products()[0].product_ids)
+
+
+@case("forecast.load_history[snapshot]")
+def bench_forecast_history_snapshot(ctx):
+    import shutil
+    import tempfile
+
+    forecast = _require("forecast")
+    snapshots = _require("snapshots")
+    previous = snapshots.SNAPSHOT_DIR
+    snapshots.SNAPSHOT_DIR = tempfile.mkdtemp(prefix="zodiac-snapshots-")
+    ctx["cleanup"].append(lambda: shutil.rmtree(snapshots.SNAPSHOT_DIR, ignore_errors=True))
+    ctx["cleanup"].append(lambda: setattr(snapshots, "SNAPSHOT_DIR", previous))
+    snapshots.export()
+    return lambda: len(forecast.load_history(source="snapshot").product_ids)
+
+
+@case("replenish.plan")
+def bench_replenish_plan(ctx):
+    replenish = _require("replenish")
+    today = (datagen.ANCHOR + timedelta(days=1)).date()
+    return lambda: sum(len(lines) for lines in replenish.plan(today).values())
+
+
+@case("bulk.export_csv[products]")
+def bench_bulk_export(ctx):
+    bulk = _require("bulk")
+
+    def export():
+        with open(os.devnull, "w", newline="") as sink:
+            return bulk.export_csv("products", sink)
+    return export
+
+
+# -----------------------
+# Product search
+# -----------------------
+SEARCH_QUERIES = ("s", "sol", "solar pump", "pump 12", "asher", "42", "zzz")
+
+
+def _search_products():
+    return [(p["id"], p["name"], p["price_per_unit"]) for p in db.get_all_products()]
+
+
+@case("product_search.build")
+def bench_search_build(ctx):
+    from product_search import ProductSearchIndex
+    products = _search_products()
+    return lambda: len(ProductSearchIndex(products))
+
+
+@case("product_search.search[keystrokes]")
+def bench_search_keystrokes(ctx):
+    from product_search import ProductSearchIndex
+    index = ProductSearchIndex(_search_products())
+    return lambda: sum(len(index.search(q)) for q in SEARCH_QUERIES)
+
+
+# -----------------------
+# UI population
+# -----------------------
+@case("treeview.populate_products")
+def bench_treeview_populate(ctx):
+    import tkinter as tk
+    from tkinter import ttk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        raise Skip(f"no display: {e}")
+    root.withdraw()
+    ctx["cleanup"].append(root.destroy)
+
+    columns = ("Name", "Price", "Stock", "Last Updated", "Monthly Sales", "Status", "Action")
+    tree = ttk.Treeview(root, columns=columns, show="headings", height=12)
+    products = db.get_all_products()
+
+    def populate():
+        tree.delete(*tree.get_children())
+        for p in products:
+            status = "🟢 OK" if p["stock_count"] > 10 else "🔴 Low"
+            tree.insert("", "end", values=(p["name"], p["price_per_unit"], p["stock_count"],
+                                           p["last_updated"], p["monthly_sales"], status, "Restock"))
+        root.update_idletasks()
+        return len(products)
+
+    return populate
+
+
+# -----------------------
+# Startup
+# -----------------------
+@case("startup.import_main")
+def bench_import_main(ctx):
+    from benchmarks import startup
+
+    def measure():
+        try:
+            _, rows = startup.import_breakdown("main")
+        except startup.StartupError as e:
+            raise Skip(str(e))
+        return len(rows)
+
+    measure()
+    return measure
+
+
+@case("startup.first_window")
+def bench_first_window(ctx):
+    from benchmarks import startup
+
+    def measure():
+        try:
+            startup.time_to_first_window()
+        except startup.StartupError as e:
+            raise Skip(str(e))
+        return 1
+
+    measure()
+    return measure
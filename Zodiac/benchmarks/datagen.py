@@ -0,0 +1,206 @@
+# benchmarks/datagen.py
+# ----------------------------------------------------
+# Deterministic synthetic dataset generator
+# ----------------------------------------------------
+# Produces suppliers, users, products and orders at a given scale
+# (10^3 .. 10^7 products) from a fixed seed, streaming rows in chunks
+# through executemany so memory stays flat at any size.
+
+import hashlib
+import random
+from array import array
+from datetime import datetime, timedelta
+from itertools import islice
+
+import db
+import rollups
+
+
+# All generated timestamps fall in the year before this instant, so
+# datasets are identical no matter when they are generated.
+ANCHOR = datetime(2025, 6, 30, 12, 0, 0)
+HISTORY_DAYS = 365
+
+CHUNK_SIZE = 20_000
+
+ADJECTIVES = [
+    "Alpha", "Bright", "Compact", "Deluxe", "Eco", "Flex", "Grand", "Heavy",
+    "Ionic", "Jumbo", "Kinetic", "Lunar", "Micro", "Nova", "Omni", "Prime",
+    "Quantum", "Rapid", "Solar", "Titan", "Ultra", "Vivid", "Wired", "Zen",
+]
+NOUNS = [
+    "Bolt", "Cable", "Drill", "Filter", "Gear", "Hinge", "Lamp", "Motor",
+    "Nozzle", "Panel", "Pump", "Relay", "Sensor", "Spring", "Switch", "Valve",
+    "Washer", "Widget",
+]
+
+
+# -----------------------
+# Dataset sizing
+# -----------------------
+class DatasetSpec:
+    """Row counts for each table; use for_scale() for the standard mix."""
+
+    def __init__(self, products, orders, suppliers, users, seed=42):
+        self.products = int(products)
+        self.orders = int(orders)
+        self.suppliers = max(1, int(suppliers))
+        self.users = max(1, int(users))
+        self.seed = seed
+
+    @classmethod
+    def for_scale(cls, scale, seed=42):
+        """Standard mix: N products, 2N orders, N/1000 suppliers, N/100 users."""
+        scale = int(scale)
+        return cls(
+            products=scale,
+            orders=2 * scale,
+            suppliers=max(10, scale // 1000),
+            users=max(10, scale // 100),
+            seed=seed,
+        )
+
+    def as_dict(self):
+        return {
+            "products": self.products, "orders": self.orders,
+            "suppliers": self.suppliers, "users": self.users, "seed": self.seed,
+        }
+
+
+# -----------------------
+# Row generators
+# -----------------------
+def _timestamp(rng):
+    return ANCHOR - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+
+
+def supplier_rows(spec):
+    for i in range(1, spec.suppliers + 1):
+        yield (i, f"Supplier {i:05d}", f"supplier{i}@example.com", f"+91 90000{i % 100000:05d}")
+
+
+def supplier_credential_rows(spec):
+    for i in range(1, spec.suppliers + 1):
+        yield (f"sup{i:05d}", f"Supplier {i:05d}", f"supplier{i}@example.com", "supplier123")
+
+
+def user_rows(spec):
+    hashed = hashlib.sha256(b"password").hexdigest()
+    for i in range(1, spec.users + 1):
+        yield (i, f"user{i}", f"user{i}@example.com", hashed, "password", "customer")
+
+
+def product_rows(spec, supplier_of):
+    """Yield product rows; records each product's supplier in `supplier_of`."""
+    rng = random.Random(f"{spec.seed}-products")
+    for i in range(1, spec.products + 1):
+        supplier_id = rng.randint(1, spec.suppliers)
+        supplier_of.append(supplier_id)
+        yield (
+            i,
+            f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}",
+            supplier_id,
+            round(rng.uniform(1, 500), 2),
+            rng.randint(0, 500),
+            rng.choice((5, 10, 20, 50)),
+            _timestamp(rng),
+            rng.randint(0, 300),
+        )
+
+
+def order_rows(spec, supplier_of):
+    """80% customer requests, 20% restock requests; ~70% delivered."""
+    rng = random.Random(f"{spec.seed}-orders")
+    for i in range(1, spec.orders + 1):
+        product_id = rng.randint(1, spec.products)
+        created = _timestamp(rng)
+        delivered = rng.random() < 0.7
+        fulfilled = created + timedelta(hours=rng.randint(12, 24 * 14)) if delivered else None
+        status = "Delivered" if delivered else "Pending"
+        if rng.random() < 0.8:
+            yield (i, "customer_request", product_id, None, rng.randint(1, spec.users),
+                   rng.randint(1, 20), None, None, status, created, fulfilled)
+        else:
+            yield (i, "restock_request", product_id, supplier_of[product_id - 1], None,
+                   rng.randint(20, 200), (created + timedelta(days=7)).date(), "auto-generated",
+                   status, created, fulfilled)
+
+
+def restock_request_rows(spec, supplier_of):
+    """Legacy free-text restock queue (one pending request per 100 products)."""
+    rng = random.Random(f"{spec.seed}-restock")
+    for product_id in range(1, spec.products + 1, 100):
+        supplier_id = supplier_of[product_id - 1]
+        yield (f"product-{product_id}", rng.randint(20, 200),
+               (ANCHOR + timedelta(days=7)).date(), "restock", f"sup{supplier_id:05d}", "Pending")
+
+
+# -----------------------
+# Bulk loading
+# -----------------------
+def _load(conn, sql, rows, chunk_size=CHUNK_SIZE, progress=None, label=""):
+    cur = conn.cursor()
+    total = 0
+    try:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            cur.executemany(sql, chunk)
+            conn.commit()
+            total += len(chunk)
+            if progress:
+                progress(label, total)
+    finally:
+        cur.close()
+    return total
+
+
+def load_dataset(spec, progress=None):
+    """
+    Populate the active db backend with a synthetic dataset.
+
+    Expects empty tables (ids are assigned explicitly so that generated
+    foreign keys line up). Returns the row count loaded per table.
+    """
+    supplier_of = array("i")
+    counts = {}
+    with db.pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO admin_credentials (admin_id, password_hash) VALUES (%s, %s)",
+                    ("admin", db.hash_password("admin123")))
+        conn.commit()
+        cur.close()
+
+        counts["suppliers"] = _load(conn, """
+            INSERT INTO suppliers (id, name, email, phone) VALUES (%s, %s, %s, %s)
+        """, supplier_rows(spec), progress=progress, label="suppliers")
+        counts["supplier_credentials"] = _load(conn, """
+            INSERT INTO supplier_credentials (supplier_id, name, email, password)
+            VALUES (%s, %s, %s, %s)
+        """, supplier_credential_rows(spec), progress=progress, label="supplier_credentials")
+        counts["users"] = _load(conn, """
+            INSERT INTO users (id, username, email, password_hash, password, role)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, user_rows(spec), progress=progress, label="users")
+        counts["products"] = _load(conn, """
+            INSERT INTO products (id, name, supplier_id, price_per_unit, stock_count,
+                                  min_stock, last_updated, monthly_sales)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, product_rows(spec, supplier_of), progress=progress, label="products")
+        counts["orders"] = _load(conn, """
+            INSERT INTO orders (id, type, product_id, supplier_id, customer_id, units,
+                                delivery_date, note, status, created_at, fulfilled_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, order_rows(spec, supplier_of), progress=progress, label="orders")
+        counts["restock_requests"] = _load(conn, """
+            INSERT INTO restock_requests (stock_name, units_required, delivery_date, note,
+                                          supplier_name, status)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, restock_request_rows(spec, supplier_of), progress=progress, label="restock_requests")
+
+    # Orders were bulk-loaded around the data layer, so roll them up afterwards
+    counts["product_sales_daily"], counts["product_sales_monthly"] = rollups.rebuild(
+        progress=(lambda done, total: progress("rollups", done)) if progress else None
+    )
+    return counts
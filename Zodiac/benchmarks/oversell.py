@@ -0,0 +1,108 @@
+# benchmarks/oversell.py
+# ----------------------------------------------------
+# Concurrent order-placement load test
+# ----------------------------------------------------
+# Many threads place customer orders (single lines and carts) against a handful of products with
+# scarce stock. Afterwards every product must satisfy
+#
+#     initial stock - units ordered == final stock >= 0
+#
+# Usage (from the Zodiac directory):
+#
+#     python -m benchmarks.oversell --threads 16 --orders 4000
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import db
+
+
+def run(threads=16, orders=4000, products=5, stock=500, seed=7):
+    """Run the load test on a scratch SQLite database; returns a report dict."""
+    workdir = tempfile.mkdtemp(prefix="zodiac-oversell-")
+    db.configure_backend("sqlite", path=os.path.join(workdir, "oversell.db"))
+
+    with db.pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO users (id, username, email) VALUES (1, 'load', 'load@example.com')")
+        cur.executemany(
+            "INSERT INTO products (id, name, price_per_unit, stock_count) VALUES (%s, %s, %s, %s)",
+            [(i, f"Scarce {i}", 10.0, stock) for i in range(1, products + 1)]
+        )
+        conn.commit()
+
+    outcomes = Counter()
+    lock = threading.Lock()
+    per_thread = orders // threads
+
+    def customer(index):
+        rng = random.Random(seed + index)
+        local = Counter()
+        for _ in range(per_thread):
+            # Mix of single-line orders and carts of up to four lines
+            cart = [(rng.randint(1, products), rng.randint(1, 5)) for _ in range(rng.randint(1, 4))]
+            local[db.place_customer_orders(1, cart)] += 1
+        with lock:
+            outcomes.update(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=customer, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    oversold = []
+    with db.pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT p.id, p.stock_count, COALESCE(SUM(o.units), 0)
+            FROM products p LEFT JOIN orders o ON o.product_id = p.id
+            GROUP BY p.id, p.stock_count
+        """)
+        for product_id, final, ordered in cur.fetchall():
+            if final < 0 or stock - ordered != final:
+                oversold.append({"product_id": product_id, "final_stock": final, "units_ordered": ordered})
+
+    pool_stats = db.get_pool_stats()
+    db.close_pool()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "threads": threads,
+        "attempts": per_thread * threads,
+        "outcomes": dict(outcomes),
+        "elapsed_s": elapsed,
+        "orders_per_s": per_thread * threads / elapsed if elapsed else 0.0,
+        "pool": {k: pool_stats[k] for k in ("waits", "borrow_time_avg", "connections_created")},
+        "oversold": oversold,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent order placement / oversell check")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=4000)
+    parser.add_argument("--products", type=int, default=5)
+    parser.add_argument("--stock", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    report = run(args.threads, args.orders, args.products, args.stock)
+    print(json.dumps(report, indent=2))
+    if report["oversold"]:
+        print("FAIL: stock was oversold")
+        return 1
+    print("OK: zero oversells")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+# benchmarks/plans.py
+# ----------------------------------------------------
+# Query-plan checker
+# ----------------------------------------------------
+# Collects every SQL statement in the application modules, EXPLAINs it
+# against the benchmark dataset and fails if any query reads a whole table,
+# unless it is one of the intentional full reads listed in FULL_READS.
+#
+# Usage (from the Zodiac directory):
+#
+#     python -m benchmarks.plans --scale 1e5
+#     python -m benchmarks.plans --backend mysql        # database from DB_CONFIG
+#
+# Exit status is 1 when any query scans a table or fails to prepare.
+
+import argparse
+import ast
+import os
+import re
+import sys
+from collections import namedtuple
+
+import db
+import rollups
+from benchmarks import datagen
+
+
+ZODIAC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Schema / adapter internals, not application queries
+SKIP_MODULES = {"schema.py", "db_sqlite.py"}
+
+Query = namedtuple("Query", "source sql")
+PlanResult = namedtuple("PlanResult", "query plan scans error allowed")
+
+# Statements that read a whole table on purpose: (module, start of the
+# statement with whitespace collapsed, reason). Anything else that scans fails.
+FULL_READS = [
+    ("db", "SELECT p.id, p.name, p.supplier_id, s.name AS supplier",
+     "catalog cache load: every product, once per TTL"),
+    ("db", "SELECT p.id, p.name, s.name AS supplier",
+     "streamed product reads (iter_all_products): every product by design"),
+    ("db", "SELECT id, name FROM suppliers",
+     "supplier dropdown: every supplier"),
+    ("bulk", "SELECT name, email, phone FROM suppliers",
+     "CSV export of every supplier"),
+    ("bulk", "SELECT p.name, s.name AS supplier",
+     "CSV export of every product"),
+    ("bulk", "SELECT o.id, o.type, p.name AS product",
+     "CSV export of every order"),
+    ("replenish", "SELECT id, supplier_id, stock_count, min_stock FROM products",
+     "reorder run: stock of every product"),
+]
+
+_STATEMENT = re.compile(r"^\s*(SELECT\s.*\bFROM\s|UPDATE\s+\w+\s+SET\s|DELETE\s+FROM\s)", re.DOTALL)
+_LIMIT_PARAM = re.compile(r"\b(LIMIT|OFFSET)\s+%s", re.IGNORECASE)
+
+
+# -----------------------
+# Discovery
+# -----------------------
+def _dynamic_queries():
+    """Statements assembled at runtime, rendered in a representative shape."""
+    case_sql = "CASE id WHEN %s THEN %s WHEN %s THEN %s END"
+    return [
+        Query("db.place_customer_orders", f"""
+            UPDATE products
+            SET stock_count = stock_count - {case_sql}, last_updated = NOW()
+            WHERE id IN (%s, %s) AND stock_count >= {case_sql}
+        """),
+        Query("db._load_catalog_rows", f"{db.CATALOG_SQL} WHERE p.id IN (%s, %s)"),
+        Query("rollups.backfill", rollups._daily_chunk_sql(db.dialect())),
+        Query("db.mark_order_delivered", """
+            UPDATE orders SET status = 'Delivered', fulfilled_at = %s
+            WHERE id IN (%s, %s) AND status = 'Pending' AND supplier_id = %s
+        """),
+        Query("db.mark_order_delivered", """
+            UPDATE products
+            SET stock_count = stock_count + (
+                    SELECT SUM(o.units) FROM orders o
+                    WHERE o.product_id = products.id AND o.id IN (%s, %s)
+                      AND o.type = 'restock_request'
+                ),
+                last_updated = NOW()
+            WHERE id IN (%s, %s)
+        """),
+    ] + [
+        Query(f"bulk._lookup[{table}]", f"""
+            SELECT {column}, MIN(id) FROM {table}
+            WHERE {column} IN (%s, %s)
+            GROUP BY {column}
+        """)
+        for table, column in [("products", "name"), ("suppliers", "name"), ("users", "email")]
+    ] + _optional_queries()
+
+
+def _optional_queries():
+    """Statements from modules with extra dependencies, when those are installed."""
+    queries = []
+    try:
+        import forecast
+    except ImportError:
+        pass
+    else:
+        queries.append(Query("forecast.load_history", forecast.history_sql()))
+    try:
+        import replenish
+    except ImportError:
+        pass
+    else:
+        queries.append(Query("replenish.plan", replenish.lead_time_sql()))
+    try:
+        import snapshots
+    except ImportError:
+        pass
+    else:
+        queries.append(Query("snapshots.export_orders", snapshots.NEW_ORDERS_SQL))
+    return queries
+
+
+class _Collector(ast.NodeVisitor):
+    """Finds SQL string literals (and f-strings over module constants) in one module."""
+
+    def __init__(self, module):
+        self.module = module
+        self.constants = {}
+        self.scope = []
+        self.found = []
+
+    def visit_Module(self, node):
+        # Module-level string constants, so f-strings like f"SELECT {COLUMNS} ..." resolve
+        for stmt in node.body:
+            if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+                text = self._text(stmt.value)
+                if text is not None:
+                    self.constants[stmt.targets[0].id] = text
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        self.scope.append(node.name)
+        self.generic_visit(node)
+        self.scope.pop()
+
+    def visit_Constant(self, node):
+        self._record(node, node.value if isinstance(node.value, str) else None)
+
+    def visit_JoinedStr(self, node):
+        self._record(node, self._text(node))
+
+    def _text(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.JoinedStr):
+            parts = []
+            for value in node.values:
+                if isinstance(value, ast.Constant):
+                    parts.append(value.value)
+                elif isinstance(value, ast.FormattedValue) and isinstance(value.value, ast.Name) \
+                        and value.value.id in self.constants:
+                    parts.append(self.constants[value.value.id])
+                else:
+                    return None
+            return "".join(parts)
+        return None
+
+    def _record(self, node, text):
+        if text and _STATEMENT.match(text):
+            where = ".".join([self.module] + self.scope) if self.scope else self.module
+            self.found.append(Query(f"{where}:{node.lineno}", text))
+
+
+def discover(root=ZODIAC_DIR):
+    """Every SQL statement in the application modules under `root`."""
+    queries, seen = [], set()
+    for name in sorted(os.listdir(root)):
+        if not name.endswith(".py") or name in SKIP_MODULES:
+            continue
+        with open(os.path.join(root, name), encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=name)
+        collector = _Collector(name[:-3])
+        collector.visit(tree)
+        for query in collector.found:
+            key = " ".join(query.sql.split())
+            if key not in seen:
+                seen.add(key)
+                queries.append(query)
+    return queries + _dynamic_queries()
+
+
+# -----------------------
+# EXPLAIN
+# -----------------------
+def _sample_params(sql):
+    """
+    Placeholder values for EXPLAIN: '1' everywhere (a string keeps MySQL
+    string columns index-eligible and is coerced for numeric ones), plain
+    integers for LIMIT / OFFSET.
+    """
+    limits = {m.start() + len(m.group()) - 2 for m in _LIMIT_PARAM.finditer(sql)}
+    return [1 if m.start() in limits else "1" for m in re.finditer(r"%s", sql)]
+
+
+def explain(cur, sql):
+    """Return (plan lines, scanned tables) for `sql` on the active backend."""
+    params = _sample_params(sql)
+    if db.dialect() == "sqlite":
+        cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+        details = [row[3] for row in cur.fetchall()]
+        scans = [d.split()[1] for d in details
+                 if d.startswith("SCAN ") and "INDEX" not in d and "CONSTANT ROW" not in d]
+        return details, scans
+
+    cur.execute("EXPLAIN " + sql, params)
+    columns = cur.column_names
+    rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+    details = [f"{r.get('table')}: type={r.get('type')} key={r.get('key')}" for r in rows]
+    scans = [r.get("table") for r in rows if r.get("type") == "ALL"]
+    return details, scans
+
+
+def full_read(query):
+    """The FULL_READS reason `query` may scan for, or None."""
+    module = re.split(r"[.:\[]", query.source, maxsplit=1)[0]
+    sql = " ".join(query.sql.split())
+    for allowed_module, start, reason in FULL_READS:
+        if module == allowed_module and sql.startswith(start):
+            return reason
+    return None
+
+
+def check(queries=None):
+    """EXPLAIN every query; returns a PlanResult per query."""
+    results = []
+    with db.pooled_connection() as conn:
+        for query in queries if queries is not None else discover():
+            cur = conn.cursor()
+            try:
+                plan, scans = explain(cur, query.sql)
+                allowed = full_read(query) if scans else None
+                results.append(PlanResult(query, plan, [] if allowed else scans, None, allowed))
+            except db.Error as e:
+                results.append(PlanResult(query, [], [], str(e), None))
+            finally:
+                cur.close()
+            conn.rollback()
+    return results
+
+
+# -----------------------
+# CLI
+# -----------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail on full table scans in Zodiac's queries")
+    parser.add_argument("--scale", type=float, default=1e4, help="benchmark dataset size (SQLite)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", choices=("sqlite", "mysql"), default="sqlite")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args(argv)
+
+    if args.backend == "sqlite":
+        from benchmarks.run import prepare_sqlite
+        prepare_sqlite(datagen.DatasetSpec.for_scale(int(args.scale), args.seed))
+    else:
+        db.configure_backend("mysql")
+
+    results = check()
+    failures = 0
+    for result in results:
+        if result.error:
+            status = f"ERROR  {result.error}"
+        elif result.scans:
+            status = f"SCAN   {', '.join(result.scans)}"
+        elif result.allowed:
+            status = f"full read: {result.allowed}"
+        else:
+            status = "ok"
+        if result.error or result.scans:
+            failures += 1
+        if args.verbose or result.error or result.scans:
+            print(f"{status:<40} {result.query.source}")
+            for line in result.plan if args.verbose else ():
+                print(f"{'':>8}{line}")
+
+    print(f"\n{len(results)} queries checked on {db.dialect()}, {failures} with full table scans or errors")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+# benchmarks/run.py
+# ----------------------------------------------------
+# Benchmark runner: generate data, time hot paths, compare to baseline
+# ----------------------------------------------------
+# Usage (from the Zodiac directory):
+#
+#     python -m benchmarks.run --scale 1e5               # run + compare
+#     python -m benchmarks.run --scale 1e5 --save-baseline
+#     python -m benchmarks.run --only predict --repeat 3
+#
+# The default target is a SQLite database generated under
+# benchmarks/data/, reused across runs with the same scale and seed.
+# Exit status is 1 when any case regressed beyond --tolerance.
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import db
+from benchmarks import cases, datagen
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(HERE, "data")
+
+# Ignore differences below this many seconds (timer noise on tiny cases)
+MIN_ABS_DELTA = 0.002
+
+
+# -----------------------
+# Dataset preparation
+# -----------------------
+def prepare_sqlite(spec, data_dir=DATA_DIR, rebuild=False):
+    """Point db at a generated SQLite dataset, building it if needed."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"bench-{spec.products}-{spec.seed}.db")
+    if rebuild:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    exists = os.path.exists(path)
+    db.configure_backend("sqlite", path=path)
+    if not exists:
+        started = time.perf_counter()
+        counts = datagen.load_dataset(spec, progress=_print_progress)
+        print(f"\nGenerated {counts} in {time.perf_counter() - started:.1f}s -> {path}")
+    return path
+
+
+_last_label = [None]
+
+
+def _print_progress(label, total):
+    if _last_label[0] not in (None, label):
+        print()
+    _last_label[0] = label
+    print(f"\r  loading {label}: {total:,} rows", end="", flush=True)
+
+
+# -----------------------
+# Timing
+# -----------------------
+def time_case(fn, repeat):
+    """Warm up once, then time `repeat` runs. Returns a result dict."""
+    rows = fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = fn()
+        timings.append(time.perf_counter() - started)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "mean_s": statistics.fmean(timings),
+        "runs": repeat,
+        "rows": rows,
+    }
+
+
+def run_cases(repeat, only=None):
+    ctx = {"cleanup": []}
+    results = {}
+    try:
+        for name, setup in cases.CASES:
+            if only and not any(pattern in name for pattern in only):
+                continue
+            try:
+                fn = setup(ctx)
+                results[name] = time_case(fn, repeat)
+                print(f"  {name:<45} {results[name]['median_s'] * 1000:>10.2f} ms"
+                      f"  ({results[name]['rows']} rows)")
+            except cases.Skip as e:
+                results[name] = {"skipped": str(e)}
+                print(f"  {name:<45} {'skipped':>13}  ({e})")
+    finally:
+        for cleanup in ctx["cleanup"]:
+            cleanup()
+    return results
+
+
+# -----------------------
+# Baseline comparison
+# -----------------------
+def compare(results, baseline, tolerance):
+    """Print a comparison table; return the names of regressed cases."""
+    regressions = []
+    print(f"\n{'case (best of N, ms)':<45} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if "skipped" in current:
+            status, base_ms, cur_ms, change = "skipped", "-", "-", ""
+        elif not base or "skipped" in base:
+            status, base_ms, cur_ms, change = "new", "-", f"{current['min_s'] * 1000:.2f}", ""
+        else:
+            # Compare best-of-N times: far less noisy than medians on a busy machine
+            before, after = base["min_s"], current["min_s"]
+            ratio = (after - before) / before if before else 0.0
+            base_ms, cur_ms, change = f"{before * 1000:.2f}", f"{after * 1000:.2f}", f"{ratio:+.1%}"
+            if ratio > tolerance and after - before > MIN_ABS_DELTA:
+                status = "REGRESSION"
+                regressions.append(name)
+            elif ratio < -tolerance:
+                status = "improved"
+            else:
+                status = "ok"
+        print(f"{name:<45} {base_ms:>12} {cur_ms:>12} {change:>9}  {status}")
+    return regressions
+
+
+def _parse_scale(text):
+    return int(float(text))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zodiac hot-path benchmarks")
+    parser.add_argument("--scale", type=_parse_scale, default=10_000,
+                        help="number of products (1e3 .. 1e7); other tables scale with it")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="run only cases whose name contains one of these")
+    parser.add_argument("--backend", choices=("sqlite", "mysql"), default="sqlite",
+                        help="sqlite: generated file under benchmarks/data; "
+                             "mysql: DB_CONFIG database (use --load to populate it)")
+    parser.add_argument("--load", action="store_true", help="load the dataset into MySQL first")
+    parser.add_argument("--rebuild", action="store_true", help="regenerate the SQLite dataset")
+    parser.add_argument("--output", help="results JSON path (default benchmarks/results-<scale>.json)")
+    parser.add_argument("--baseline", help="baseline JSON path (default benchmarks/baseline-<scale>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a case counts as a regression (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    spec = datagen.DatasetSpec.for_scale(args.scale, seed=args.seed)
+    if args.backend == "sqlite":
+        prepare_sqlite(spec, rebuild=args.rebuild)
+    else:
+        db.configure_backend("mysql")
+        if args.load:
+            datagen.load_dataset(spec, progress=_print_progress)
+            print()
+
+    print(f"Running benchmarks at scale {spec.products:,} on {db.dialect()}")
+    results = run_cases(args.repeat, only=args.only)
+
+    report = {
+        "meta": {
+            "dataset": spec.as_dict(),
+            "backend": db.dialect(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(HERE, f"results-{spec.products}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    baseline_path = args.baseline or os.path.join(HERE, f"baseline-{spec.products}.json")
+    if args.save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one.")
+        return 0
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+# benchmarks/startup.py
+# ----------------------------------------------------
+# Startup-time report
+# ----------------------------------------------------
+# Measures how long `python main.py` takes to put the home screen on
+# screen and breaks the import cost down per module (python -X importtime).
+#
+#     python -m benchmarks.startup            # human-readable report
+#     python -m benchmarks.startup --json     # machine-readable
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+ZODIAC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StartupError(Exception):
+    """The probe process failed (missing dependency, no display, ...)."""
+
+
+def import_breakdown(module="main"):
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+
+    Returns (total_seconds, rows) where rows are dicts with module,
+    self_ms and cumulative_ms, sorted by cumulative time (slowest first).
+    """
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ZODIAC_DIR, capture_output=True, text=True
+    )
+    total = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise StartupError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:       123 |       4567 |   package.module"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            rows.append({
+                "module": name.rstrip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            })
+        except ValueError:
+            continue
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return total, rows
+
+
+def time_to_first_window(timeout=30.0):
+    """Seconds from launching `python main.py` until its window is first mapped."""
+    env = dict(os.environ, ZODIAC_STARTUP_PROBE="1")
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=ZODIAC_DIR, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    try:
+        for line in proc.stdout:
+            if line.startswith("ZODIAC_FIRST_WINDOW"):
+                elapsed = time.perf_counter() - started
+                proc.wait(timeout=timeout)
+                return elapsed
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        raise StartupError(f"no window within {timeout}s")
+    error = proc.stderr.read().strip().splitlines()
+    raise StartupError(error[-1] if error else f"exited with status {proc.returncode}")
+
+
+def report(top=20):
+    result = {}
+    try:
+        total, rows = import_breakdown("main")
+        result["import_main_s"] = total
+        result["modules_imported"] = len(rows)
+        result["slowest_imports"] = rows[:top]
+    except StartupError as e:
+        result["import_error"] = str(e)
+    try:
+        result["first_window_s"] = time_to_first_window()
+    except StartupError as e:
+        result["first_window_error"] = str(e)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zodiac startup-time report")
+    parser.add_argument("--top", type=int, default=20, help="number of slowest imports to list")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    result = report(args.top)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+
+    if "first_window_s" in result:
+        print(f"Time to first window : {result['first_window_s'] * 1000:.0f} ms")
+    else:
+        print(f"Time to first window : unavailable ({result['first_window_error']})")
+    if "import_main_s" not in result:
+        print(f"import main          : failed ({result['import_error']})")
+        return 1
+
+    print(f"import main          : {result['import_main_s'] * 1000:.0f} ms "
+          f"({result['modules_imported']} modules)\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for row in result["slowest_imports"]:
+        print(f"{row['cumulative_ms']:>14.1f} {row['self_ms']:>9.1f}  {row['module']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
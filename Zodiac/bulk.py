@@ -0,0 +1,536 @@
+# bulk.py
+# ----------------------------------------------------
+# Bulk CSV import / export of suppliers, products and orders
+# ----------------------------------------------------
+# Files are streamed in chunks of BULK_CONFIG['chunk_rows'] rows, so a
+# million-row catalog loads and dumps with flat memory:
+#
+#     python bulk.py import products catalog.csv
+#     python bulk.py import orders orders.csv --errors rejected.csv
+#     python bulk.py export products catalog.csv
+#
+# Imports upsert on natural keys: suppliers and products by name, orders
+# by id (rows without one are new orders). References are written by
+# name too (product, supplier, customer_email) and resolved to ids per
+# chunk through indexed IN lookups. Each chunk goes in with one
+# executemany per statement and is committed on its own. A row that
+# cannot be parsed, resolved or written is reported with its line number
+# and skipped; the rest of the chunk still loads. An empty cell stands for
+# the column default.
+#
+# Exported files use the same columns, so they can be imported again.
+
+import csv
+import sys
+from collections import namedtuple
+from datetime import date, datetime
+
+import db
+
+
+BULK_CONFIG = {
+    'chunk_rows': 5000,         # CSV rows parsed and written per transaction
+    'lookup_chunk': 500,        # Keys per `WHERE ... IN (...)` lookup
+    'max_errors': 1000,         # Row errors kept for the report (all are counted)
+}
+
+REQUIRED = object()
+
+# csv: header in the file; column: target column; parse: text -> value;
+# default: value of an empty cell (REQUIRED rejects the row)
+Field = namedtuple("Field", "csv column parse default")
+
+# key: natural-key column; fields: importable columns; export_sql: SELECT
+# producing the same columns
+Entity = namedtuple("Entity", "table key fields export_sql")
+
+ImportResult = namedtuple("ImportResult", "rows inserted updated failed errors")
+
+# Columns holding the natural key of another table: (table, key column)
+REFERENCES = {
+    'supplier_id': ('suppliers', 'name'),
+    'product_id': ('products', 'name'),
+    'customer_id': ('users', 'email'),
+}
+
+ORDER_TYPES = ('customer_request', 'restock_request')
+
+
+# -----------------------
+# Cell parsers
+# -----------------------
+def _text(value):
+    return value
+
+
+def _int(value):
+    number = int(value)
+    if not -2 ** 63 <= number < 2 ** 63:
+        raise ValueError("out of range")
+    return number
+
+
+def _float(value):
+    return float(value)
+
+
+def _order_type(value):
+    if value not in ORDER_TYPES:
+        raise ValueError(f"type must be one of {', '.join(ORDER_TYPES)}")
+    return value
+
+
+ENTITIES = {
+    'suppliers': Entity(
+        table='suppliers', key='name',
+        fields=(
+            Field('name', 'name', _text, REQUIRED),
+            Field('email', 'email', _text, None),
+            Field('phone', 'phone', _text, None),
+        ),
+        export_sql="SELECT name, email, phone FROM suppliers ORDER BY id",
+    ),
+    'products': Entity(
+        table='products', key='name',
+        fields=(
+            Field('name', 'name', _text, REQUIRED),
+            Field('supplier', 'supplier_id', _text, None),
+            Field('price_per_unit', 'price_per_unit', _float, 0.0),
+            Field('stock_count', 'stock_count', _int, 0),
+            Field('min_stock', 'min_stock', _int, 0),
+        ),
+        export_sql="""
+            SELECT p.name, s.name AS supplier, p.price_per_unit, p.stock_count, p.min_stock
+            FROM products p
+            LEFT JOIN suppliers s ON p.supplier_id = s.id
+            ORDER BY p.id
+        """,
+    ),
+    'orders': Entity(
+        table='orders', key='id',
+        fields=(
+            Field('id', 'id', _int, None),
+            Field('type', 'type', _order_type, REQUIRED),
+            Field('product', 'product_id', _text, None),
+            Field('supplier', 'supplier_id', _text, None),
+            Field('customer_email', 'customer_id', _text, None),
+            Field('units', 'units', _int, 0),
+            Field('delivery_date', 'delivery_date', date.fromisoformat, None),
+            Field('note', 'note', _text, None),
+            Field('status', 'status', _text, 'Pending'),
+            Field('created_at', 'created_at', datetime.fromisoformat, None),
+            Field('fulfilled_at', 'fulfilled_at', datetime.fromisoformat, None),
+        ),
+        export_sql="""
+            SELECT o.id, o.type, p.name AS product, s.name AS supplier, u.email AS customer_email,
+                   o.units, o.delivery_date, o.note, o.status, o.created_at, o.fulfilled_at
+            FROM orders o
+            LEFT JOIN products p ON o.product_id = p.id
+            LEFT JOIN suppliers s ON o.supplier_id = s.id
+            LEFT JOIN users u ON o.customer_id = u.id
+            ORDER BY o.id
+        """,
+    ),
+}
+
+
+class BulkError(ValueError):
+    """A file that cannot be imported or exported at all (unknown entity, bad header)."""
+
+
+# -----------------------
+# Import
+# -----------------------
+def _fields_for(entity, header):
+    """The entity's fields in `header` order; raises BulkError on a bad header."""
+    by_csv = {f.csv: f for f in entity.fields}
+    unknown = [name for name in header if name not in by_csv]
+    if unknown:
+        raise BulkError(f"unknown {entity.table} columns: {', '.join(unknown)} "
+                        f"(expected some of {', '.join(by_csv)})")
+    if len(set(header)) != len(header):
+        raise BulkError("duplicate column names in the header")
+    fields = [by_csv[name] for name in header]
+    if entity.key != 'id' and entity.key not in {f.column for f in fields}:
+        raise BulkError(f"a '{entity.key}' column is required to import {entity.table}")
+    return fields
+
+
+def _parse_row(fields, cells):
+    """{column: value} for one CSV row; raises ValueError with the reason."""
+    if len(cells) != len(fields):
+        raise ValueError(f"expected {len(fields)} fields, found {len(cells)}")
+    values = {}
+    for field, cell in zip(fields, cells):
+        cell = cell.strip()
+        if not cell:
+            if field.default is REQUIRED:
+                raise ValueError(f"'{field.csv}' is required")
+            values[field.column] = field.default
+            continue
+        try:
+            values[field.column] = field.parse(cell)
+        except ValueError as e:
+            raise ValueError(f"'{field.csv}': {e}") from None
+    return values
+
+
+def _lookup(cur, table, column, keys):
+    """{key: id} for the `keys` present in table.column."""
+    found = {}
+    keys = list(keys)
+    step = BULK_CONFIG['lookup_chunk']
+    for start in range(0, len(keys), step):
+        chunk = keys[start:start + step]
+        cur.execute(f"""
+            SELECT {column}, MIN(id) FROM {table}
+            WHERE {column} IN ({', '.join(['%s'] * len(chunk))})
+            GROUP BY {column}
+        """, chunk)
+        found.update(cur.fetchall())
+    return found
+
+
+def _existing_orders(cur, ids):
+    """{id: (type, product_id, units, created_at)} of the orders in `ids`."""
+    found = {}
+    ids = list(ids)
+    step = BULK_CONFIG['lookup_chunk']
+    for start in range(0, len(ids), step):
+        chunk = ids[start:start + step]
+        cur.execute(f"""
+            SELECT id, type, product_id, units, created_at FROM orders
+            WHERE id IN ({', '.join(['%s'] * len(chunk))})
+        """, chunk)
+        found.update((row[0], row[1:]) for row in cur.fetchall())
+    return found
+
+
+def _sales_delta(daily, order, sign):
+    """Add (sign x) a customer order's units to a rollup delta, as db.add_to_sales_rollups takes it."""
+    order_type, product_id, units, created_at = order
+    if order_type != 'customer_request' or product_id is None or not isinstance(created_at, datetime):
+        return
+    key = (product_id, created_at.date())
+    total = daily.get(key, (0, 0))
+    daily[key] = (total[0] + sign * units, total[1] + sign)
+
+
+class _Chunk:
+    """One chunk of parsed rows on its way into the database."""
+
+    def __init__(self, entity, columns):
+        self.entity = entity
+        self.columns = columns
+        self.rows = []          # (line, {column: value})
+        self.errors = []        # (line, message)
+        self.rollups_changed = False
+
+    def resolve(self, cur):
+        """Replace reference names by ids, dropping rows that name unknown ones."""
+        for column in self.columns:
+            if column not in REFERENCES:
+                continue
+            table, key = REFERENCES[column]
+            names = {values[column] for _, values in self.rows if values[column] is not None}
+            ids = _lookup(cur, table, key, names) if names else {}
+            kept = []
+            for line, values in self.rows:
+                name = values[column]
+                if name is not None and name not in ids:
+                    self.errors.append((line, f"unknown {table[:-1]} {name!r}"))
+                    continue
+                values[column] = ids.get(name)
+                kept.append((line, values))
+            self.rows = kept
+
+    def split(self, cur):
+        """(inserts, updates): rows as (line, values, existing id or order)."""
+        key = self.entity.key
+        # A key repeated within the chunk: the last row wins, earlier ones are reported
+        latest = {}
+        for line, values in self.rows:
+            if values.get(key) is None:
+                latest[("new", line)] = (line, values)
+                continue
+            earlier = latest.get(values[key])
+            if earlier is not None:
+                self.errors.append((earlier[0], f"{key} {values[key]!r} repeated on line {line}, which replaces it"))
+            latest[values[key]] = (line, values)
+        rows = sorted(latest.values(), key=lambda item: item[0])
+
+        if key == 'id':
+            existing = _existing_orders(cur, {v['id'] for _, v in rows if v.get('id') is not None})
+            return ([(line, v, None) for line, v in rows if v.get('id') not in existing],
+                    [(line, v, existing[v['id']]) for line, v in rows if v.get('id') in existing])
+        ids = _lookup(cur, self.entity.table, key, {v[key] for _, v in rows})
+        return ([(line, v, None) for line, v in rows if v[key] not in ids],
+                [(line, v, ids[v[key]]) for line, v in rows if v[key] in ids])
+
+
+def _insert_row(table, values, now):
+    # New products take last_updated from the column default (the database clock)
+    row = dict(values)
+    if table == 'orders' and row.get('created_at') is None:
+        row['created_at'] = now     # stamped client-side, as db does, so the rollups agree
+    return row
+
+
+def _order_fields(row):
+    return (row['type'], row.get('product_id'), row.get('units', 0), row['created_at'])
+
+
+def _write(cur, entity, columns, inserts, updates, now):
+    """
+    Write one batch of inserts and updates on `cur`, one executemany per
+    statement. Returns True if the sales rollups were adjusted.
+    """
+    table = entity.table
+    rows = [_insert_row(table, values, now) for _, values, _ in inserts]
+    # New orders without an id get theirs from the database
+    for with_id in (True, False):
+        batch = [row for row in rows if (row.get('id') is not None) == with_id]
+        if batch:
+            cols = [c for c in batch[0] if with_id or c != 'id']
+            cur.executemany(
+                f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join(['%s'] * len(cols))})",
+                [tuple(row[c] for c in cols) for row in batch]
+            )
+
+    set_columns = [c for c in columns if c != entity.key]
+    if updates and set_columns:
+        # An empty created_at keeps the stored one rather than clearing it
+        assignments = [f"{c} = COALESCE(%s, {c})" if c == 'created_at' else f"{c} = %s" for c in set_columns]
+        stamp = table == 'products'
+        if stamp:
+            assignments.append("last_updated = NOW()")
+        cur.executemany(
+            f"UPDATE {table} SET {', '.join(assignments)} WHERE id = %s",
+            [tuple(values[c] for c in set_columns)
+             + (values['id'] if table == 'orders' else found,)
+             for _, values, found in updates]
+        )
+
+    if table == 'orders':
+        # Keep the sales rollups in step: take back what updated orders counted, add the new figures
+        daily = {}
+        for _, values, old in updates:
+            _sales_delta(daily, old, -1)
+            merged = dict(zip(('type', 'product_id', 'units', 'created_at'), old))
+            merged.update((c, values[c]) for c in merged if c in values and values[c] is not None)
+            _sales_delta(daily, _order_fields(merged), +1)
+        for row in rows:
+            _sales_delta(daily, _order_fields(row), +1)
+        daily = {k: v for k, v in daily.items() if v != (0, 0)}
+        db.add_to_sales_rollups(cur, daily)
+        return bool(daily)
+    return False
+
+
+def _load_chunk(conn, entity, columns, chunk):
+    """Resolve and write one chunk; returns (inserted, updated)."""
+    cur = conn.cursor()
+    now = datetime.now()
+    try:
+        chunk.resolve(cur)
+        inserts, updates = chunk.split(cur)
+        try:
+            changed = _write(cur, entity, columns, inserts, updates, now)
+            conn.commit()
+            chunk.rollups_changed |= changed
+            return len(inserts), len(updates)
+        except db.Error:
+            conn.rollback()
+
+        # Something in the batch was rejected: write row by row to find it
+        done = [0, 0]
+        changed = False
+        for kind, rows in enumerate((inserts, updates)):
+            for row in rows:
+                cur.execute("SAVEPOINT bulk_row")
+                try:
+                    changed |= _write(cur, entity, columns, [row] if kind == 0 else [], [row] if kind == 1 else [],
+                                      now)
+                    cur.execute("RELEASE SAVEPOINT bulk_row")
+                    done[kind] += 1
+                except db.Error as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT bulk_row")
+                    chunk.errors.append((row[0], str(e)))
+        conn.commit()
+        chunk.rollups_changed |= changed
+        return tuple(done)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def _drop_forecasts():
+    """
+    Remove cached forecast fits after orders were rewritten. Their cache
+    key checksums the sales rollups (see forecast.data_fingerprint), which
+    changed in the same transactions as the orders, so the old fits can no
+    longer be hit; this frees them rather than waiting for eviction.
+    """
+    try:
+        import model_cache
+    except ImportError:     # numpy missing: there is no forecast cache
+        return
+    model_cache.clear()
+
+
+def import_csv(name, source, progress=None):
+    """
+    Upsert the rows of CSV `source` (a path or text file object) into the
+    entity `name` ('suppliers', 'products' or 'orders').
+
+    progress(rows read, rows failed), if given, is called after every
+    chunk. Returns an ImportResult; `errors` holds up to
+    BULK_CONFIG['max_errors'] (line, message) pairs, `failed` counts all.
+    """
+    entity = ENTITIES.get(name)
+    if entity is None:
+        raise BulkError(f"cannot import {name!r}; choose one of {', '.join(ENTITIES)}")
+    if isinstance(source, str):
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            return import_csv(name, f, progress)
+
+    reader = csv.reader(source)
+    header = [h.strip() for h in next(reader, [])]
+    fields = _fields_for(entity, header)
+    columns = [f.column for f in fields]
+
+    rows = inserted = updated = failed = 0
+    errors = []
+    rollups_changed = False
+
+    def record(chunk):
+        nonlocal failed, rollups_changed
+        failed += len(chunk.errors)
+        errors.extend(chunk.errors[:BULK_CONFIG['max_errors'] - len(errors)])
+        rollups_changed |= chunk.rollups_changed
+
+    with db.pooled_connection() as conn:
+        chunk = _Chunk(entity, columns)
+        for cells in reader:
+            if not any(c.strip() for c in cells):
+                continue
+            rows += 1
+            try:
+                chunk.rows.append((reader.line_num, _parse_row(fields, cells)))
+            except ValueError as e:
+                chunk.errors.append((reader.line_num, str(e)))
+            if len(chunk.rows) + len(chunk.errors) >= BULK_CONFIG['chunk_rows']:
+                counts = _load_chunk(conn, entity, columns, chunk)
+                inserted, updated = inserted + counts[0], updated + counts[1]
+                record(chunk)
+                chunk = _Chunk(entity, columns)
+                if progress is not None:
+                    progress(rows, failed)
+        counts = _load_chunk(conn, entity, columns, chunk)
+        inserted, updated = inserted + counts[0], updated + counts[1]
+        record(chunk)
+        if progress is not None:
+            progress(rows, failed)
+
+    if entity.table == 'products':
+        db.invalidate_catalog()
+    if rollups_changed:
+        _drop_forecasts()
+    errors.sort()
+    return ImportResult(rows, inserted, updated, failed, errors)
+
+
+# -----------------------
+# Export
+# -----------------------
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat(" ") if isinstance(value, datetime) else value.isoformat()
+    return value
+
+
+def export_csv(name, target, progress=None):
+    """
+    Write every row of entity `name` to CSV `target` (a path or text file
+    object), streamed from a server-side cursor. progress(rows written),
+    if given, is called after every chunk. Returns the number of rows.
+    """
+    entity = ENTITIES.get(name)
+    if entity is None:
+        raise BulkError(f"cannot export {name!r}; choose one of {', '.join(ENTITIES)}")
+    if isinstance(target, str):
+        with open(target, "w", newline="", encoding="utf-8") as f:
+            return export_csv(name, f, progress)
+
+    writer = csv.writer(target)
+    writer.writerow([f.csv for f in entity.fields])
+    written = 0
+    for batch in db.stream_query(entity.export_sql, batch_size=BULK_CONFIG['chunk_rows'],
+                                 row_mode='tuple', raise_errors=True):
+        writer.writerows([_cell(v) for v in row] for row in batch)
+        written += len(batch)
+        if progress is not None:
+            progress(written)
+    return written
+
+
+def write_errors(errors, target):
+    """Write (line, message) pairs from an ImportResult to CSV `target`."""
+    with open(target, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["line", "error"])
+        writer.writerows(errors)
+
+
+# -----------------------
+# Standalone Run
+# -----------------------
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Zodiac bulk CSV import / export")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("entity", choices=tuple(ENTITIES))
+    parser.add_argument("path", help="CSV file to read or write")
+    parser.add_argument("--errors", default=None, help="write rejected rows' line numbers and reasons here")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default=None,
+                        help="override DB_BACKEND for this run")
+    parser.add_argument("--chunk", type=int, default=None, help="rows per transaction")
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        db.configure_backend(args.backend)
+    if args.chunk:
+        BULK_CONFIG['chunk_rows'] = args.chunk
+
+    if args.command == "export":
+        count = export_csv(args.entity, args.path,
+                           lambda done: print(f"\r  {done:,} rows", end="", flush=True))
+        print(f"\nExported {count:,} {args.entity} to {args.path}.")
+        return 0
+
+    def progress(done, failed):
+        print(f"\r  {done:,} rows read, {failed:,} rejected", end="", flush=True)
+
+    try:
+        result = import_csv(args.entity, args.path, progress)
+    except BulkError as e:
+        print(f"Cannot import {args.path}: {e}")
+        return 2
+    print(f"\nImported {args.entity}: {result.inserted:,} inserted, {result.updated:,} updated, "
+          f"{result.failed:,} rejected.")
+    for line, message in result.errors[:20]:
+        print(f"  line {line}: {message}")
+    if result.failed > 20:
+        print(f"  ... {result.failed - 20:,} more" + ("" if args.errors else " (use --errors FILE to keep them)"))
+    if args.errors:
+        write_errors(result.errors, args.errors)
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
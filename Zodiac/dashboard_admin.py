@@ -3,14 +3,22 @@
 # Administrator Dashboard — Zodiac Supply Chain App
 # ----------------------------------------------------
 
+import heapq
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import filedialog, messagebox, ttk
 import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
-from db import get_connection
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-import numpy as np
+import db
+import instrumentation
+import slowlog
+from db import pooled_connection
+from tasks import TaskScope
+from virtual_grid import VirtualGrid
+from delta_sync import AutoRefresh, DeltaFeed
+
+# The forecasting and replenishment engines (and numpy) are imported inside
+# the functions using them: they are only needed once the Prediction tab is
+# opened or an automatic restock is run.
 
 
 FONT_FAMILY = "Segoe UI"
@@ -22,68 +30,97 @@ TEXT_COLOR = "#E6E6E6"
 # Fetch product data
 # ----------------------------------------------------
 def fetch_products():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, name, price_per_unit, stock_count, last_updated, monthly_sales
-        FROM products
-    """)
-    products = cursor.fetchall()
-    conn.close()
-    return products
+    return [(p["id"], p["name"], p["price_per_unit"], p["stock_count"], p["last_updated"], p["monthly_sales"])
+            for p in db.get_catalog().all()]
 
 
 # ----------------------------------------------------
 # Fetch order history
 # ----------------------------------------------------
+ORDER_HISTORY_SQL = """
+    SELECT o.id, p.name, o.units, o.status, o.created_at
+    FROM orders o
+    JOIN products p ON o.product_id = p.id
+    WHERE o.type = 'restock_request'
+    ORDER BY o.created_at DESC
+"""
+
+
 def fetch_orders():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT o.id, p.name, o.units, o.status, o.created_at
-        FROM orders o
-        JOIN products p ON o.product_id = p.id
-        WHERE o.type = 'restock_request'
-        ORDER BY o.created_at DESC
-    """)
-    orders = cursor.fetchall()
-    conn.close()
-    return orders
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(ORDER_HISTORY_SQL)
+        return cursor.fetchall()
+
+
+def stream_orders(batch_size=500):
+    """Yield the order history in lists of tuples without loading it all at once."""
+    return db.stream_query(ORDER_HISTORY_SQL, batch_size=batch_size, row_mode="tuple")
 
 
 # ----------------------------------------------------
-# Demand Prediction using Linear Regression
+# Demand Prediction (per-product trend forecasts)
 # ----------------------------------------------------
+PREDICTION_ROWS = 200       # largest forecast changes shown in the Prediction tab
+
+
 def predict_demand():
-    conn = get_connection()
-    df = pd.read_sql("SELECT name, price_per_unit, monthly_sales FROM products", conn)
-    conn.close()
+    from forecast import predict_demand as forecast_demand
+    return forecast_demand()
+
+
+def top_predictions(limit=PREDICTION_ROWS, progress=None):
+    """
+    (the `limit` forecasts moving furthest from last month, products forecast).
 
-    if df.empty:
-        return []
+    Chunks of the catalog are fitted and scored in parallel (see analytics);
+    with `progress`, the running top list is reported as each chunk lands,
+    as (rows, products done, products total).
+    """
+    import numpy as np
+    import forecast
 
-    X = df[["price_per_unit"]].values
-    y = df["monthly_sales"].values
-    model = LinearRegression().fit(X, y)
+    best = []       # min-heap of (score, product_id, DemandForecast)
+    done = 0
 
-    df["predicted_sales"] = model.predict(X)
-    df["trend"] = np.where(df["predicted_sales"] > df["monthly_sales"], "Increasing", "Decreasing")
+    def ranked():
+        return [row for _, _, row in sorted(best, reverse=True)]
 
-    return df
+    def on_chunk(history, start, stop, result, scores):
+        nonlocal done
+        # Only a chunk's own top `limit` can make the overall top (ties by id, as in the heap)
+        candidates = np.lexsort((history.product_ids[start:stop], scores))[::-1][:limit]
+        for row in forecast.forecast_rows(history, result, candidates, offset=start):
+            item = (abs(row.predicted_sales - row.last_month), row.product_id, row)
+            if len(best) < limit:
+                heapq.heappush(best, item)
+            elif item > best[0]:
+                heapq.heapreplace(best, item)
+        done += stop - start
+        if progress is not None:
+            progress((ranked(), done, len(history.product_ids)))
+
+    history, _ = forecast.forecast_products(on_chunk=on_chunk)
+    return ranked(), len(history.product_ids)
 
 
 # ----------------------------------------------------
 # Restock request function
 # ----------------------------------------------------
 def restock_request(product_id, supplier_id, units, delivery_date, note):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO orders (type, product_id, supplier_id, units, delivery_date, note, status)
-        VALUES ('restock_request', %s, %s, %s, %s, %s, 'Pending')
-    """, (product_id, supplier_id, units, delivery_date, note))
-    conn.commit()
-    conn.close()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO orders (type, product_id, supplier_id, units, delivery_date, note, status)
+            VALUES ('restock_request', %s, %s, %s, %s, %s, 'Pending')
+        """, (product_id, supplier_id, units, delivery_date, note))
+        conn.commit()
+
+
+def auto_restock():
+    """Raise restock requests for every product at its reorder point (see replenish)."""
+    import replenish
+    return replenish.run()
 
 
 # ----------------------------------------------------
@@ -102,10 +139,16 @@ def open_admin_dashboard(admin_id):
     tab_dashboard = ttkb.Frame(notebook, padding=20)
     tab_history = ttkb.Frame(notebook, padding=20)
     tab_prediction = ttkb.Frame(notebook, padding=20)
+    tab_data = ttkb.Frame(notebook, padding=20)
+    tab_diagnostics = ttkb.Frame(notebook, padding=20)
 
     notebook.add(tab_dashboard, text="Dashboard")
     notebook.add(tab_history, text="Order History")
     notebook.add(tab_prediction, text="Prediction")
+    notebook.add(tab_data, text="Import / Export")
+    notebook.add(tab_diagnostics, text="Diagnostics")
+
+    tasks = TaskScope(window)
 
     # ----------------------------------------------------
     # TAB 1 — DASHBOARD (Product table + Restock)
@@ -116,7 +159,25 @@ def open_admin_dashboard(admin_id):
     ).pack(pady=10)
 
     columns = ("Name", "Price", "Stock", "Last Updated", "Monthly Sales", "Status", "Action")
-    tree = ttk.Treeview(tab_dashboard, columns=columns, show="headings", height=12)
+
+    def format_product(p):
+        status = "🟢 OK" if p["stock_count"] > p["min_stock"] else "🔴 Low"
+        return (p["name"], p["price_per_unit"], p["stock_count"], p["last_updated"],
+                p["monthly_sales"], status, "Restock")
+
+    # Only the visible rows (plus a prefetch margin) are fetched, keyset-paged on (name, id)
+    grid = VirtualGrid(
+        tab_dashboard, columns,
+        count=db.count_products,
+        fetch=db.get_products_page,
+        key_at=db.get_product_key_at,
+        key=lambda p: (p["name"], p["id"]),
+        format_row=format_product,
+        height=12,
+        anchors=db.get_product_anchor_keys,
+        tasks=tasks,
+    )
+    tree = grid.tree
 
     for col in columns[:-1]:
         tree.heading(col, text=col)
@@ -124,34 +185,22 @@ def open_admin_dashboard(admin_id):
     tree.heading("Action", text="Restock")
     tree.column("Action", width=100, anchor="center")
 
-    products = fetch_products()
-    for p in products:
-        status = "🟢 OK" if p[3] > 10 else "🔴 Low"
-        tree.insert("", "end", values=(p[1], p[2], p[3], p[4], p[5], status, "Restock"))
+    grid.frame.pack(fill="both", expand=True, pady=10)
 
-    tree.pack(fill="both", expand=True, pady=10)
+    # Take the change watermark before the first page loads, then poll for
+    # products changed since and patch just those rows
+    product_feed = DeltaFeed.products()
+    tasks.submit(product_feed.start, on_done=lambda _: grid.refresh(tasks))
+    AutoRefresh(window, tasks, product_feed.poll, lambda rows: grid.patch(rows, tasks=tasks)).start()
 
     def on_tree_click(event):
         item = tree.identify_row(event.y)
-        if not item:
+        product = grid.row_for_item(item) if item else None
+        if not product:
             return
-        values = tree.item(item, "values")
-        product_name = values[0]
 
-        # Fetch product + supplier info
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, supplier_id FROM products WHERE name=%s
-        """, (product_name,))
-        prod = cursor.fetchone()
-        conn.close()
-
-        if not prod:
-            messagebox.showerror("Error", "Product not found.")
-            return
-
-        product_id, supplier_id = prod
+        product_name = product["name"]
+        product_id, supplier_id = product["id"], product["supplier_id"]
 
         # Open restock form modal
         restock_window = ttkb.Toplevel(window)
@@ -185,14 +234,35 @@ def open_admin_dashboard(admin_id):
                 messagebox.showerror("Error", "Invalid number of units.")
                 return
 
-            restock_request(product_id, supplier_id, units, delivery_date, note)
-            messagebox.showinfo("Success", "Restock request sent to supplier.")
-            restock_window.destroy()
+            def sent(_):
+                messagebox.showinfo("Success", "Restock request sent to supplier.")
+                restock_window.destroy()
 
-        ttkb.Button(restock_window, text="Submit", bootstyle="success", command=submit_restock).pack(pady=20)
+            tasks.submit(restock_request, product_id, supplier_id, units, delivery_date, note,
+                         on_done=sent, busy=[submit_button])
+
+        submit_button = ttkb.Button(restock_window, text="Submit", bootstyle="success", command=submit_restock)
+        submit_button.pack(pady=20)
 
     tree.bind("<Double-1>", on_tree_click)
 
+    # Batch restock: every product at its reorder point, one request per product
+    def run_auto_restock():
+        import replenish
+
+        def done(lines):
+            if lines is None:
+                messagebox.showerror("Error", "Automatic restock failed; no requests were sent.")
+            else:
+                messagebox.showinfo("Automatic Restock", f"Sent {replenish.summary(lines)}.")
+
+        tasks.submit(auto_restock, on_done=done, busy=[auto_restock_button])
+
+    auto_restock_button = ttkb.Button(
+        tab_dashboard, text="Auto Restock", bootstyle="success-outline", command=run_auto_restock
+    )
+    auto_restock_button.pack(pady=5)
+
     # ----------------------------------------------------
     # TAB 2 — ORDER HISTORY
     # ----------------------------------------------------
@@ -210,9 +280,17 @@ def open_admin_dashboard(admin_id):
 
     tree_hist.pack(fill="both", expand=True, pady=10)
 
-    for o in fetch_orders():
-        status_color = "Delivered ✅" if o[3] == "Delivered" else "Pending ⏳"
-        tree_hist.insert("", "end", values=(o[0], o[1], o[2], status_color, o[4]))
+    # Stream the history from a worker thread; each batch is inserted as it arrives
+    def read_history(progress):
+        for batch in stream_orders():
+            progress(batch)
+
+    def show_history_batch(batch):
+        for o in batch:
+            status_color = "Delivered ✅" if o[3] == "Delivered" else "Pending ⏳"
+            tree_hist.insert("", "end", values=(o[0], o[1], o[2], status_color, o[4]))
+
+    tasks.submit(read_history, on_progress=show_history_batch)
 
     # ----------------------------------------------------
     # TAB 3 — DEMAND PREDICTION
@@ -222,38 +300,228 @@ def open_admin_dashboard(admin_id):
         font=(FONT_FAMILY, 16, "bold"), foreground=ACCENT_COLOR
     ).pack(pady=10)
 
-    result_df = predict_demand()
-    if len(result_df) == 0:
-        ttkb.Label(tab_prediction, text="No products found for prediction.", font=(FONT_FAMILY, 12)).pack(pady=20)
-    else:
-        cols_pred = ("Product", "Price", "Current Sales", "Predicted", "Trend")
-        tree_pred = ttk.Treeview(tab_prediction, columns=cols_pred, show="headings", height=10)
-
-        for c in cols_pred:
-            tree_pred.heading(c, text=c)
-            tree_pred.column(c, anchor="center", width=150)
-
-        for _, r in result_df.iterrows():
-            trend_color = "🟢 Increasing" if r["trend"] == "Increasing" else "🔴 Decreasing"
+    loading_label = ttkb.Label(tab_prediction, text="Loading…", font=(FONT_FAMILY, 12))
+    loading_label.pack(pady=20)
+
+    tree_pred = None
+    trend_marks = {"Increasing": "🟢 Increasing", "Decreasing": "🔴 Decreasing"}
+
+    def fill_prediction(rows):
+        nonlocal tree_pred
+        if tree_pred is None:
+            cols_pred = ("Product", "Price", "Last Month", "Predicted", "95% Range", "Trend")
+            tree_pred = ttk.Treeview(tab_prediction, columns=cols_pred, show="headings", height=10)
+            for c in cols_pred:
+                tree_pred.heading(c, text=c)
+                tree_pred.column(c, anchor="center", width=140)
+            tree_pred.pack(fill="both", expand=True, pady=10)
+
+        tree_pred.delete(*tree_pred.get_children())
+        for r in rows:
+            band = "–" if r.lower != r.lower else f"{r.lower:.0f} – {r.upper:.0f}"    # NaN: too little history
             tree_pred.insert("", "end", values=(
-                r["name"], f"{r['price_per_unit']:.2f}", r["monthly_sales"], f"{r['predicted_sales']:.2f}", trend_color
+                r.name, f"{float(r.price_per_unit):.2f}", r.last_month, f"{r.predicted_sales:.2f}",
+                band, trend_marks.get(r.trend, "⚪ " + r.trend)
             ))
 
-        tree_pred.pack(fill="both", expand=True, pady=10)
+    def show_progress(update):
+        # Partial results stream in chunk by chunk while the forecast runs
+        rows, done, total = update
+        loading_label.configure(text=f"Forecasting… {done:,} of {total:,} products")
+        fill_prediction(rows)
+
+    def show_prediction(result):
+        rows, total = result
+        loading_label.destroy()
+        if not rows:
+            ttkb.Label(tab_prediction, text="No order history found for prediction.", font=(FONT_FAMILY, 12)).pack(pady=20)
+            return
+
+        fill_prediction(rows)
 
         ttkb.Label(
             tab_prediction,
             text=(
-                "This prediction uses a simple linear regression model trained on current pricing "
-                "and monthly sales data to estimate potential future demand. "
-                "A product with an 'Increasing' trend indicates positive demand elasticity — "
-                "higher prices are associated with higher sales or stable demand. Conversely, "
-                "a 'Decreasing' trend suggests price sensitivity and potential oversupply. "
-                "These insights help administrators plan restocks and pricing strategies efficiently."
+                f"Showing the {len(rows)} products (of {total:,} with orders) whose forecast moves furthest "
+                "from last month. Each product's monthly customer orders over the past year are fitted "
+                "with their own linear trend and projected one month ahead; the range is a 95% "
+                "prediction interval. An 'Increasing' trend marks growing demand that may call for an "
+                "earlier restock, while a 'Decreasing' trend suggests slowing sales and potential "
+                "oversupply. These insights help administrators plan restocks and pricing strategies efficiently."
             ),
             wraplength=800, justify="left", font=(FONT_FAMILY, 11), foreground="#BBB"
         ).pack(pady=20)
 
+    # The forecast (and numpy) load the first time the tab is opened
+    prediction_started = []
+
+    def on_tab_changed(event):
+        if prediction_started or notebook.select() != str(tab_prediction):
+            return
+        prediction_started.append(True)
+        tasks.submit(top_predictions, on_done=show_prediction, on_progress=show_progress)
+
+    notebook.bind("<<NotebookTabChanged>>", on_tab_changed, add="+")
+
+    # ----------------------------------------------------
+    # TAB 4 — BULK IMPORT / EXPORT (CSV, see bulk.py)
+    # ----------------------------------------------------
+    ttkb.Label(
+        tab_data, text="Bulk Import / Export",
+        font=(FONT_FAMILY, 16, "bold"), foreground=ACCENT_COLOR
+    ).pack(pady=10)
+
+    data_controls = ttkb.Frame(tab_data)
+    data_controls.pack(pady=10)
+
+    entity_var = tk.StringVar(value="products")
+    ttkb.Combobox(
+        data_controls, textvariable=entity_var, values=("suppliers", "products", "orders"),
+        state="readonly", width=14
+    ).pack(side="left", padx=5)
+
+    data_status = ttkb.Label(tab_data, text="", font=(FONT_FAMILY, 11))
+    data_status.pack(pady=5)
+
+    error_cols = ("Line", "Error")
+    tree_errors = ttk.Treeview(tab_data, columns=error_cols, show="headings", height=10)
+    tree_errors.heading("Line", text="Line")
+    tree_errors.column("Line", anchor="center", width=80)
+    tree_errors.heading("Error", text="Rejected Row")
+    tree_errors.column("Error", anchor="w", width=700)
+    tree_errors.pack(fill="both", expand=True, pady=10)
+
+    def run_import():
+        import bulk
+
+        entity = entity_var.get()
+        path = filedialog.askopenfilename(parent=window, title=f"Import {entity}",
+                                          filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        tree_errors.delete(*tree_errors.get_children())
+
+        def show_progress(update):
+            done, rejected = update
+            data_status.configure(text=f"Importing {entity}… {done:,} rows read, {rejected:,} rejected")
+
+        def imported(result):
+            data_status.configure(text=f"Imported {entity}: {result.inserted:,} inserted, "
+                                       f"{result.updated:,} updated, {result.failed:,} rejected.")
+            for line, message in result.errors:
+                tree_errors.insert("", "end", values=(line, message))
+            if entity == "products":
+                grid.refresh(tasks)
+
+        def failed(e):
+            data_status.configure(text="")
+            messagebox.showerror("Import Failed", str(e))
+
+        def do_import(progress):
+            return bulk.import_csv(entity, path, lambda done, rejected: progress((done, rejected)))
+
+        tasks.submit(do_import, on_done=imported, on_error=failed, on_progress=show_progress,
+                     busy=[import_button, export_button])
+
+    def run_export():
+        import bulk
+
+        entity = entity_var.get()
+        path = filedialog.asksaveasfilename(parent=window, title=f"Export {entity}", defaultextension=".csv",
+                                            initialfile=f"{entity}.csv", filetypes=[("CSV files", "*.csv")])
+        if not path:
+            return
+
+        def show_progress(done):
+            data_status.configure(text=f"Exporting {entity}… {done:,} rows")
+
+        def exported(count):
+            data_status.configure(text=f"Exported {count:,} {entity} to {path}.")
+
+        def failed(e):
+            data_status.configure(text="")
+            messagebox.showerror("Export Failed", str(e))
+
+        tasks.submit(bulk.export_csv, entity, path, on_done=exported, on_error=failed,
+                     on_progress=show_progress, busy=[import_button, export_button])
+
+    import_button = ttkb.Button(data_controls, text="Import CSV…", bootstyle="success", command=run_import)
+    import_button.pack(side="left", padx=5)
+    export_button = ttkb.Button(data_controls, text="Export CSV…", bootstyle="secondary", command=run_export)
+    export_button.pack(side="left", padx=5)
+
+    # ----------------------------------------------------
+    # TAB 5 — DIAGNOSTICS (data-layer metrics, see instrumentation.py)
+    # ----------------------------------------------------
+    ttkb.Label(
+        tab_diagnostics, text="Data Layer Diagnostics",
+        font=(FONT_FAMILY, 16, "bold"), foreground=ACCENT_COLOR
+    ).pack(pady=10)
+
+    diag_controls = ttkb.Frame(tab_diagnostics)
+    diag_controls.pack(pady=5)
+
+    pool_status = ttkb.Label(tab_diagnostics, text="", font=(FONT_FAMILY, 11))
+    pool_status.pack(pady=5)
+
+    ttkb.Label(
+        tab_diagnostics,
+        text=f"Statements over {slowlog.SLOW_QUERY_CONFIG['threshold_ms']:g} ms are logged with their plan "
+             f"to {slowlog.SLOW_QUERY_LOG} (summary: python slowlog.py).",
+        font=(FONT_FAMILY, 10), foreground="#BBB", wraplength=850
+    ).pack()
+
+    diag_cols = ("Name", "Calls", "Errors", "Rows", "p50 ms", "p95 ms", "p99 ms", "Max ms", "Total ms")
+    tree_diag = ttk.Treeview(tab_diagnostics, columns=diag_cols, show="headings", height=12)
+    for col in diag_cols:
+        tree_diag.heading(col, text=col)
+        tree_diag.column(col, anchor="e", width=70)
+    tree_diag.column("Name", anchor="w", width=300)
+    tree_diag.pack(fill="both", expand=True, pady=10)
+
+    def refresh_diagnostics():
+        pool = db.get_pool_stats()
+        pool_status.configure(
+            text=f"Pool: {pool['in_use']} in use, {pool['idle']} idle of {pool['size']} · "
+                 f"{pool['borrows']:,} borrows, {pool['waits']:,} waited, {pool['timeouts']:,} timed out · "
+                 f"acquire avg {pool['borrow_time_avg'] * 1000:.2f} ms, max {pool['borrow_time_max'] * 1000:.2f} ms"
+        )
+        rows = [
+            (name, m['calls'], m['errors'], m['rows'], f"{m['p50_ms']:.2f}", f"{m['p95_ms']:.2f}",
+             f"{m['p99_ms']:.2f}", f"{m['max_ms']:.2f}", f"{m['total_ms']:.1f}")
+            for name, m in instrumentation.snapshot().items()
+        ]
+        tree_diag.delete(*tree_diag.get_children())
+        for row in rows:
+            tree_diag.insert("", "end", values=row)
+
+    def reset_diagnostics():
+        instrumentation.reset()
+        refresh_diagnostics()
+
+    def dump_diagnostics():
+        path = filedialog.asksaveasfilename(parent=window, title="Save Metrics", defaultextension=".json",
+                                            initialfile="zodiac-metrics.json", filetypes=[("JSON files", "*.json")])
+        if not path:
+            return
+        try:
+            db.dump_metrics(path)
+        except OSError as e:
+            messagebox.showerror("Save Failed", str(e))
+            return
+        messagebox.showinfo("Metrics Saved", f"Metrics written to {path}.")
+
+    ttkb.Button(diag_controls, text="Refresh", bootstyle="info", command=refresh_diagnostics).pack(side="left", padx=5)
+    ttkb.Button(diag_controls, text="Reset", bootstyle="secondary", command=reset_diagnostics).pack(side="left", padx=5)
+    ttkb.Button(diag_controls, text="Save JSON…", bootstyle="success",
+                command=dump_diagnostics).pack(side="left", padx=5)
+
+    def on_diagnostics_shown(event):
+        if notebook.select() == str(tab_diagnostics):
+            refresh_diagnostics()
+
+    notebook.bind("<<NotebookTabChanged>>", on_diagnostics_shown, add="+")
+
     # ----------------------------------------------------
     # LOGOUT
     # ----------------------------------------------------
@@ -4,12 +4,17 @@
 # ----------------------------------------------------
 
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, ttk
 import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
-from db import get_connection
+import db
+from tasks import TaskScope
+from delta_sync import AutoRefresh, DeltaFeed
+from product_search import ProductSearchIndex
 
 
+SEARCH_DELAY_MS = 120       # typeahead debounce
+
 FONT_FAMILY = "Segoe UI"
 ACCENT_COLOR = "#9B8AFB"
 TEXT_COLOR = "#E6E6E6"
@@ -19,12 +24,8 @@ TEXT_COLOR = "#E6E6E6"
 # Function to fetch products from database
 # ----------------------------------------------------
 def fetch_products():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, name, price_per_unit FROM products")
-    products = cursor.fetchall()
-    conn.close()
-    return products
+    # Served from the shared catalog cache; only the first window pays for the query
+    return [(p["id"], p["name"], p["price_per_unit"]) for p in db.get_catalog().all()]
 
 
 # ----------------------------------------------------
@@ -32,7 +33,7 @@ def fetch_products():
 # ----------------------------------------------------
 def open_customer_dashboard(customer_id, customer_name):
     window = ttkb.Toplevel(title=f"Customer Dashboard | {customer_name}")
-    window.geometry("700x500")
+    window.geometry("720x760")
     window.resizable(False, False)
     window.configure(bg="#111")
 
@@ -45,9 +46,11 @@ def open_customer_dashboard(customer_id, customer_name):
     frame = ttkb.Frame(window, padding=20)
     frame.pack(pady=10, fill="x")
 
-    # Fetch product data
-    products = fetch_products()
-    product_names = [p[1] for p in products]
+    tasks = TaskScope(window)
+
+    # Product data is fetched and indexed in the background; the combobox
+    # offers ranked typeahead matches instead of every product name
+    index = ProductSearchIndex()
 
     # Variables
     selected_product = tk.StringVar()
@@ -55,8 +58,42 @@ def open_customer_dashboard(customer_id, customer_name):
     total_cost_var = tk.StringVar(value="0.00")
 
     ttkb.Label(frame, text="Select Product:", font=(FONT_FAMILY, 12)).grid(row=0, column=0, pady=10, sticky="w")
-    product_combo = ttkb.Combobox(frame, textvariable=selected_product, values=product_names, width=40)
+    product_combo = ttkb.Combobox(frame, textvariable=selected_product, values=[], width=40)
     product_combo.grid(row=0, column=1, pady=10, padx=10)
+    ttkb.Label(frame, textvariable=tasks.status, foreground="#888").grid(row=0, column=2, sticky="w")
+
+    product_feed = DeltaFeed.products()
+
+    def load_products():
+        product_feed.start()
+        # Prefix search is usable at once; substring search follows
+        return ProductSearchIndex(fetch_products(), ngrams=False)
+
+    def show_products(loaded):
+        nonlocal index
+        index = loaded
+        product_combo.configure(values=index.names())
+        build, publish = loaded.ngram_builder()
+        tasks.submit(build, on_done=publish, quiet=True)
+
+    tasks.submit(load_products, on_done=show_products, busy=[product_combo])
+
+    search_after = None
+
+    def run_search():
+        nonlocal search_after
+        search_after = None
+        product_combo.configure(values=[p[1] for p in index.search(selected_product.get())])
+
+    def on_search_key(event):
+        nonlocal search_after
+        if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+            return
+        if search_after is not None:
+            product_combo.after_cancel(search_after)
+        search_after = product_combo.after(SEARCH_DELAY_MS, run_search)
+
+    product_combo.bind("<KeyRelease>", on_search_key)
 
     ttkb.Label(frame, text="No. of Units:", font=(FONT_FAMILY, 12)).grid(row=1, column=0, pady=10, sticky="w")
     units_entry = ttkb.Entry(frame, textvariable=units_var, width=15)
@@ -74,11 +111,9 @@ def open_customer_dashboard(customer_id, customer_name):
                 total_cost_var.set("0.00")
                 return
 
-            for p in products:
-                if p[1] == product_name:
-                    total = float(p[2]) * units
-                    total_cost_var.set(f"{total:.2f}")
-                    break
+            product = index.by_name(product_name)
+            if product:
+                total_cost_var.set(f"{float(product[2]) * units:.2f}")
         except Exception:
             total_cost_var.set("0.00")
 
@@ -86,62 +121,139 @@ def open_customer_dashboard(customer_id, customer_name):
     units_var.trace_add("write", update_total_cost)
 
     # ----------------------------------------------------
-    # ORDER FUNCTION
+    # CART
     # ----------------------------------------------------
-    def place_order():
+    cart = {}   # product_id -> units, in the order lines were added
+    cart_total_var = tk.StringVar(value="0.00")
+
+    cart_frame = ttkb.Frame(window, padding=(20, 0))
+    cart_frame.pack(fill="both", expand=True)
+
+    cart_cols = ("Product", "Units", "Price", "Subtotal")
+    cart_tree = ttk.Treeview(cart_frame, columns=cart_cols, show="headings", height=6)
+    for col in cart_cols:
+        cart_tree.heading(col, text=col)
+        cart_tree.column(col, anchor="center", width=150)
+    cart_tree.pack(fill="both", expand=True)
+
+    cart_summary = ttkb.Frame(cart_frame)
+    cart_summary.pack(fill="x", pady=8)
+    ttkb.Label(cart_summary, text="Cart Total (₹):", font=(FONT_FAMILY, 12)).pack(side="left")
+    ttkb.Label(
+        cart_summary, textvariable=cart_total_var,
+        font=(FONT_FAMILY, 12, "bold"), foreground="#B8B8FF"
+    ).pack(side="left", padx=8)
+
+    def refresh_cart():
+        cart_tree.delete(*cart_tree.get_children())
+        total = 0.0
+        for product_id, units in cart.items():
+            _, name, price = index.get(product_id)
+            subtotal = float(price) * units
+            total += subtotal
+            cart_tree.insert("", "end", iid=str(product_id),
+                             values=(name, units, f"{float(price):.2f}", f"{subtotal:.2f}"))
+        cart_total_var.set(f"{total:.2f}")
+
+    def reset_form():
+        selected_product.set("")
+        units_var.set(0)
+        total_cost_var.set("0.00")
+
+    def add_to_cart():
         product_name = selected_product.get()
-        units = units_var.get()
+        try:
+            units = units_var.get()
+        except tk.TclError:
+            units = 0
 
         if not product_name or units <= 0:
             messagebox.showwarning("Input Error", "Please select product and enter valid units.")
             return
 
-        # Fetch selected product id and price
-        product = next((p for p in products if p[1] == product_name), None)
+        product = index.by_name(product_name)
         if not product:
             messagebox.showerror("Error", "Product not found!")
             return
 
-        product_id, _, price = product
-        total_cost = float(price) * units
+        cart[product[0]] = cart.get(product[0], 0) + units
+        refresh_cart()
+        reset_form()
+
+    def remove_from_cart():
+        for iid in cart_tree.selection():
+            cart.pop(int(iid), None)
+        refresh_cart()
 
-        conn = get_connection()
-        cursor = conn.cursor()
+    # ----------------------------------------------------
+    # LIVE PRODUCT UPDATES
+    # ----------------------------------------------------
+    def apply_product_changes(rows):
+        """Patch prices/names changed elsewhere without reloading the catalog."""
+        for row in rows:
+            index.upsert((row["id"], row["name"], row["price_per_unit"]))
+        update_total_cost()
+        if any(row["id"] in cart for row in rows):
+            refresh_cart()
 
-        # Check available stock
-        cursor.execute("SELECT stock_count FROM products WHERE id=%s", (product_id,))
-        current_stock = cursor.fetchone()[0]
+    AutoRefresh(window, tasks, product_feed.poll, apply_product_changes).start()
 
-        if current_stock < units:
-            messagebox.showerror("Stock Error", "Insufficient stock available.")
-            conn.close()
+    # ----------------------------------------------------
+    # ORDER FUNCTION
+    # ----------------------------------------------------
+    def place_order():
+        # An empty cart with a filled-in form places that single line
+        if not cart and selected_product.get():
+            add_to_cart()
+        if not cart:
+            messagebox.showwarning("Input Error", "Your cart is empty.")
             return
 
-        # Create order (customer_request)
-        cursor.execute("""
-            INSERT INTO orders (type, product_id, customer_id, units, status)
-            VALUES ('customer_request', %s, %s, %s, 'Pending')
-        """, (product_id, customer_id, units))
+        lines = list(cart.items())
+        total_cost = float(cart_total_var.get())
 
-        # Subtract stock
-        cursor.execute("""
-            UPDATE products SET stock_count = stock_count - %s WHERE id = %s
-        """, (units, product_id))
+        def order_placed(result):
+            if result == db.ORDER_INSUFFICIENT_STOCK:
+                messagebox.showerror("Stock Error", "Insufficient stock available for one or more items.")
+                return
+            if result != db.ORDER_PLACED:
+                messagebox.showerror("Error", "Could not place the order. Please try again.")
+                return
 
-        conn.commit()
-        conn.close()
+            units = sum(u for _, u in lines)
+            messagebox.showinfo(
+                "Order Confirmed",
+                f"Your order for {units} units across {len(lines)} product(s) has been placed!\n"
+                f"Total cost: ₹{total_cost:.2f}"
+            )
 
-        messagebox.showinfo("Order Confirmed", f"Your order for {units} x {product_name} has been placed!\nTotal cost: ₹{total_cost:.2f}")
+            # Lines added while the order was in flight stay in the cart
+            for product_id, _ in lines:
+                cart.pop(product_id, None)
+            refresh_cart()
 
-        # Reset fields
-        selected_product.set("")
-        units_var.set(0)
-        total_cost_var.set("0.00")
+        # Reserve stock and create every order (customer_request) in one transaction
+        tasks.submit(db.place_customer_orders, customer_id, lines, on_done=order_placed,
+                     busy=[place_button])
+
+    buttons = ttkb.Frame(frame)
+    buttons.grid(row=3, column=0, columnspan=2, pady=20)
+
+    ttkb.Button(
+        buttons, text="Add to Cart", bootstyle="secondary",
+        width=16, command=add_to_cart
+    ).pack(side="left", padx=6)
 
     ttkb.Button(
-        frame, text="Place Order", bootstyle="primary",
+        buttons, text="Remove Selected", bootstyle="secondary-outline",
+        width=16, command=remove_from_cart
+    ).pack(side="left", padx=6)
+
+    place_button = ttkb.Button(
+        buttons, text="Place Order", bootstyle="primary",
         width=20, command=place_order
-    ).grid(row=3, column=0, columnspan=2, pady=30)
+    )
+    place_button.pack(side="left", padx=6)
 
     # ----------------------------------------------------
     # LOGOUT BUTTON
@@ -3,11 +3,12 @@
 # Supplier Dashboard — Zodiac Supply Chain App
 # ----------------------------------------------------
 
-import tkinter as tk
 from tkinter import ttk, messagebox
 import ttkbootstrap as ttkb
 from ttkbootstrap.constants import *
-from db import get_connection
+import db
+from tasks import TaskScope
+from delta_sync import AutoRefresh, SnapshotFeed, sync_treeview
 
 
 FONT_FAMILY = "Segoe UI"
@@ -43,10 +44,10 @@ def open_supplier_dashboard(supplier_id):
     ).pack(pady=8)
 
     # ----------------------------------------------------
-    # Treeview - Pending Requests
+    # Treeview - Pending Requests (rows keyed by order id)
     # ----------------------------------------------------
-    cols = ("Stock Name", "Units Required", "Delivery Date", "Note", "Supplier Name", "Status")
-    tree = ttk.Treeview(window, columns=cols, show="headings", height=15)
+    cols = ("Order ID", "Product", "Units", "Delivery Date", "Note", "Status")
+    tree = ttk.Treeview(window, columns=cols, show="headings", height=15, selectmode="extended")
     style = ttk.Style()
     style.configure("Treeview", rowheight=30, font=(FONT_FAMILY, 11))
     style.configure("Treeview.Heading", font=(FONT_FAMILY, 12, "bold"))
@@ -57,27 +58,42 @@ def open_supplier_dashboard(supplier_id):
 
     tree.pack(pady=20)
 
+    tasks = TaskScope(window)
+    ttkb.Label(window, textvariable=tasks.status, foreground=TEXT_COLOR, background=BG_COLOR).pack()
+
     # ----------------------------------------------------
     # Load pending restock requests
     # ----------------------------------------------------
+    # The login id is resolved to suppliers.id once; the queue is then read
+    # by (supplier_id, status) from the orders table
+    supplier_pk = None
+
+    def fetch_requests():
+        return db.get_supplier_queue(supplier_pk) if supplier_pk is not None else []
+
+    # The (small) pending list is re-read and only the rows that differ are
+    # patched, keyed by order id
+    request_feed = SnapshotFeed(fetch_requests)
+
+    def show_requests(data):
+        sync_treeview(tree, data, iid=lambda row: row[0], values=lambda row: row)
+
     def load_requests():
-        for row in tree.get_children():
-            tree.delete(row)
+        auto_refresh.refresh_now()
 
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT stock_name, units_required, delivery_date, note, supplier_name, status
-            FROM restock_requests
-            WHERE supplier_name=%s AND status='Pending'
-        """, (supplier_id,))
-        data = cursor.fetchall()
-        conn.close()
+    auto_refresh = AutoRefresh(window, tasks, request_feed.poll, show_requests)
 
-        for item in data:
-            tree.insert("", tk.END, values=item)
+    def resolved(pk):
+        nonlocal supplier_pk
+        if pk is None:
+            messagebox.showwarning("No Supplier Record",
+                                   f"No supplier matches the login '{supplier_id}'; there is no queue to show.")
+            return
+        supplier_pk = pk
+        tasks.submit(request_feed.poll, on_done=show_requests)
+        auto_refresh.start()
 
-    load_requests()
+    tasks.submit(db.get_supplier_id_for_login, supplier_id, on_done=resolved)
 
     # ----------------------------------------------------
     # Confirm Restock Function
@@ -85,37 +101,28 @@ def open_supplier_dashboard(supplier_id):
     def confirm_restock():
         selected = tree.selection()
         if not selected:
-            messagebox.showwarning("Selection Required", "Please select a restock request to confirm.")
+            messagebox.showwarning("Selection Required", "Please select one or more restock requests to confirm.")
             return
 
-        values = tree.item(selected[0], "values")
-        stock_name = values[0]
-        units_required = int(values[1])
+        order_ids = [int(iid) for iid in selected]
 
-        conn = get_connection()
-        cursor = conn.cursor()
+        def confirmed(ok):
+            if ok:
+                messagebox.showinfo("Success", f"{len(order_ids)} restock request(s) confirmed and stock updated.")
+            else:
+                messagebox.showerror("Error", "Some of the selected requests were already confirmed or could "
+                                              "not be updated; nothing was changed.")
+            load_requests()
 
-        # Update stock count in product table
-        cursor.execute("UPDATE products SET current_stock_count = current_stock_count + %s WHERE name=%s",
-                       (units_required, stock_name))
+        # Every selected delivery goes through in one transaction, or none does
+        tasks.submit(db.mark_order_delivered, order_ids, supplier_pk, on_done=confirmed,
+                     busy=[confirm_button])
 
-        # Update request status
-        cursor.execute("""
-            UPDATE restock_requests
-            SET status='Delivered'
-            WHERE stock_name=%s AND supplier_name=%s AND status='Pending'
-        """, (stock_name, supplier_id))
-
-        conn.commit()
-        conn.close()
-
-        messagebox.showinfo("Success", f"Restock for '{stock_name}' confirmed and updated.")
-        load_requests()
-
-    ttkb.Button(
+    confirm_button = ttkb.Button(
         window, text="Confirm Restock", bootstyle="success",
         width=20, command=confirm_restock
-    ).pack(pady=10)
+    )
+    confirm_button.pack(pady=10)
 
     # ----------------------------------------------------
     # Logout
@@ -3,10 +3,28 @@
 # Database connection and helper utilities for Zodiac
 # ----------------------------------------------------
 
-import mysql.connector
-from mysql.connector import Error
 import hashlib
-from datetime import datetime
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import db_sqlite
+import instrumentation
+import schema
+
+try:
+    import mysql.connector
+    from mysql.connector import Error as MySQLError
+except ImportError:     # SQLite-only installs
+    mysql = None
+
+    class MySQLError(Exception):
+        """Placeholder so `except Error` works without mysql-connector installed."""
 
 
 # -----------------------
@@ -20,19 +38,433 @@ DB_CONFIG = {
 }
 
 
+# -----------------------
+# Backend Selection
+# -----------------------
+# 'mysql'  -> MySQL server described by DB_CONFIG (default)
+# 'sqlite' -> embedded WAL-mode database file described by SQLITE_CONFIG
+DB_BACKEND = os.environ.get('ZODIAC_DB_BACKEND', 'mysql')
+
+SQLITE_CONFIG = {
+    'path': os.environ.get(
+        'ZODIAC_SQLITE_PATH',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'zodiac.db')
+    ),
+    'timeout': 30.0,            # Seconds to wait on a locked database
+}
+
+
+# -----------------------
+# Connection Pool Configuration
+# -----------------------
+POOL_CONFIG = {
+    'size': 5,                  # Maximum number of open connections
+    'acquire_timeout': 10.0,    # Seconds to wait for a free connection
+    'idle_timeout': 300.0,      # Close connections idle for longer than this
+    'max_lifetime': 3600.0,     # Recycle connections older than this
+    'validate_on_borrow': True  # Ping idle connections before handing them out
+}
+
+
+class PoolError(Exception):
+    """Raised when the pool cannot hand out a connection in time."""
+
+
+# Every error the data layer may raise, whichever backend is active
+Error = (MySQLError, sqlite3.Error, PoolError)
+
+
+# -----------------------
+# Pooled Connection Wrapper
+# -----------------------
+class PooledConnection:
+    """
+    Thin proxy around a raw connection borrowed from the pool.
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to the pool instead of tearing down the socket. Can be
+    used as a context manager; the transaction is rolled back if the block
+    raises and the connection is returned either way.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._broken = False
+        self._cursors = weakref.WeakSet()
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise PoolError("Connection already returned to the pool")
+        return getattr(raw, name)
+
+    def cursor(self, *args, **kwargs):
+        """A cursor of the underlying connection whose statements are timed (see instrumentation)."""
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise PoolError("Connection already returned to the pool")
+        cursor = instrumentation.InstrumentedCursor(raw.cursor(*args, **kwargs))
+        self._cursors.add(cursor)
+        return cursor
+
+    def invalidate(self):
+        """Discard the connection instead of reusing it (e.g. after a socket error)."""
+        self._broken = True
+
+    def close(self):
+        """Return the connection to the pool (safe to call more than once)."""
+        for cursor in list(self._cursors):
+            cursor.finish()     # record statements whose results were not read to the end
+        self._cursors.clear()
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw, self._created_at, self._broken)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self._raw is not None:
+            try:
+                self._raw.rollback()
+            except Exception:
+                self._broken = True
+        self.close()
+        return False
+
+
+# -----------------------
+# Connection Pool
+# -----------------------
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of database connections.
+
+    Idle connections are validated on borrow, closed after idle_timeout and
+    recycled once they exceed max_lifetime. When every connection is in use,
+    borrowers wait up to acquire_timeout seconds before PoolError is raised.
+    """
+
+    def __init__(self, factory, size=5, acquire_timeout=10.0, idle_timeout=300.0,
+                 max_lifetime=3600.0, validate_on_borrow=True):
+        self._factory = factory
+        self.size = max(1, int(size))
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.validate_on_borrow = validate_on_borrow
+
+        self._cond = threading.Condition()
+        self._idle = deque()        # (raw, created_at, last_used), most recent on the right
+        self._open = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._stats = {
+            'borrows': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'timeouts': 0,
+            'borrow_time_total': 0.0,
+            'borrow_time_max': 0.0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'recycled_lifetime': 0,
+            'evicted_idle': 0,
+            'validation_failures': 0,
+        }
+
+    # ---- borrowing ----
+    def acquire(self):
+        """Borrow a connection, opening a new one if the pool is not yet full."""
+        started = time.perf_counter()
+        deadline = started + self.acquire_timeout
+        waited = False
+
+        while True:
+            entry, create, stale = None, False, []
+            with self._cond:
+                if self._closed:
+                    raise PoolError("Connection pool is closed")
+                stale = self._evict_expired_locked()
+                if self._idle:
+                    entry = self._idle.pop()
+                    self._in_use += 1
+                elif self._open < self.size:
+                    self._open += 1
+                    self._in_use += 1
+                    create = True
+                else:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        instrumentation.record("pool.acquire", time.perf_counter() - started, error=True)
+                        raise PoolError(f"No free connection after {self.acquire_timeout}s")
+                    if not waited:
+                        waited = True
+                        self._stats['waits'] += 1
+                    wait_started = time.perf_counter()
+                    self._cond.wait(remaining)
+                    self._stats['wait_time_total'] += time.perf_counter() - wait_started
+
+            self._close_raw(stale)
+
+            if create:
+                try:
+                    raw = self._factory()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                created_at = time.monotonic()
+                with self._cond:
+                    self._stats['connections_created'] += 1
+                return self._hand_out(raw, created_at, started)
+
+            if entry is not None:
+                raw, created_at, _ = entry
+                if self.validate_on_borrow and not self._is_alive(raw):
+                    with self._cond:
+                        self._stats['validation_failures'] += 1
+                        self._open -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    self._close_raw([raw])
+                    continue
+                return self._hand_out(raw, created_at, started)
+
+    def _hand_out(self, raw, created_at, started):
+        elapsed = time.perf_counter() - started
+        with self._cond:
+            self._stats['borrows'] += 1
+            self._stats['borrow_time_total'] += elapsed
+            self._stats['borrow_time_max'] = max(self._stats['borrow_time_max'], elapsed)
+        instrumentation.record("pool.acquire", elapsed)
+        return PooledConnection(self, raw, created_at)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that borrows a connection and always returns it."""
+        conn = self.acquire()
+        with conn:
+            yield conn
+
+    # ---- returning ----
+    def _release(self, raw, created_at, broken=False):
+        # End a transaction the borrower left open (on MySQL a read opens one
+        # too) so the next borrower gets a fresh snapshot; a connection that
+        # was committed, or never used, goes back without a round trip
+        if not broken and getattr(raw, "in_transaction", True):
+            try:
+                raw.rollback()
+            except Exception:
+                broken = True
+
+        now = time.monotonic()
+        discard = broken or self._closed or (now - created_at) >= self.max_lifetime
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._open -= 1
+                if not broken and not self._closed:
+                    self._stats['recycled_lifetime'] += 1
+            else:
+                self._idle.append((raw, created_at, now))
+            self._cond.notify()
+        if discard:
+            self._close_raw([raw])
+
+    # ---- housekeeping ----
+    def _evict_expired_locked(self):
+        """Pop idle connections past idle_timeout or max_lifetime (caller holds the lock)."""
+        now = time.monotonic()
+        keep, stale = deque(), []
+        for raw, created_at, last_used in self._idle:
+            if now - created_at >= self.max_lifetime:
+                self._stats['recycled_lifetime'] += 1
+                stale.append(raw)
+            elif now - last_used >= self.idle_timeout:
+                self._stats['evicted_idle'] += 1
+                stale.append(raw)
+            else:
+                keep.append((raw, created_at, last_used))
+        if stale:
+            self._idle = keep
+            self._open -= len(stale)
+            self._cond.notify(len(stale))
+        return stale
+
+    @staticmethod
+    def _is_alive(raw):
+        try:
+            return raw.is_connected()
+        except Exception:
+            return False
+
+    def _close_raw(self, raws):
+        for raw in raws:
+            try:
+                raw.close()
+            except Exception:
+                pass
+            with self._cond:
+                self._stats['connections_closed'] += 1
+
+    def close(self):
+        """Close idle connections and refuse new borrows; busy ones close on return."""
+        with self._cond:
+            self._closed = True
+            idle = [raw for raw, _, _ in self._idle]
+            self._idle.clear()
+            self._open -= len(idle)
+            self._cond.notify_all()
+        self._close_raw(idle)
+
+    def stats(self):
+        """Snapshot of pool counters plus current occupancy."""
+        with self._cond:
+            snap = dict(self._stats)
+            snap.update(size=self.size, open=self._open, in_use=self._in_use, idle=len(self._idle))
+        borrows = snap['borrows']
+        snap['borrow_time_avg'] = snap['borrow_time_total'] / borrows if borrows else 0.0
+        return snap
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _open_raw_connection():
+    """Open a new connection on the configured backend (used by the pool)."""
+    if DB_BACKEND == 'sqlite':
+        return db_sqlite.connect(**SQLITE_CONFIG)
+    if DB_BACKEND == 'mysql':
+        if mysql is None:
+            raise PoolError("mysql-connector-python is not installed; set DB_BACKEND='sqlite'")
+        raw = mysql.connector.connect(**DB_CONFIG)
+        # A write waiting on a lock must still commit inside DELTA_OVERLAP
+        cur = raw.cursor()
+        cur.execute("SET SESSION innodb_lock_wait_timeout = %s", (DELTA_LOCK_WAIT,))
+        cur.close()
+        return raw
+    raise PoolError(f"Unknown DB_BACKEND: {DB_BACKEND!r}")
+
+
+_schema_checked = set()     # backends whose schema version has been checked
+
+
+def check_schema(raw):
+    """
+    Raise PoolError unless the database behind `raw` has every migration
+    applied. SQLite databases migrate themselves on connect; a MySQL one
+    is migrated with `python schema.py migrate`, and every product read
+    needs the tables added since, so it is checked once per process.
+    """
+    if DB_BACKEND != 'mysql' or DB_BACKEND in _schema_checked:
+        return
+    cur = raw.cursor()
+    try:
+        cur.execute("SELECT MAX(version) FROM schema_migrations")
+        version = cur.fetchone()[0] or 0
+    except Error:
+        version = 0         # no schema_migrations table yet
+    finally:
+        cur.close()
+        raw.rollback()
+    if version < schema.latest_version():
+        raise PoolError(
+            f"Database schema is at version {version}, this Zodiac needs {schema.latest_version()}: "
+            f"run `python schema.py migrate`"
+        )
+    _schema_checked.add(DB_BACKEND)
+
+
+def _open_pooled_connection():
+    raw = _open_raw_connection()
+    try:
+        check_schema(raw)
+    except Exception:
+        raw.close()
+        raise
+    return raw
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(_open_pooled_connection, **POOL_CONFIG)
+        return _pool
+
+
+def close_pool():
+    """Shut down the pool (a fresh one is created on the next borrow)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+def get_pool_stats():
+    """Return pool metrics: waits, borrow latency, connections created, etc."""
+    return get_pool().stats()
+
+
+def configure_backend(backend: str, **options):
+    """
+    Switch the active backend at runtime, e.g.
+
+        configure_backend('sqlite', path='bench.db')
+
+    Options update DB_CONFIG (mysql) or SQLITE_CONFIG (sqlite). The current
+    pool is closed so that subsequent borrows use the new settings.
+    """
+    global DB_BACKEND
+    if backend not in ('mysql', 'sqlite'):
+        raise ValueError(f"Unknown backend: {backend!r}")
+    DB_BACKEND = backend
+    (SQLITE_CONFIG if backend == 'sqlite' else DB_CONFIG).update(options)
+    close_pool()
+    if _catalog is not None:
+        _catalog.clear()
+
+
+def dialect() -> str:
+    """Name of the active SQL dialect ('mysql' or 'sqlite')."""
+    return DB_BACKEND
+
+
 # -----------------------
 # Connection Helper
 # -----------------------
 def get_connection():
-    """Establish a MySQL connection using global config."""
+    """Borrow a pooled connection; close() returns it to the pool."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
+        return get_pool().acquire()
     except Error as e:
         print(f"[DB] Connection error: {e}")
         return None
 
 
+def pooled_connection():
+    """
+    Context manager over a pooled connection:
+
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            ...
+
+    Unlike get_connection(), errors are raised rather than printed.
+    """
+    return get_pool().connection()
+
+
 # -----------------------
 # Hash Utility (SHA256)
 # -----------------------
@@ -44,6 +476,7 @@ def hash_password(password: str) -> str:
 # -----------------------
 # AUTHENTICATION METHODS
 # -----------------------
+@instrumentation.instrumented("db.validate_admin")
 def validate_admin(admin_id: str, password: str) -> bool:
     """Validate admin credentials."""
     conn = get_connection()
@@ -65,6 +498,7 @@ def validate_admin(admin_id: str, password: str) -> bool:
         conn.close()
 
 
+@instrumentation.instrumented("db.register_user")
 def register_user(username: str, email: str, password: str) -> bool:
     """Register a new customer."""
     conn = get_connection()
@@ -88,6 +522,7 @@ def register_user(username: str, email: str, password: str) -> bool:
         conn.close()
 
 
+@instrumentation.instrumented("db.validate_user")
 def validate_user(email: str, password: str):
     """Check user login; returns user_id if valid else None."""
     conn = get_connection()
@@ -108,6 +543,7 @@ def validate_user(email: str, password: str):
         conn.close()
 
 
+@instrumentation.instrumented("db.get_suppliers")
 def get_suppliers():
     """Fetch list of all suppliers."""
     conn = get_connection()
@@ -126,6 +562,7 @@ def get_suppliers():
         conn.close()
 
 
+@instrumentation.instrumented("db.get_supplier_by_name")
 def get_supplier_by_name(name: str):
     """Fetch supplier by name."""
     conn = get_connection()
@@ -144,33 +581,583 @@ def get_supplier_by_name(name: str):
         conn.close()
 
 
+# -----------------------
+# STREAMING READS
+# -----------------------
+STREAM_BATCH_SIZE = 1000
+ROW_MODES = ('dict', 'tuple', 'namedtuple')
+
+
+def _row_maker(cursor, row_mode):
+    """Build a converter from raw cursor tuples to the requested row shape."""
+    if row_mode == 'tuple':
+        return tuple
+    columns = [d[0] for d in cursor.description]
+    if row_mode == 'namedtuple':
+        return namedtuple('Row', columns, rename=True)._make
+    if row_mode == 'dict':
+        return lambda row: dict(zip(columns, row))
+    raise ValueError(f"row_mode must be one of {ROW_MODES}, not {row_mode!r}")
+
+
+def stream_query(sql: str, params=(), batch_size: int = STREAM_BATCH_SIZE, row_mode: str = 'dict',
+                 raise_errors: bool = False):
+    """
+    Run a SELECT on an unbuffered (server-side) cursor and yield rows in
+    lists of at most `batch_size`, so memory stays bounded however large
+    the result. row_mode is 'dict', 'tuple' or 'namedtuple'.
+
+    Database errors end the stream quietly (they are logged), or are
+    re-raised with `raise_errors` when a truncated result is not acceptable.
+
+    The pooled connection is held until the generator is exhausted or
+    closed; a connection abandoned mid-result is discarded, not reused.
+    """
+    if row_mode not in ROW_MODES:
+        raise ValueError(f"row_mode must be one of {ROW_MODES}, not {row_mode!r}")
+    conn = get_connection()
+    if not conn:
+        return
+    cur = None
+    finished = False
+    try:
+        cur = conn.cursor(buffered=False)
+        cur.execute(sql, params)
+        make_row = _row_maker(cur, row_mode)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [make_row(r) for r in rows]
+        finished = True
+    except Error as e:
+        print(f"[DB] stream_query error: {e}")
+        if raise_errors:
+            raise
+    finally:
+        if not finished and dialect() == 'mysql':
+            # Unread rows are still on the wire; the socket cannot be reused
+            conn.invalidate()
+        try:
+            if cur is not None:
+                cur.close()
+        except Error:
+            pass
+        conn.close()
+
+
+def _flatten(batches):
+    for batch in batches:
+        yield from batch
+
+
+# Streamed statements are attributed to the code reading the stream
+instrumentation.PASSTHROUGH_SITES.update({"db.stream_query", "db._flatten"})
+
+
 # -----------------------
 # PRODUCTS & ORDERS
 # -----------------------
+# monthly_sales is this month's units from the sales rollup (see SALES ROLLUPS);
+# the join takes the first day of the current month as its parameter
+MONTHLY_SALES_JOIN = """
+    LEFT JOIN product_sales_monthly ms ON ms.product_id = p.id AND ms.month = %s
+"""
+
+
+def current_month():
+    """First day of the current month: the MONTHLY_SALES_JOIN parameter."""
+    return date.today().replace(day=1)
+
+
+ALL_PRODUCTS_SQL = f"""
+    SELECT p.id, p.name, s.name AS supplier, p.price_per_unit, p.stock_count,
+           p.min_stock, p.last_updated, COALESCE(ms.units, 0) AS monthly_sales
+    FROM products p
+    LEFT JOIN suppliers s ON p.supplier_id = s.id
+    {MONTHLY_SALES_JOIN}
+    ORDER BY p.name
+"""
+
+ORDERS_BY_TYPE_SQL = """
+    SELECT o.*, p.name AS product_name, s.name AS supplier_name, u.username AS customer_name
+    FROM orders o
+    LEFT JOIN products p ON o.product_id = p.id
+    LEFT JOIN suppliers s ON o.supplier_id = s.id
+    LEFT JOIN users u ON o.customer_id = u.id
+    WHERE o.type=%s
+    ORDER BY o.created_at DESC
+"""
+
+
+# -----------------------
+# Product Catalog Cache
+# -----------------------
+CATALOG_CONFIG = {
+    'ttl': 60.0,                # Seconds before the whole catalog is re-read (0 disables caching)
+}
+
+CATALOG_SQL = f"""
+    SELECT p.id, p.name, p.supplier_id, s.name AS supplier, p.price_per_unit,
+           p.stock_count, p.min_stock, p.last_updated, COALESCE(ms.units, 0) AS monthly_sales
+    FROM products p
+    LEFT JOIN suppliers s ON p.supplier_id = s.id
+    {MONTHLY_SALES_JOIN}
+"""
+
+# Ids per `WHERE id IN (...)` when re-reading invalidated products
+CATALOG_RELOAD_CHUNK = 500
+
+
+class ProductCatalog:
+    """
+    Thread-safe in-memory cache of the products table.
+
+    Products are indexed by id, with secondary indexes by name and by
+    supplier_id. The whole table is read on first use and again once `ttl`
+    seconds have passed. invalidate(ids) marks individual products stale so
+    only those rows are re-read on the next lookup; invalidate() with no ids
+    drops everything. Lookups return copies, so callers may modify them.
+    """
+
+    def __init__(self, loader, ttl=60.0):
+        self._loader = loader           # loader(ids=None) -> list of product dicts
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+        self._by_id = {}
+        self._by_name = {}
+        self._by_supplier = {}
+        self._sorted = None             # all rows in (name, id) order, built lazily
+        self._loaded_at = None
+        self._epoch = 0                 # bumped by full invalidation
+        self._stale = set()
+
+        self._stats = {'hits': 0, 'misses': 0, 'full_loads': 0, 'partial_loads': 0,
+                       'rows_loaded': 0, 'invalidations': 0}
+
+    # ----------------------------------------------------
+    # Lookups
+    # ----------------------------------------------------
+    def get(self, product_id):
+        """Product dict for `product_id`, or None."""
+        with self._fresh():
+            row = self._by_id.get(product_id)
+            return dict(row) if row else None
+
+    def by_name(self, name):
+        """Products called `name` (ascending id)."""
+        with self._fresh():
+            return [dict(self._by_id[i]) for i in self._by_name.get(name, ())]
+
+    def by_supplier(self, supplier_id):
+        """Products supplied by `supplier_id`, in (name, id) order."""
+        with self._fresh():
+            rows = [self._by_id[i] for i in self._by_supplier.get(supplier_id, ())]
+        rows.sort(key=_catalog_order)
+        return [dict(r) for r in rows]
+
+    def all(self):
+        """Every product, in (name, id) order."""
+        with self._fresh():
+            if self._sorted is None:
+                self._sorted = sorted(self._by_id.values(), key=_catalog_order)
+            rows = self._sorted
+        return [dict(r) for r in rows]
+
+    # ----------------------------------------------------
+    # Invalidation
+    # ----------------------------------------------------
+    def invalidate(self, product_ids=None):
+        """Mark the given products (or, with None, the whole catalog) stale."""
+        with self._lock:
+            self._stats['invalidations'] += 1
+            if product_ids is None:
+                self._loaded_at = None
+                self._epoch += 1
+                self._stale.clear()
+            else:
+                self._stale.update(product_ids)
+
+    def clear(self):
+        """Drop every cached row (e.g. after switching databases)."""
+        with self._lock:
+            self._replace_locked([])
+            self._loaded_at = None
+            self._epoch += 1
+            self._stale.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+            stats['size'] = len(self._by_id)
+            stats['stale'] = len(self._stale)
+            stats['age'] = time.monotonic() - self._loaded_at if self._loaded_at is not None else None
+            stats['ttl'] = self.ttl
+            return stats
+
+    # ----------------------------------------------------
+    # Loading
+    # ----------------------------------------------------
+    def _expired_locked(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    @contextmanager
+    def _fresh(self):
+        """Hold the lock over up-to-date indexes, reloading first if needed."""
+        self._lock.acquire()
+        if self._expired_locked() or self._stale:
+            self._lock.release()
+            self._refresh()
+            self._lock.acquire()
+        else:
+            self._stats['hits'] += 1
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    def _refresh(self):
+        # One loader at a time; threads that queued behind it reuse its result
+        with self._load_lock:
+            with self._lock:
+                full = self._expired_locked()
+                if not full and not self._stale:
+                    self._stats['hits'] += 1
+                    return
+                self._stats['misses'] += 1
+                epoch = self._epoch
+                stale, self._stale = self._stale, set()
+
+            try:
+                rows = self._loader(None if full else sorted(stale))
+            except BaseException:
+                with self._lock:
+                    self._stale |= stale
+                raise
+
+            with self._lock:
+                self._stats['rows_loaded'] += len(rows)
+                if full:
+                    self._stats['full_loads'] += 1
+                    self._replace_locked(rows)
+                    # Products invalidated mid-load stay in _stale; a full
+                    # invalidation during the load leaves the catalog expired
+                    self._loaded_at = time.monotonic() if self._epoch == epoch else None
+                else:
+                    self._stats['partial_loads'] += 1
+                    found = {r['id']: r for r in rows}
+                    for product_id in stale:
+                        self._drop_locked(product_id)
+                        if product_id in found:
+                            self._add_locked(found[product_id])
+                    self._sorted = None
+
+    def _replace_locked(self, rows):
+        self._by_id, self._by_name, self._by_supplier = {}, {}, {}
+        for row in rows:
+            self._add_locked(row)
+        self._sorted = None
+
+    def _add_locked(self, row):
+        self._by_id[row['id']] = row
+        self._by_name.setdefault(row['name'], []).append(row['id'])
+        self._by_name[row['name']].sort()
+        self._by_supplier.setdefault(row['supplier_id'], []).append(row['id'])
+
+    def _drop_locked(self, product_id):
+        row = self._by_id.pop(product_id, None)
+        if row is None:
+            return
+        for index, key in ((self._by_name, row['name']), (self._by_supplier, row['supplier_id'])):
+            ids = index.get(key)
+            if ids:
+                ids.remove(product_id)
+                if not ids:
+                    del index[key]
+
+
+def _catalog_order(row):
+    return (row['name'], row['id'])
+
+
+@instrumentation.instrumented("db._load_catalog_rows")
+def _load_catalog_rows(ids=None):
+    """Catalog loader: every product, or just `ids`."""
+    with pooled_connection() as conn:
+        cur = conn.cursor(dictionary=True)
+        month = current_month()
+        if ids is None:
+            cur.execute(CATALOG_SQL, (month,))
+            return cur.fetchall()
+        rows = []
+        for start in range(0, len(ids), CATALOG_RELOAD_CHUNK):
+            chunk = ids[start:start + CATALOG_RELOAD_CHUNK]
+            cur.execute(f"{CATALOG_SQL} WHERE p.id IN ({', '.join(['%s'] * len(chunk))})", (month, *chunk))
+            rows.extend(cur.fetchall())
+        return rows
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Return the process-wide product catalog cache."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ProductCatalog(_load_catalog_rows, **CATALOG_CONFIG)
+        return _catalog
+
+
+def invalidate_catalog(product_ids=None):
+    """Mark products (or, with None, the whole catalog) as changed in the database."""
+    if _catalog is not None:
+        _catalog.invalidate(product_ids)
+
+
+def get_catalog_stats():
+    """Return catalog cache metrics: hits, misses, loads, size, age, etc."""
+    return get_catalog().stats()
+
+
+def dump_metrics(path):
+    """Write the instrumentation metrics plus pool and catalog stats to `path` as JSON."""
+    return instrumentation.dump(path)
+
+
+# Included in every dump, ZODIAC_METRICS_DUMP on exit too
+instrumentation.DUMP_SECTIONS.update({
+    'backend': lambda: DB_BACKEND,
+    'pool': get_pool_stats,
+    'catalog': get_catalog_stats,
+})
+
+
+@instrumentation.instrumented("db.get_all_products")
 def get_all_products():
-    """Return all product details joined with supplier name."""
+    """Return all product details joined with supplier name (served from the catalog cache)."""
+    try:
+        return get_catalog().all()
+    except Error as e:
+        print(f"[DB] get_all_products error: {e}")
+        return []
+
+
+# Columns shown by the admin inventory grid; (name, id) is the keyset order
+PRODUCT_PAGE_COLUMNS = """
+    p.id, p.name, p.supplier_id, p.price_per_unit, p.stock_count, p.min_stock, p.last_updated,
+    COALESCE(ms.units, 0) AS monthly_sales
+"""
+
+# Page / delta queries read FROM this; it takes current_month() as its first parameter
+PRODUCT_PAGE_SOURCE = f"products p {MONTHLY_SALES_JOIN}"
+
+
+@instrumentation.instrumented("db.count_products")
+def count_products() -> int:
+    """Return the number of products in the catalog."""
+    conn = get_connection()
+    if not conn:
+        return 0
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) FROM products")
+        return cur.fetchone()[0]
+    except Error as e:
+        print(f"[DB] count_products error: {e}")
+        return 0
+    finally:
+        cur.close()
+        conn.close()
+
+
+@instrumentation.instrumented("db.get_products_page")
+def get_products_page(after=None, before=None, limit: int = 50):
+    """
+    Keyset-paginated slice of products ordered by (name, id).
+
+    after  -> (name, id) key; return the `limit` rows that follow it
+    before -> (name, id) key; return the `limit` rows that precede it
+    With neither, the first page is returned. Rows are always ascending.
+    """
     conn = get_connection()
     if not conn:
         return []
     try:
         cur = conn.cursor(dictionary=True)
+        month = current_month()
+        if before is not None:
+            name, pid = before
+            cur.execute(f"""
+                SELECT {PRODUCT_PAGE_COLUMNS} FROM {PRODUCT_PAGE_SOURCE}
+                WHERE p.name <= %s AND (p.name < %s OR p.id < %s)
+                ORDER BY p.name DESC, p.id DESC
+                LIMIT %s
+            """, (month, name, name, pid, limit))
+            return cur.fetchall()[::-1]
+        if after is not None:
+            name, pid = after
+            cur.execute(f"""
+                SELECT {PRODUCT_PAGE_COLUMNS} FROM {PRODUCT_PAGE_SOURCE}
+                WHERE p.name >= %s AND (p.name > %s OR p.id > %s)
+                ORDER BY p.name, p.id
+                LIMIT %s
+            """, (month, name, name, pid, limit))
+        else:
+            cur.execute(f"""
+                SELECT {PRODUCT_PAGE_COLUMNS} FROM {PRODUCT_PAGE_SOURCE}
+                ORDER BY p.name, p.id
+                LIMIT %s
+            """, (month, limit))
+        return cur.fetchall()
+    except Error as e:
+        print(f"[DB] get_products_page error: {e}")
+        return []
+    finally:
+        cur.close()
+        conn.close()
+
+
+@instrumentation.instrumented("db.get_product_key_at")
+def get_product_key_at(offset: int):
+    """Return the (name, id) key at a row offset in (name, id) order, or None."""
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor()
         cur.execute("""
-            SELECT p.id, p.name, s.name AS supplier, p.price_per_unit, p.stock_count,
-                   p.min_stock, p.last_updated, p.monthly_sales
-            FROM products p
-            LEFT JOIN suppliers s ON p.supplier_id = s.id
-            ORDER BY p.name
-        """)
-        products = cur.fetchall()
-        return products
+            SELECT name, id FROM products ORDER BY name, id LIMIT 1 OFFSET %s
+        """, (offset,))
+        row = cur.fetchone()
+        return tuple(row) if row else None
     except Error as e:
-        print(f"[DB] get_all_products error: {e}")
+        print(f"[DB] get_product_key_at error: {e}")
+        return None
+    finally:
+        cur.close()
+        conn.close()
+
+
+# Every key in (name, id) order, straight off the name index
+PRODUCT_KEYS_SQL = """
+    SELECT name, id FROM products ORDER BY name, id
+"""
+
+
+@instrumentation.instrumented("db.get_product_anchor_keys")
+def get_product_anchor_keys(every: int = 500):
+    """
+    (name, id) keys of the rows at offsets every - 1, 2 * every - 1, ... in
+    (name, id) order. One pass over the keys; afterwards the page at any
+    offset is get_products_page(after=anchor) skipping fewer than `every`
+    rows, instead of an OFFSET scan per jump.
+    """
+    conn = get_connection()
+    if not conn:
+        return []
+    try:
+        cur = conn.cursor()
+        cur.execute(PRODUCT_KEYS_SQL)
+        anchors = []
+        seen = 0
+        while True:
+            batch = cur.fetchmany(max(every, 1000))
+            if not batch:
+                return anchors
+            first = (every - 1 - seen) % every
+            anchors.extend(tuple(row) for row in batch[first::every])
+            seen += len(batch)
+    except Error as e:
+        print(f"[DB] get_product_anchor_keys error: {e}")
         return []
     finally:
         cur.close()
         conn.close()
 
 
+# -----------------------
+# DELTA SYNC
+# -----------------------
+# Views poll for products whose last_updated is at or after a watermark
+# (served by the index on products.last_updated) instead of reloading the
+# table. Writes stamp last_updated with the database clock (NOW()), one
+# second resolution, when the statement runs, which can be well before the
+# transaction commits. The watermark therefore trails the newest row seen
+# by DELTA_OVERLAP; rows inside that window are returned again and callers
+# must apply them idempotently (see delta_sync.DeltaFeed).
+#
+# A write that commits more than DELTA_OVERLAP after its stamp is missed by
+# open views until they reload. Stamping transactions are kept short: one
+# statement plus its commit, or one bulk.py chunk, and on MySQL lock waits
+# give up after DELTA_LOCK_WAIT seconds.
+DELTA_OVERLAP = timedelta(seconds=60)
+DELTA_LOCK_WAIT = 30
+
+PRODUCT_DELTA_SQL = f"""
+    SELECT {PRODUCT_PAGE_COLUMNS} FROM {PRODUCT_PAGE_SOURCE}
+    WHERE p.last_updated >= %s
+    ORDER BY p.last_updated, p.id
+"""
+
+# The first poll without a watermark: every stamped product
+PRODUCT_STAMPED_SQL = f"""
+    SELECT {PRODUCT_PAGE_COLUMNS} FROM {PRODUCT_PAGE_SOURCE}
+    WHERE p.last_updated IS NOT NULL
+    ORDER BY p.last_updated, p.id
+"""
+
+
+@instrumentation.instrumented("db.get_product_watermark")
+def get_product_watermark():
+    """Starting watermark for get_products_changed_since(), or None if the table is empty."""
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor()
+        # ORDER BY ... LIMIT 1 rather than MAX() so the column keeps its type on SQLite
+        cur.execute("""
+            SELECT last_updated FROM products
+            WHERE last_updated IS NOT NULL
+            ORDER BY last_updated DESC LIMIT 1
+        """)
+        row = cur.fetchone()
+        return row[0] - DELTA_OVERLAP if row else None
+    except Error as e:
+        print(f"[DB] get_product_watermark error: {e}")
+        return None
+    finally:
+        cur.close()
+        conn.close()
+
+
+@instrumentation.instrumented("db.get_products_changed_since")
+def get_products_changed_since(watermark):
+    """
+    Products updated at or after `watermark` (oldest first) and the
+    advanced watermark: (rows, new_watermark). With watermark=None every
+    product with a last_updated stamp is returned.
+    """
+    with pooled_connection() as conn:
+        cur = conn.cursor(dictionary=True)
+        if watermark is None:
+            cur.execute(PRODUCT_STAMPED_SQL, (current_month(),))
+        else:
+            cur.execute(PRODUCT_DELTA_SQL, (current_month(), watermark))
+        rows = cur.fetchall()
+    if not rows:
+        return rows, watermark
+    newest = rows[-1]['last_updated'] - DELTA_OVERLAP
+    return rows, max(watermark, newest) if watermark else newest
+
+
+@instrumentation.instrumented("db.update_stock")
 def update_stock(product_id: int, new_stock: int):
     """Update stock count for a product."""
     conn = get_connection()
@@ -179,9 +1166,10 @@ def update_stock(product_id: int, new_stock: int):
     try:
         cur = conn.cursor()
         cur.execute("""
-            UPDATE products SET stock_count=%s, last_updated=%s WHERE id=%s
-        """, (new_stock, datetime.now(), product_id))
+            UPDATE products SET stock_count=%s, last_updated=NOW() WHERE id=%s
+        """, (new_stock, product_id))
         conn.commit()
+        invalidate_catalog([product_id])
         return True
     except Error as e:
         print(f"[DB] update_stock error: {e}")
@@ -192,6 +1180,87 @@ def update_stock(product_id: int, new_stock: int):
         conn.close()
 
 
+# -----------------------
+# SALES ROLLUPS
+# -----------------------
+# product_sales_daily / product_sales_monthly hold units and order counts
+# of customer orders per product and day / month. Every path that writes
+# customer orders adds to them in the same transaction, so dashboards read
+# pre-aggregated figures instead of scanning orders; rollups.py rebuilds
+# them from scratch. Orders are stamped with the same client-side time
+# that buckets them.
+_SALES_CONFLICT = {
+    'sqlite': """
+        ON CONFLICT (product_id, {bucket}) DO UPDATE
+        SET units = units + excluded.units, order_count = order_count + excluded.order_count
+    """,
+    'mysql': """
+        ON DUPLICATE KEY UPDATE units = units + VALUES(units), order_count = order_count + VALUES(order_count)
+    """,
+}
+
+SALES_ROLLUPS = (('product_sales_daily', 'day'), ('product_sales_monthly', 'month'))
+
+
+def sales_conflict_clause(bucket: str, dialect_name: str = None) -> str:
+    """Clause turning an INSERT into a rollup into "add to the existing row"."""
+    return _SALES_CONFLICT[dialect_name or dialect()].format(bucket=bucket)
+
+
+def sales_upsert_sql(table: str, bucket: str, dialect_name: str = None) -> str:
+    """Statement adding (product_id, bucket, units, order_count) rows to a rollup."""
+    return f"""
+        INSERT INTO {table} (product_id, {bucket}, units, order_count) VALUES (%s, %s, %s, %s)
+        {sales_conflict_clause(bucket, dialect_name)}
+    """
+
+
+def add_to_sales_rollups(cur, daily, dialect_name: str = None):
+    """
+    Add {(product_id, day): (units, order_count)} to both rollups on `cur`,
+    inside the caller's transaction.
+    """
+    monthly = {}
+    for (product_id, day), (units, count) in daily.items():
+        key = (product_id, day.replace(day=1))
+        total = monthly.get(key, (0, 0))
+        monthly[key] = (total[0] + units, total[1] + count)
+    for (table, bucket), rows in zip(SALES_ROLLUPS, (daily, monthly)):
+        if rows:
+            cur.executemany(sales_upsert_sql(table, bucket, dialect_name),
+                            [(pid, when, units, count) for (pid, when), (units, count) in rows.items()])
+
+
+def _record_sales(cur, lines, when: datetime):
+    """Roll up customer-order (product_id, units) lines created at `when`."""
+    daily = {}
+    for product_id, units in lines:
+        key = (product_id, when.date())
+        total = daily.get(key, (0, 0))
+        daily[key] = (total[0] + units, total[1] + 1)
+    add_to_sales_rollups(cur, daily)
+
+
+ORDER_INSERT_SQL = """
+    INSERT INTO orders (type, product_id, supplier_id, customer_id,
+                        units, delivery_date, note, status, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _order_params(order: dict, created_at: datetime) -> tuple:
+    """Map an insert_order()-style dict to ORDER_INSERT_SQL parameters."""
+    return (order['order_type'], order['product_id'], order.get('supplier_id'),
+            order.get('customer_id'), order.get('units', 0), order.get('delivery_date'),
+            order.get('note'), order.get('status', 'Pending'), created_at)
+
+
+def _customer_lines(params):
+    """(product_id, units) of the customer orders among ORDER_INSERT_SQL parameters."""
+    return [(p[1], p[4]) for p in params if p[0] == 'customer_request' and p[1] is not None]
+
+
+@instrumentation.instrumented("db.insert_order")
 def insert_order(order_type: str, product_id: int, supplier_id: int,
                  customer_id=None, units=0, delivery_date=None, note=None, status='Pending'):
     """Insert a new order record."""
@@ -200,12 +1269,13 @@ def insert_order(order_type: str, product_id: int, supplier_id: int,
         return False
     try:
         cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO orders (type, product_id, supplier_id, customer_id,
-                                units, delivery_date, note, status)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (order_type, product_id, supplier_id, customer_id, units, delivery_date, note, status))
+        now = datetime.now()
+        params = (order_type, product_id, supplier_id, customer_id,
+                  units, delivery_date, note, status, now)
+        cur.execute(ORDER_INSERT_SQL, params)
+        _record_sales(cur, _customer_lines([params]), now)
         conn.commit()
+        invalidate_catalog([product_id])
         return True
     except Error as e:
         print(f"[DB] insert_order error: {e}")
@@ -216,6 +1286,117 @@ def insert_order(order_type: str, product_id: int, supplier_id: int,
         conn.close()
 
 
+@instrumentation.instrumented("db.insert_orders")
+def insert_orders(orders) -> bool:
+    """
+    Insert many orders in one transaction with a single executemany.
+
+    Each order is a dict using insert_order()'s argument names
+    (order_type, product_id, supplier_id, customer_id, units, ...).
+    Either every row is written or none is.
+    """
+    now = datetime.now()
+    params = [_order_params(o, now) for o in orders]
+    if not params:
+        return True
+    conn = get_connection()
+    if not conn:
+        return False
+    try:
+        cur = conn.cursor()
+        cur.executemany(ORDER_INSERT_SQL, params)
+        _record_sales(cur, _customer_lines(params), now)
+        conn.commit()
+        invalidate_catalog({p[1] for p in params})
+        return True
+    except Error as e:
+        print(f"[DB] insert_orders error: {e}")
+        conn.rollback()
+        return False
+    finally:
+        cur.close()
+        conn.close()
+
+
+# -----------------------
+# ORDER PLACEMENT
+# -----------------------
+ORDER_PLACED = 'placed'
+ORDER_INSUFFICIENT_STOCK = 'insufficient_stock'
+ORDER_FAILED = 'failed'
+
+
+def place_customer_order(customer_id: int, product_id: int, units: int) -> str:
+    """Place a single-line customer order; see place_customer_orders()."""
+    return place_customer_orders(customer_id, [(product_id, units)])
+
+
+@instrumentation.instrumented("db.place_customer_orders")
+def place_customer_orders(customer_id: int, lines) -> str:
+    """
+    Reserve stock and record customer_request orders for a whole cart in one
+    short transaction.
+
+    `lines` is an iterable of (product_id, units). Stock for every product
+    is checked and decremented by a single conditional, set-based UPDATE
+    (... WHERE stock_count >= units), so concurrent customers can never
+    oversell. If any product lacks stock (or does not exist) the update
+    touches fewer rows than there are products, the transaction is rolled
+    back and nothing is written. Order rows go in with one executemany and
+    the sales rollups with one more per rollup table, so a cart costs a
+    constant number of round trips whatever its size.
+
+    Returns ORDER_PLACED, ORDER_INSUFFICIENT_STOCK or ORDER_FAILED.
+    """
+    lines = [(int(pid), int(units)) for pid, units in lines]
+    if not lines:
+        raise ValueError("an order needs at least one line")
+    if any(units <= 0 for _, units in lines):
+        raise ValueError("units must be positive")
+
+    # Lines for the same product reserve their combined units
+    totals = {}
+    for product_id, units in lines:
+        totals[product_id] = totals.get(product_id, 0) + units
+
+    case_sql = "CASE id " + " ".join(["WHEN %s THEN %s"] * len(totals)) + " END"
+    case_params = [v for item in totals.items() for v in item]
+    id_marks = ", ".join(["%s"] * len(totals))
+
+    conn = get_connection()
+    if not conn:
+        return ORDER_FAILED
+    try:
+        cur = conn.cursor()
+        now = datetime.now()
+        cur.execute(f"""
+            UPDATE products
+            SET stock_count = stock_count - {case_sql}, last_updated = NOW()
+            WHERE id IN ({id_marks}) AND stock_count >= {case_sql}
+        """, (*case_params, *totals, *case_params))
+        if cur.rowcount != len(totals):
+            conn.rollback()
+            return ORDER_INSUFFICIENT_STOCK
+
+        cur.executemany(ORDER_INSERT_SQL, [
+            _order_params({'order_type': 'customer_request', 'product_id': product_id,
+                           'customer_id': customer_id, 'units': units}, now)
+            for product_id, units in lines
+        ])
+        _record_sales(cur, lines, now)
+        conn.commit()
+        invalidate_catalog(totals)
+        return ORDER_PLACED
+    except Error as e:
+        print(f"[DB] place_customer_orders error: {e}")
+        conn.rollback()
+        return ORDER_FAILED
+    finally:
+        cur.close()
+        conn.close()
+
+
+@instrumentation.instrumented("db.get_orders_by_type")
 def get_orders_by_type(order_type: str):
     """Fetch all orders filtered by type."""
     conn = get_connection()
@@ -223,15 +1404,7 @@ def get_orders_by_type(order_type: str):
         return []
     try:
         cur = conn.cursor(dictionary=True)
-        cur.execute("""
-            SELECT o.*, p.name AS product_name, s.name AS supplier_name, u.username AS customer_name
-            FROM orders o
-            LEFT JOIN products p ON o.product_id = p.id
-            LEFT JOIN suppliers s ON o.supplier_id = s.id
-            LEFT JOIN users u ON o.customer_id = u.id
-            WHERE o.type=%s
-            ORDER BY o.created_at DESC
-        """, (order_type,))
+        cur.execute(ORDERS_BY_TYPE_SQL, (order_type,))
         return cur.fetchall()
     except Error as e:
         print(f"[DB] get_orders_by_type error: {e}")
@@ -241,17 +1414,137 @@ def get_orders_by_type(order_type: str):
         conn.close()
 
 
-def mark_order_delivered(order_id: int):
-    """Mark order as delivered."""
+def iter_all_products(batch_size: int = STREAM_BATCH_SIZE, row_mode: str = 'dict'):
+    """Streaming get_all_products(): yield products one at a time."""
+    return _flatten(stream_query(ALL_PRODUCTS_SQL, (current_month(),), batch_size, row_mode))
+
+
+def iter_all_products_batches(batch_size: int = STREAM_BATCH_SIZE, row_mode: str = 'dict'):
+    """Streaming get_all_products(): yield lists of up to batch_size products."""
+    return stream_query(ALL_PRODUCTS_SQL, (current_month(),), batch_size, row_mode)
+
+
+def iter_orders_by_type(order_type: str, batch_size: int = STREAM_BATCH_SIZE, row_mode: str = 'dict'):
+    """Streaming get_orders_by_type(): yield orders one at a time."""
+    return _flatten(stream_query(ORDERS_BY_TYPE_SQL, (order_type,), batch_size, row_mode))
+
+
+def iter_orders_by_type_batches(order_type: str, batch_size: int = STREAM_BATCH_SIZE,
+                                row_mode: str = 'dict'):
+    """Streaming get_orders_by_type(): yield lists of up to batch_size orders."""
+    return stream_query(ORDERS_BY_TYPE_SQL, (order_type,), batch_size, row_mode)
+
+
+# -----------------------
+# SUPPLIER QUEUE
+# -----------------------
+# Suppliers log in with their supplier_credentials id; their restock queue
+# is the pending restock_request orders carrying their suppliers.id, read
+# through idx_orders_supplier_status.
+SUPPLIER_FOR_LOGIN_SQL = """
+    SELECT s.id FROM supplier_credentials c
+    JOIN suppliers s ON s.name = c.name
+    WHERE c.supplier_id = %s
+    ORDER BY s.id
+    LIMIT 1
+"""
+
+SUPPLIER_QUEUE_SQL = """
+    SELECT o.id, p.name, o.units, o.delivery_date, o.note, o.status
+    FROM orders o
+    LEFT JOIN products p ON o.product_id = p.id
+    WHERE o.supplier_id = %s AND o.status = 'Pending' AND o.type = 'restock_request'
+    ORDER BY o.id
+"""
+
+# Order ids per `WHERE id IN (...)` when delivering
+DELIVERY_CHUNK = 500
+
+
+@instrumentation.instrumented("db.get_supplier_id_for_login")
+def get_supplier_id_for_login(login_id: str):
+    """suppliers.id of the supplier signing in as `login_id`, or None."""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(SUPPLIER_FOR_LOGIN_SQL, (login_id,))
+            row = cur.fetchone()
+            return row[0] if row else None
+        finally:
+            cur.close()
+
+
+@instrumentation.instrumented("db.get_supplier_queue")
+def get_supplier_queue(supplier_id: int):
+    """Pending restock orders of a supplier, as (id, product, units, delivery_date, note, status)."""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(SUPPLIER_QUEUE_SQL, (supplier_id,))
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+
+@instrumentation.instrumented("db.mark_order_delivered")
+def mark_order_delivered(order_ids, supplier_id: int = None) -> bool:
+    """
+    Mark one order id, or an iterable of them, as delivered in one
+    transaction.
+
+    Statuses flip with one set-based UPDATE per DELIVERY_CHUNK ids, and
+    the units of the restock orders among them are added to stock by one
+    more, summed per product. With `supplier_id`, only that supplier's
+    orders qualify. Either every order was still pending and all of them
+    are delivered, or nothing changes and False is returned.
+    """
+    ids = sorted({int(order_ids)} if isinstance(order_ids, int) else {int(i) for i in order_ids})
+    if not ids:
+        return True
+    supplier_sql = "" if supplier_id is None else " AND supplier_id = %s"
+    supplier_params = () if supplier_id is None else (supplier_id,)
+
     conn = get_connection()
     if not conn:
         return False
     try:
         cur = conn.cursor()
-        cur.execute("""
-            UPDATE orders SET status='Delivered', fulfilled_at=%s WHERE id=%s
-        """, (datetime.now(), order_id))
+        now = datetime.now()
+        restocked = set()
+        for start in range(0, len(ids), DELIVERY_CHUNK):
+            chunk = ids[start:start + DELIVERY_CHUNK]
+            marks = ", ".join(["%s"] * len(chunk))
+
+            # Claim the orders first: a concurrent confirmation of the same ids
+            # now finds them delivered and rolls back
+            cur.execute(f"""
+                UPDATE orders SET status = 'Delivered', fulfilled_at = %s
+                WHERE id IN ({marks}) AND status = 'Pending'{supplier_sql}
+            """, (now, *chunk, *supplier_params))
+            if cur.rowcount != len(chunk):
+                conn.rollback()
+                return False
+
+            cur.execute(f"""
+                SELECT DISTINCT product_id FROM orders
+                WHERE id IN ({marks}) AND type = 'restock_request' AND product_id IS NOT NULL
+            """, chunk)
+            products = [row[0] for row in cur.fetchall()]
+            if not products:
+                continue
+            cur.execute(f"""
+                UPDATE products
+                SET stock_count = stock_count + (
+                        SELECT SUM(o.units) FROM orders o
+                        WHERE o.product_id = products.id AND o.id IN ({marks})
+                          AND o.type = 'restock_request'
+                    ),
+                    last_updated = NOW()
+                WHERE id IN ({", ".join(["%s"] * len(products))})
+            """, (*chunk, *products))
+            restocked.update(products)
         conn.commit()
+        invalidate_catalog(restocked)
         return True
     except Error as e:
         print(f"[DB] mark_order_delivered error: {e}")
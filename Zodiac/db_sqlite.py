@@ -0,0 +1,189 @@
+# db_sqlite.py
+# ----------------------------------------------------
+# Embedded SQLite backend for Zodiac
+# ----------------------------------------------------
+# Provides a connection adapter that speaks the subset of the
+# mysql.connector API used throughout the app (%s placeholders,
+# cursor(dictionary=True), is_connected(), ...), so db.py and the
+# dashboards run unchanged on a local WAL-mode database file.
+
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+
+import schema
+
+
+# -----------------------
+# Type adapters
+# -----------------------
+def _parse_timestamp(value):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _parse_date(value):
+    text = value.decode()
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        # Free-text delivery dates are stored as typed; hand them back as-is
+        return text
+
+
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(" "))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+sqlite3.register_converter("TIMESTAMP", _parse_timestamp)
+sqlite3.register_converter("DATE", _parse_date)
+
+
+_PLACEHOLDER = re.compile(r"%s|%%")
+
+
+def _translate(sql):
+    """Rewrite DB-API 'format' placeholders (%s, %%) to SQLite's qmark style."""
+    return _PLACEHOLDER.sub(lambda m: "?" if m.group() == "%s" else "%", sql)
+
+
+# -----------------------
+# Cursor / Connection adapters
+# -----------------------
+class SQLiteCursor:
+    """Cursor with mysql.connector-style placeholders and dictionary rows."""
+
+    def __init__(self, raw, dictionary=False):
+        self._raw = raw
+        self._dictionary = dictionary
+
+    def execute(self, sql, params=()):
+        self._raw.execute(_translate(sql), tuple(params or ()))
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._raw.executemany(_translate(sql), (tuple(p) for p in seq_of_params))
+        return self
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def fetchone(self):
+        return self._row(self._raw.fetchone())
+
+    def fetchmany(self, size=None):
+        rows = self._raw.fetchmany(size) if size else self._raw.fetchmany()
+        return [self._row(r) for r in rows] if self._dictionary else rows
+
+    def fetchall(self):
+        rows = self._raw.fetchall()
+        return [self._row(r) for r in rows] if self._dictionary else rows
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self._raw.description or ())
+
+    @property
+    def description(self):
+        return self._raw.description
+
+    @property
+    def rowcount(self):
+        return self._raw.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._raw.lastrowid
+
+    def close(self):
+        self._raw.close()
+
+
+class SQLiteConnection:
+    """Connection adapter exposing the mysql.connector methods Zodiac relies on."""
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def cursor(self, dictionary=False, buffered=None, **kwargs):
+        return SQLiteCursor(self._raw.cursor(), dictionary=dictionary)
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    def is_connected(self):
+        try:
+            self._raw.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self._raw.close()
+
+
+# -----------------------
+# Connection factory
+# -----------------------
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def init_schema(raw):
+    """Create or upgrade the schema (see schema.MIGRATIONS)."""
+    schema.migrate(SQLiteConnection(raw), "sqlite")
+
+
+def connect(path="zodiac.db", timeout=30.0):
+    """
+    Open a WAL-mode SQLite connection wrapped in SQLiteConnection.
+
+    The schema is created / migrated on the first connection to each
+    database file.
+    Connections may be handed between threads (the pool guarantees that only
+    one thread uses a connection at a time).
+    """
+    raw = sqlite3.connect(
+        path, timeout=timeout, check_same_thread=False,
+        detect_types=sqlite3.PARSE_DECLTYPES
+    )
+    raw.execute("PRAGMA journal_mode=WAL")
+    raw.execute("PRAGMA synchronous=NORMAL")
+    raw.execute("PRAGMA foreign_keys=ON")
+    # MySQL's NOW(), local time to the second, for last_updated stamps
+    raw.create_function("NOW", 0, lambda: datetime.now().isoformat(" ", "seconds"))
+
+    with _init_lock:
+        if path not in _initialized:
+            init_schema(raw)
+            _initialized.add(path)
+
+    return SQLiteConnection(raw)
+
+
+# -----------------------
+# Standalone Run: create an empty database
+# -----------------------
+if __name__ == "__main__":
+    import sys
+
+    target = sys.argv[1] if len(sys.argv) > 1 else "zodiac.db"
+    connect(target).close()
+    print(f"SQLite database ready at {target}")
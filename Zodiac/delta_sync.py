@@ -0,0 +1,229 @@
+# delta_sync.py
+# ----------------------------------------------------
+# Incremental refresh of inventory views
+# ----------------------------------------------------
+# Instead of reloading whole tables and rebuilding Treeviews, views keep a
+# watermark, ask the database only for rows changed since then and patch
+# the affected items in place. AutoRefresh repeats that on a timer; when
+# nothing has changed a poll is one indexed range query and no redraw.
+#
+#     feed = DeltaFeed.products()
+#     feed.start()                    # before the initial full load
+#     ...
+#     for row in feed.poll():         # later, on a worker thread
+#         ...
+
+import threading
+
+import db
+
+
+REFRESH_INTERVAL_MS = 5000
+
+
+class DeltaFeed:
+    """
+    Watermark-driven change feed.
+
+    Args:
+        since: callable(watermark) -> (rows, new_watermark), e.g.
+            db.get_products_changed_since.
+        start: callable() -> initial watermark, e.g. db.get_product_watermark.
+        ident: callable(row) -> the row's id.
+        on_change: optional callable(rows) run (on the polling thread) with
+            every batch of genuinely changed rows.
+
+    The database side re-sends rows inside its overlap window, so the feed
+    remembers the last version of each recent row and only reports rows
+    whose contents actually differ.
+    """
+
+    def __init__(self, since, start, ident=lambda row: row["id"], on_change=None):
+        self._since = since
+        self._start = start
+        self._ident = ident
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._recent = {}
+        self._started = False
+        self.watermark = None
+
+    @classmethod
+    def products(cls):
+        """Feed over products.last_updated that also keeps the catalog cache current."""
+        return cls(
+            db.get_products_changed_since, db.get_product_watermark,
+            on_change=lambda rows: db.invalidate_catalog([row["id"] for row in rows])
+        )
+
+    def start(self):
+        """Take the starting watermark; call it before the view's full load."""
+        with self._lock:
+            self.watermark = self._start()
+            if self.watermark is not None:
+                rows, self.watermark = self._since(self.watermark)
+                self._remember(rows)
+            self._started = True
+
+    def poll(self):
+        """Rows changed since the previous poll, or None when nothing changed."""
+        with self._lock:
+            if not self._started:
+                return None
+            rows, watermark = self._since(self.watermark)
+            changed = [row for row in rows if self._recent.get(self._ident(row)) != row]
+            self.watermark = watermark
+            self._remember(rows)
+        if not changed:
+            return None
+        if self._on_change is not None:
+            self._on_change(changed)
+        return changed
+
+    def _remember(self, rows):
+        for row in rows:
+            self._recent[self._ident(row)] = row
+        # Rows that fell behind the watermark will not be re-sent
+        if self.watermark is not None:
+            self._recent = {
+                key: row for key, row in self._recent.items()
+                if row.get("last_updated") is None or row["last_updated"] >= self.watermark
+            }
+
+
+class SnapshotFeed:
+    """
+    Change feed for small tables without a change stamp: re-reads the full
+    result of `fetch()` and reports it only when it differs from the last
+    one (poll() returns the new snapshot, or None when nothing changed).
+    """
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+        self._last = None
+
+    def poll(self):
+        rows = list(self._fetch())
+        if rows == self._last:
+            return None
+        self._last = rows
+        return rows
+
+
+# ----------------------------------------------------
+# Treeview patching
+# ----------------------------------------------------
+def patch_treeview(tree, rows, iid, values, keep=None):
+    """
+    Apply changed `rows` to a Treeview whose item ids are row ids.
+
+    New rows are appended, rows whose displayed values changed are updated
+    and rows rejected by `keep(row)` are removed; untouched items are left
+    alone. Returns the number of items modified.
+    """
+    patched = 0
+    for row in rows:
+        item = str(iid(row))
+        exists = tree.exists(item)
+        if keep is not None and not keep(row):
+            if exists:
+                tree.delete(item)
+                patched += 1
+            continue
+        shown = tuple(str(v) for v in values(row))
+        if not exists:
+            tree.insert("", "end", iid=item, values=shown)
+            patched += 1
+        elif tuple(tree.item(item, "values")) != shown:
+            tree.item(item, values=shown)
+            patched += 1
+    return patched
+
+
+def sync_treeview(tree, rows, iid, values):
+    """
+    Make a Treeview show exactly `rows` (a full snapshot) by patching:
+    items no longer present are deleted, the rest go through patch_treeview.
+    """
+    wanted = {str(iid(row)) for row in rows}
+    gone = [item for item in tree.get_children() if item not in wanted]
+    if gone:
+        tree.delete(*gone)
+    return len(gone) + patch_treeview(tree, rows, iid, values)
+
+
+# ----------------------------------------------------
+# Periodic refresh
+# ----------------------------------------------------
+class AutoRefresh:
+    """
+    Periodically runs `poll` on a tasks.TaskScope and hands its result to
+    `apply` on the Tk thread; a result of None means "nothing changed" and
+    costs no Tk work at all.
+
+    Polls are quiet (no loading cursor), never overlap, and are skipped
+    while the window is hidden or minimised.
+    """
+
+    def __init__(self, window, tasks, poll, apply, interval_ms=REFRESH_INTERVAL_MS):
+        self.window = window
+        self.tasks = tasks
+        self.poll = poll
+        self.apply = apply
+        self.interval_ms = interval_ms
+        self._after_id = None
+        self._in_flight = False
+        self._again = False
+        window.bind("<Destroy>", self._on_destroy, add="+")
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.window.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.window.after_cancel(self._after_id)
+            self._after_id = None
+
+    def refresh_now(self):
+        """Poll immediately (e.g. right after this window made a change)."""
+        if self.tasks.closed:
+            return
+        if self._in_flight:
+            # The running poll may predate the change; go again when it lands
+            self._again = True
+            return
+        self._again = False
+        self._in_flight = True
+        if self.tasks.submit(self.poll, on_done=self._done, on_error=self._failed, quiet=True) is None:
+            self._in_flight = False
+
+    def _tick(self):
+        self._after_id = None
+        if self.tasks.closed:
+            return
+        try:
+            visible = bool(self.window.winfo_viewable())
+        except Exception:
+            return
+        if visible:
+            self.refresh_now()
+        self.start()
+
+    def _done(self, result):
+        self._in_flight = False
+        if result is not None:
+            self.apply(result)
+        if self._again:
+            self.refresh_now()
+
+    def _failed(self, error):
+        # Transient errors are retried on the next tick rather than shown
+        self._in_flight = False
+        print(f"[Zodiac] Auto-refresh error: {error}")
+        if self._again:
+            self.refresh_now()
+
+    def _on_destroy(self, event):
+        if event.widget is self.window:
+            self.stop()
@@ -0,0 +1,384 @@
+# forecast.py
+# ----------------------------------------------------
+# Per-product demand forecasting from order history
+# ----------------------------------------------------
+# Every product gets its own linear trend over its monthly customer-order
+# units, read from the product_sales_monthly rollup. The products are not
+# fitted one model at a time: all series share one monthly time axis, so
+# their least-squares normal equations are built with a couple of matrix
+# products and solved as one stacked batch. A catalog of 100k products
+# forecasts in well under a second of NumPy time.
+#
+#     history = load_history()                # products x months, from the rollup
+#     result = fit_trends(history.units)      # predicted, lower, upper, slope
+#     rows = predict_demand()                 # joined with the catalog, for the UI
+#
+# Fits are cached on disk (model_cache) under a fingerprint of the order
+# history, so unchanged data is never fitted twice.
+#
+# With HISTORY_SOURCE = "snapshot" (env ZODIAC_HISTORY_SOURCE) the history
+# is read from the Parquet snapshots (snapshots.py) instead, touching only
+# the product, units and created_at columns of the months fitted, and the
+# database is not queried at all.
+
+import math
+import os
+from collections import namedtuple
+from datetime import date
+from statistics import NormalDist
+
+import numpy as np
+
+import db
+import model_cache
+
+
+HISTORY_MONTHS = 12     # complete months of history fitted
+HORIZON = 1             # months ahead to forecast
+CONFIDENCE = 0.95       # prediction interval coverage
+
+# Where order history is read from: "database" (the sales rollup) or "snapshot"
+HISTORY_SOURCE = os.environ.get("ZODIAC_HISTORY_SOURCE", "database")
+
+History = namedtuple("History", "product_ids start units")
+Forecast = namedtuple("Forecast", "predicted lower upper slope observed intercept")
+DemandForecast = namedtuple(
+    "DemandForecast",
+    "product_id name price_per_unit last_month predicted_sales lower upper slope trend"
+)
+
+
+# -----------------------
+# Order history
+# -----------------------
+# Month buckets as year * 12 + month - 1, computed by the database
+_MONTH_SQL = {
+    "sqlite": "CAST(strftime('%%Y', month) AS INTEGER) * 12 + CAST(strftime('%%m', month) AS INTEGER) - 1",
+    "mysql": "YEAR(month) * 12 + MONTH(month) - 1",
+}
+
+LATEST_MONTH_SQL = """
+    SELECT month FROM product_sales_monthly
+    ORDER BY month DESC
+    LIMIT 1
+"""
+
+
+def history_sql():
+    """Units per (product, month index) for rollup months in [start, end)."""
+    return f"""
+        SELECT product_id, {_MONTH_SQL[db.dialect()]} AS month_index, units
+        FROM product_sales_monthly
+        WHERE month >= %s AND month < %s
+    """
+
+
+def _month_index(moment):
+    return moment.year * 12 + moment.month - 1
+
+
+def _month_start(index):
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def load_history(months=HISTORY_MONTHS, end=None, source=None):
+    """
+    Monthly customer-order units per product over the `months` complete
+    months before the month containing `end` (default: the newest month
+    with sales, so a partly elapsed month never reads as a sales drop).
+    `source` overrides HISTORY_SOURCE.
+
+    Returns a History: sorted product ids, the date the first month
+    starts, and a products x months float array, oldest month first.
+    Products without orders in the window are absent.
+    """
+    if (source or HISTORY_SOURCE) == "snapshot":
+        return _snapshot_history(months, end)
+
+    with db.pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            if end is None:
+                cur.execute(LATEST_MONTH_SQL)
+                row = cur.fetchone()
+                end = row[0] if row and row[0] is not None else date.today()
+            first = _month_index(end) - months
+            cur.execute(history_sql(), (_month_start(first), _month_start(first + months)))
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+
+    if not rows:
+        return History(np.empty(0, dtype=np.int64), _month_start(first), np.zeros((0, months)))
+
+    data = np.array(rows, dtype=np.float64)
+    return _history(data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2], first, months)
+
+
+def _history(product_ids, month_index, units, first, months):
+    """History from (product, month index, units) rows; repeated pairs add up."""
+    product_ids, row_of = np.unique(product_ids, return_inverse=True)
+    grid = np.zeros((len(product_ids), months))
+    np.add.at(grid, (row_of, month_index - first), units)
+    return History(product_ids, _month_start(first), grid)
+
+
+def _snapshot_history(months, end):
+    """load_history() over the Parquet order snapshot."""
+    import snapshots
+
+    if end is None:
+        latest = snapshots.order_months()
+        end = date.fromisoformat(latest[-1] + "-01") if latest else date.today()
+    first = _month_index(end) - months
+    table = snapshots.read_orders(
+        ["product_id", "units", "created_at"], start=_month_start(first), end=_month_start(first + months),
+        order_type="customer_request"
+    ).drop_null()
+    if table.num_rows == 0:
+        return History(np.empty(0, dtype=np.int64), _month_start(first), np.zeros((0, months)))
+
+    # datetime64 months count from 1970-01, month indices from year 0
+    created = table["created_at"].to_numpy().astype("datetime64[M]").astype(np.int64) + 1970 * 12
+    return _history(table["product_id"].to_numpy(), created,
+                    table["units"].to_numpy().astype(np.float64), first, months)
+
+
+# -----------------------
+# Batched trend fitting
+# -----------------------
+def fit_trends(units, horizon=HORIZON, confidence=CONFIDENCE):
+    """
+    Fit a linear trend to every row of `units` (series x months, oldest
+    first) and extrapolate it `horizon` months past the last column.
+
+    A series starts at its first month with sales, so products introduced
+    part-way through the window are not dragged down by the months before
+    they existed; a series with a single month forecasts that month flat.
+
+    Returns a Forecast of arrays aligned with the rows: predicted units,
+    the lower / upper bounds of the `confidence` prediction interval (NaN
+    when a series is too short to estimate its spread), the fitted slope
+    in units per month, the number of months fitted and the intercept
+    (fitted units in the first month).
+    """
+    units = np.asarray(units, dtype=np.float64)
+    n_months = units.shape[1]
+    design = np.column_stack([np.ones(n_months), np.arange(n_months, dtype=np.float64)])
+    k = design.shape[1]
+
+    # Each series only counts from its first non-zero month
+    weights = np.maximum.accumulate(units > 0, axis=1).astype(np.float64)
+    observed = weights.sum(axis=1)
+
+    # Stacked normal equations: gram[p] = X' W_p X, rhs[p] = X' W_p y_p
+    outer = (design[:, :, None] * design[:, None, :]).reshape(n_months, k * k)
+    gram = (weights @ outer).reshape(-1, k, k)
+    rhs = (weights * units) @ design
+
+    # Too-short series get a flat line at their mean instead of a solve
+    fittable = observed >= k
+    gram[~fittable] = np.eye(k)
+    coef = np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(observed > 0, rhs[:, 0] / observed, 0.0)
+    coef[~fittable] = 0.0
+    coef[~fittable, 0] = mean[~fittable]
+
+    # Residual spread and leverage of the forecast point give the interval
+    residuals = units - coef @ design.T
+    dof = observed - k
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = np.where(dof > 0, (weights * residuals ** 2).sum(axis=1) / dof, np.nan)
+    point = np.array([1.0, n_months - 1 + horizon])
+    leverage = np.einsum("i,pij,j->p", point, np.linalg.inv(gram), point)
+    spread = NormalDist().inv_cdf(0.5 + confidence / 2) * np.sqrt(variance * (1 + leverage))
+
+    predicted = coef @ point
+    return Forecast(
+        predicted=np.maximum(predicted, 0.0),
+        lower=np.maximum(predicted - spread, 0.0),
+        upper=np.maximum(predicted + spread, 0.0),
+        slope=coef[:, 1],
+        observed=observed.astype(np.int64),
+        intercept=coef[:, 0],
+    )
+
+
+def movement_score(units, result):
+    """How far each forecast moves from the series' last month, in units."""
+    last = units[:, -1] if units.shape[1] else np.zeros(len(units))
+    return np.abs(result.predicted - last)
+
+
+def _fit_chunked(units, horizon, confidence, on_chunk):
+    """fit_trends over `units`, chunked across processes by analytics."""
+    import analytics
+    from contextlib import closing
+
+    pieces = []
+    with closing(analytics.iter_forecast(units, horizon, confidence)) as chunks:
+        for start, stop, result, scores in chunks:
+            pieces.append((start, result))
+            if on_chunk is not None:
+                on_chunk(start, stop, result, scores)
+    if not pieces:
+        return fit_trends(units, horizon, confidence)
+    pieces.sort(key=lambda piece: piece[0])
+    return Forecast(*(np.concatenate(column) for column in zip(*(result for _, result in pieces))))
+
+
+# -----------------------
+# Fit cache
+# -----------------------
+# The count, newest id and newest timestamp of customer orders change
+# with every order placed; all three come off idx_orders_type_created
+FINGERPRINT_SQL = """
+    SELECT COUNT(*), MAX(id), MAX(created_at) FROM orders
+    WHERE type = 'customer_request'
+"""
+
+
+def rollup_checksum_sql():
+    """
+    Checksum of the monthly rollup the forecasts are fitted on. Orders
+    rewritten in place (e.g. by a bulk import) keep the count and ids
+    above, but changing units, or moving them to another product or
+    month, changes one of these sums.
+    """
+    return f"""
+        SELECT COUNT(*), SUM(units), SUM(order_count), SUM(units * product_id),
+               SUM(units * ({_MONTH_SQL[db.dialect()]}))
+        FROM product_sales_monthly
+    """
+
+
+def _database():
+    if db.dialect() == "sqlite":
+        return ("sqlite", os.path.abspath(db.SQLITE_CONFIG["path"]))
+    return ("mysql", db.DB_CONFIG.get("host"), db.DB_CONFIG.get("port"), db.DB_CONFIG.get("database"))
+
+
+def data_fingerprint(source=None):
+    """Identity of the order history a forecast is fitted on: any change to it changes the result."""
+    if (source or HISTORY_SOURCE) == "snapshot":
+        import snapshots
+        current = snapshots.state()
+        return ("snapshot", os.path.abspath(snapshots.SNAPSHOT_DIR),
+                current.get("orders", 0), current.get("orders_last_id", 0))
+    with db.pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(FINGERPRINT_SQL)
+            count, last_id, last_created = cur.fetchone()
+            cur.execute(rollup_checksum_sql())
+            checksum = tuple(str(value) for value in cur.fetchone())
+        finally:
+            cur.close()
+    return (_database(), int(count or 0), last_id, str(last_created), checksum)
+
+
+def _pack(history, result):
+    arrays = {f"forecast_{name}": value for name, value in result._asdict().items()}
+    arrays.update(
+        product_ids=history.product_ids,
+        start=np.array(history.start, dtype="datetime64[D]"),
+        units=history.units.astype(np.int32),
+    )
+    return arrays
+
+
+def _unpack(arrays):
+    history = History(arrays["product_ids"], arrays["start"].item(), arrays["units"].astype(np.float64))
+    result = Forecast(**{name: arrays[f"forecast_{name}"] for name in Forecast._fields})
+    return history, result
+
+
+def forecast_products(months=HISTORY_MONTHS, horizon=HORIZON, confidence=CONFIDENCE, cache=True,
+                      on_chunk=None, source=None):
+    """
+    (History, Forecast) for every product with orders in the window.
+
+    With `cache`, a fit of the same order history and settings is loaded
+    from model_cache instead of being recomputed, and a new fit is stored.
+    Fits run in parallel chunks (see analytics); `on_chunk(history, start,
+    stop, result, scores)` is called for each chunk as it finishes, or
+    once for the whole history on a cache hit. `source` overrides
+    HISTORY_SOURCE.
+    """
+    key = model_cache.cache_key(data_fingerprint(source), months, horizon, confidence) if cache else None
+    stored = model_cache.load(key) if cache else None
+    if stored is not None:
+        history, result = _unpack(stored)
+        if on_chunk is not None:
+            on_chunk(history, 0, len(history.product_ids), result, movement_score(history.units, result))
+        return history, result
+
+    history = load_history(months, source=source)
+    report = None if on_chunk is None else (lambda *chunk: on_chunk(history, *chunk))
+    result = _fit_chunked(history.units, horizon, confidence, report)
+    if cache:
+        try:
+            model_cache.store(key, _pack(history, result))
+        except OSError as e:
+            # A read-only or full disk only costs the next refit
+            print(f"[Zodiac] Model cache write failed: {e}")
+    return history, result
+
+
+# -----------------------
+# Catalog forecast
+# -----------------------
+def trend_label(slope):
+    """Increasing / Decreasing / Stable for a fitted slope."""
+    if slope > 0:
+        return "Increasing"
+    if slope < 0:
+        return "Decreasing"
+    return "Stable"
+
+
+def forecast_rows(history, result, rows, offset=0):
+    """
+    DemandForecast rows for the given row indices of `result` (catalog
+    products only); `offset` is where result's rows start in `history`.
+    """
+    catalog = db.get_catalog()
+    found = []
+    for i in np.asarray(rows).tolist():
+        product = catalog.get(int(history.product_ids[offset + i]))
+        if product is None:
+            continue
+        slope = float(result.slope[i])
+        found.append(DemandForecast(
+            product["id"], product["name"], product["price_per_unit"], int(history.units[offset + i, -1]),
+            float(result.predicted[i]), float(result.lower[i]), float(result.upper[i]), slope,
+            trend_label(slope)
+        ))
+    return found
+
+
+def predict_demand(months=HISTORY_MONTHS, horizon=HORIZON, confidence=CONFIDENCE):
+    """
+    Forecast demand for every catalog product, in catalog (name) order.
+
+    Returns a list of DemandForecast rows. Products with no customer
+    orders in the window forecast zero with the trend 'No history'.
+    """
+    history, result = forecast_products(months, horizon, confidence)
+    position = {pid: i for i, pid in enumerate(history.product_ids.tolist())}
+    last_month = history.units[:, -1].tolist() if len(history.units) else []
+    predicted, lower, upper, slope = (a.tolist() for a in result[:4])
+
+    rows = []
+    for product in db.get_catalog().all():
+        i = position.get(product["id"])
+        if i is None:
+            rows.append(DemandForecast(product["id"], product["name"], product["price_per_unit"],
+                                       0, 0.0, math.nan, math.nan, 0.0, "No history"))
+            continue
+        rows.append(DemandForecast(
+            product["id"], product["name"], product["price_per_unit"], int(last_month[i]),
+            predicted[i], lower[i], upper[i], slope[i], trend_label(slope[i])
+        ))
+    return rows
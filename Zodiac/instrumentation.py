@@ -0,0 +1,351 @@
+# instrumentation.py
+# ----------------------------------------------------
+# Call counts, row counts and latency histograms for the data layer
+# ----------------------------------------------------
+# Every metric is a named Metric: calls, errors, rows returned, total time
+# and a log-bucketed latency histogram from which p50 / p95 / p99 are read.
+# Three kinds of names are recorded:
+#
+#     db.get_products_page          public data-layer functions (@instrumented)
+#     sql dashboard_admin.fetch_orders:52
+#                                   every statement run on a pooled cursor,
+#                                   keyed by the line that executed it, so
+#                                   inline dashboard queries are covered too
+#     pool.acquire                  time to borrow a pooled connection
+#
+# Statements slower than the slow-query threshold are also handed to
+# slowlog.py, which logs them with their parameters and plan.
+#
+#     snapshot()                    {name: {...}} for display
+#     dump("metrics.json")          the same as JSON, with the pool and catalog
+#                                   stats, for offline comparison
+#     python instrumentation.py compare before.json after.json
+#
+# Recording costs a few microseconds per call. Set ZODIAC_INSTRUMENTATION=0
+# to switch it off (the slow-query log included), or
+# ZODIAC_METRICS_DUMP=<path> to dump on exit.
+
+import atexit
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import slowlog
+
+
+INSTRUMENTATION_CONFIG = {
+    'enabled': os.environ.get("ZODIAC_INSTRUMENTATION", "1") != "0",
+    'bucket_growth': 2 ** 0.25,     # Bucket width: each bound ~19% above the last
+    'bucket_base': 1e-6,            # Upper bound of the first bucket, in seconds
+}
+
+PERCENTILES = (50, 95, 99)
+
+
+# -----------------------
+# Metrics
+# -----------------------
+class Metric:
+    """Counters and a latency histogram for one name (not thread-safe: see record())."""
+
+    __slots__ = ("calls", "errors", "rows", "total", "max", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}       # bucket index -> count
+
+    def add(self, seconds, rows, error):
+        self.calls += 1
+        self.errors += bool(error)
+        self.rows += rows or 0
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        index = _bucket(seconds)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile, in seconds."""
+        if not self.calls:
+            return 0.0
+        rank = q / 100 * self.calls
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(_bound(index), self.max)
+        return self.max
+
+    def as_dict(self):
+        summary = {
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total / self.calls * 1000 if self.calls else 0.0,
+            'max_ms': self.max * 1000,
+        }
+        summary.update((f'p{q}_ms', self.percentile(q) * 1000) for q in PERCENTILES)
+        summary['buckets'] = {str(i): n for i, n in sorted(self.buckets.items())}
+        return summary
+
+
+def _bucket(seconds):
+    base, growth = INSTRUMENTATION_CONFIG['bucket_base'], INSTRUMENTATION_CONFIG['bucket_growth']
+    if seconds <= base:
+        return 0
+    return math.ceil(math.log(seconds / base) / math.log(growth))
+
+
+def _bound(index):
+    return INSTRUMENTATION_CONFIG['bucket_base'] * INSTRUMENTATION_CONFIG['bucket_growth'] ** index
+
+
+_metrics = {}
+_lock = threading.Lock()
+_started = datetime.now()
+
+
+def record(name, seconds, rows=None, error=False):
+    """Add one call of `name` that took `seconds` and returned `rows`."""
+    if not INSTRUMENTATION_CONFIG['enabled']:
+        return
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Metric()
+        metric.add(seconds, rows, error)
+
+
+def reset():
+    """Forget every metric."""
+    global _started
+    with _lock:
+        _metrics.clear()
+        _started = datetime.now()
+
+
+def snapshot():
+    """{name: summary dict} of every metric, busiest (by total time) first."""
+    with _lock:
+        summaries = {name: metric.as_dict() for name, metric in _metrics.items()}
+    return dict(sorted(summaries.items(), key=lambda item: -item[1]['total_ms']))
+
+
+# Sections written with every dump: name -> zero-argument callable
+# (db.py adds the backend, pool and catalog stats)
+DUMP_SECTIONS = {}
+
+
+def dump(path, extra=None):
+    """Write the metrics, DUMP_SECTIONS and `extra` to `path` as JSON."""
+    document = {
+        'since': _started.isoformat(" ", "seconds"),
+        'captured_at': datetime.now().isoformat(" ", "seconds"),
+        'metrics': snapshot(),
+    }
+    for name, section in DUMP_SECTIONS.items():
+        try:
+            document[name] = section()
+        except Exception as e:
+            document[name] = {'error': str(e)}
+    if extra:
+        document.update(extra)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, default=str)
+    return path
+
+
+def _row_count(result):
+    return len(result) if isinstance(result, (list, tuple)) else None
+
+
+def instrumented(name):
+    """Decorator recording each call of a function under `name`; list results count as rows."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            if not INSTRUMENTATION_CONFIG['enabled']:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                record(name, time.perf_counter() - started, error=True)
+                raise
+            record(name, time.perf_counter() - started, _row_count(result))
+            return result
+        return call
+    return wrap
+
+
+@atexit.register
+def _dump_on_exit():
+    path = os.environ.get("ZODIAC_METRICS_DUMP")
+    if path and _metrics:
+        dump(path)
+
+
+# -----------------------
+# Cursor proxy
+# -----------------------
+# Helpers that run statements on behalf of their caller ('module.function');
+# statements are attributed to the first frame above them instead
+PASSTHROUGH_SITES = set()
+
+
+def _call_site():
+    """'module.function:line' of the code that called the cursor method."""
+    frame = sys._getframe(3)    # _call_site <- _run <- execute() <- caller
+    while True:
+        module = os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+        function = f"{module}.{frame.f_code.co_name}"
+        if function not in PASSTHROUGH_SITES or frame.f_back is None:
+            return f"{function}:{frame.f_lineno}"
+        frame = frame.f_back
+
+
+class _Statement:
+    """A statement whose results are still being read."""
+
+    __slots__ = ("site", "sql", "params", "many", "seconds", "rows")
+
+    def __init__(self, site, sql, params, many, seconds):
+        self.site = site
+        self.sql = sql
+        self.params = params
+        self.many = many
+        self.seconds = seconds
+        self.rows = 0
+
+
+class InstrumentedCursor:
+    """
+    Cursor wrapper recording each statement under 'sql <call site>'. Its
+    time is that of execute() plus every fetch of its results, and it is
+    recorded once finished: results read to the end, the next execute(),
+    close(), or its connection going back to the pool. Everything else is
+    passed through to the wrapped cursor.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._statement = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def _run(self, method, many, sql, args, kwargs):
+        if not INSTRUMENTATION_CONFIG['enabled']:
+            return method(sql, *args, **kwargs)
+        self.finish()
+        site = _call_site()
+        started = time.perf_counter()
+        try:
+            result = method(sql, *args, **kwargs)
+        except BaseException:
+            record("sql " + site, time.perf_counter() - started, error=True)
+            raise
+        params = args[0] if args else next(iter(kwargs.values()), None)
+        self._statement = _Statement(site, sql, params, many, time.perf_counter() - started)
+        if self._cursor.description is None:
+            self.finish()       # no result set to read
+        return result
+
+    def execute(self, sql, *args, **kwargs):
+        return self._run(self._cursor.execute, False, sql, args, kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        return self._run(self._cursor.executemany, True, sql, args, kwargs)
+
+    def _fetched(self, started, rows, done):
+        statement = self._statement
+        if statement is not None:
+            statement.seconds += time.perf_counter() - started
+            statement.rows += rows
+            if done:
+                self.finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany() if size is None else self._cursor.fetchmany(size)
+        self._fetched(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def finish(self):
+        """Record the statement being read, if any (safe to call more than once)."""
+        statement, self._statement = self._statement, None
+        if statement is None:
+            return
+        record("sql " + statement.site, statement.seconds, statement.rows)
+        if statement.seconds >= slowlog.threshold():
+            slowlog.observe(statement.site, statement.sql, statement.params, statement.seconds,
+                            statement.rows, statement.many)
+
+    def close(self):
+        self.finish()
+        return self._cursor.close()
+
+
+# -----------------------
+# Standalone Run: compare two dumps
+# -----------------------
+def compare(before, after):
+    """Rows of (name, calls before, calls after, p95 before, p95 after) for two dumps."""
+    old, new = before.get('metrics', {}), after.get('metrics', {})
+    rows = []
+    for name in sorted(set(old) | set(new), key=lambda n: -new.get(n, old.get(n))['total_ms']):
+        a, b = old.get(name, {}), new.get(name, {})
+        rows.append((name, a.get('calls', 0), b.get('calls', 0), a.get('p95_ms'), b.get('p95_ms')))
+    return rows
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare two Zodiac metrics dumps")
+    parser.add_argument("command", choices=("compare",))
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args(argv)
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+
+    def ms(value):
+        return f"{value:>10.2f}" if value is not None else f"{'-':>10}"
+
+    print(f"{'metric':<55} {'calls':>15} {'p95 ms before':>14} {'after':>10} {'change':>8}")
+    for name, calls_a, calls_b, p95_a, p95_b in compare(before, after):
+        change = f"{(p95_b / p95_a - 1) * 100:+7.0f}%" if p95_a and p95_b is not None else ""
+        print(f"{name[:55]:<55} {calls_a:>7}/{calls_b:<7} {ms(p95_a):>14} {ms(p95_b)} {change:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,35 @@
 # ml_model.py
 # -------------------------------------------------
-# Simple Linear Regression Model for Demand Prediction
+# Demand Prediction for DataFrames of Products
 # -------------------------------------------------
-# This module uses scikit-learn to predict whether demand
-# for a product will increase or decrease based on
-# its price per unit and current monthly sales.
+# This module predicts whether demand for a product will
+# increase or decrease from its own monthly sales history.
+# The fitting itself is done by forecast.fit_trends, the
+# same engine the admin dashboard uses.
 
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
+
+import forecast
 
 # -------------------------------------------------
 # Core Predictive Function
 # -------------------------------------------------
-def predict_demand(products_df):
+def predict_demand(products_df, history=None):
     """
-    Predicts demand trend (Increasing/Decreasing) based on
-    'Price (per unit)' and 'Monthly Sales'.
+    Predicts next-month sales and the demand trend (Increasing /
+    Decreasing / Stable) for each product from its monthly history.
 
     Args:
         products_df (pd.DataFrame): A dataframe containing at least:
             ['Name', 'Price (per unit)', 'Monthly Sales']
+        history (array-like, optional): Monthly units sold, one row per
+            product in products_df, oldest month first. When omitted it
+            is loaded from the order history, matching products by name.
 
     Returns:
         pd.DataFrame: Original dataframe with new columns:
-            ['Predicted Sales', 'Demand', 'Trend Color']
+            ['Predicted Sales', 'Lower', 'Upper', 'Demand', 'Trend Color']
     """
 
     # Ensure required columns exist
@@ -33,37 +38,40 @@ def predict_demand(products_df):
         if col not in products_df.columns:
             raise ValueError(f"Missing column: {col}")
 
-    # Prepare data
-    X = products_df[["Price (per unit)"]].values
-    y = products_df["Monthly Sales"].values
+    if history is None:
+        history = history_by_name(products_df["Name"])
+    history = np.asarray(history, dtype=np.float64).reshape(len(products_df), -1)
 
-    # Simple linear regression model
-    model = LinearRegression()
-    model.fit(X, y)
+    # One trend per product, fitted as a single batch
+    result = forecast.fit_trends(history)
 
-    # Predict sales if price changes slightly (-5% to +5%)
-    price_variation = X * 1.05
-    y_pred = model.predict(price_variation)
+    # Construct result dataframe
+    products_df["Predicted Sales"] = np.round(result.predicted, 2)
+    products_df["Lower"] = np.round(result.lower, 2)
+    products_df["Upper"] = np.round(result.upper, 2)
+    products_df["Demand"] = [forecast.trend_label(s) for s in result.slope.tolist()]
+    products_df["Trend Color"] = products_df["Demand"].map(
+        {"Increasing": "green", "Decreasing": "red"}
+    ).fillna("gray")
 
-    # Compute trend
-    demand_trend = []
-    predicted_sales = []
+    return products_df
 
-    for actual, predicted in zip(y, y_pred):
-        predicted_sales.append(round(predicted, 2))
-        if predicted > actual:
-            demand_trend.append("Increasing")
-        else:
-            demand_trend.append("Decreasing")
 
-    # Construct result dataframe
-    products_df["Predicted Sales"] = predicted_sales
-    products_df["Demand"] = demand_trend
-    products_df["Trend Color"] = products_df["Demand"].apply(
-        lambda x: "green" if x == "Increasing" else "red"
-    )
+def history_by_name(names, months=forecast.HISTORY_MONTHS):
+    """Monthly order history aligned with `names` (zeros for unknown products)."""
+    import db
 
-    return products_df
+    loaded = forecast.load_history(months)
+    row_of = {pid: i for i, pid in enumerate(loaded.product_ids.tolist())}
+    catalog = db.get_catalog()
+
+    aligned = np.zeros((len(names), months))
+    for i, name in enumerate(names):
+        for product in catalog.by_name(name)[:1]:
+            row = row_of.get(product["id"])
+            if row is not None:
+                aligned[i] = loaded.units[row]
+    return aligned
 
 
 # -------------------------------------------------
@@ -86,10 +94,11 @@ def generate_summary(predicted_df):
     summary = (
         f"Out of {total} products analyzed, {inc} show an increasing demand trend "
         f"while {dec} are expected to experience a decline. "
-        "This analysis considers the relationship between product pricing and recent "
-        "sales data using a linear regression model. Products with an increasing trend "
-        "may benefit from proactive stock replenishment and promotion, while those "
-        "with decreasing trends may require pricing review or marketing adjustments. "
+        "This analysis fits a linear trend to each product's own monthly sales "
+        "history and projects it one month ahead, with a 95% prediction band. "
+        "Products with an increasing trend may benefit from proactive stock "
+        "replenishment and promotion, while those with decreasing trends may "
+        "require pricing review or marketing adjustments. "
         "Continuous monitoring of demand allows the supply chain to remain adaptive "
         "and responsive to market shifts, ensuring operational efficiency and optimal "
         "resource allocation."
@@ -108,8 +117,14 @@ if __name__ == "__main__":
         "Price (per unit)": [10, 20, 15, 30],
         "Monthly Sales": [100, 50, 75, 30]
     }
+    history = [
+        [60, 70, 75, 85, 90, 100],
+        [80, 72, 65, 60, 55, 50],
+        [70, 78, 72, 76, 73, 75],
+        [0, 0, 0, 12, 20, 30],
+    ]
 
     df = pd.DataFrame(data)
-    result = predict_demand(df)
-    print(result[["Name", "Price (per unit)", "Monthly Sales", "Predicted Sales", "Demand"]])
+    result = predict_demand(df, history)
+    print(result[["Name", "Price (per unit)", "Monthly Sales", "Predicted Sales", "Lower", "Upper", "Demand"]])
     print("\nSummary:\n", generate_summary(result))
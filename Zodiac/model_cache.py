@@ -0,0 +1,130 @@
+# model_cache.py
+# ----------------------------------------------------
+# On-disk cache of fitted forecasting models
+# ----------------------------------------------------
+# Fitting demand trends over the whole order history takes seconds on a
+# large catalog, yet the result only changes when the orders do. Fitted
+# parameters and predictions are stored as NumPy .npz files keyed by a
+# fingerprint of the data they were fitted on (see forecast.py), so
+# reopening the admin dashboard on unchanged data loads them instead of
+# refitting.
+#
+# Entries unused for longer than MODEL_CACHE_CONFIG['max_age'] seconds are
+# dropped, and the least recently used ones are evicted once the cache
+# outgrows 'max_bytes'.
+
+import hashlib
+import os
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+
+CACHE_DIR = os.environ.get(
+    "ZODIAC_MODEL_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "models")
+)
+
+MODEL_CACHE_CONFIG = {
+    'max_bytes': 256 * 1024 * 1024,     # Total size kept on disk
+    'max_age': 7 * 24 * 3600.0,         # Seconds an unused entry survives
+}
+
+# Bump when the fitting code changes so old entries are ignored
+MODEL_VERSION = 2
+
+
+def cache_key(*parts):
+    """Hex digest identifying one fit; `parts` must have a stable repr."""
+    return hashlib.sha1(repr((MODEL_VERSION,) + parts).encode("utf-8")).hexdigest()[:20]
+
+
+def cache_path(key):
+    return os.path.join(CACHE_DIR, f"model-{key}.npz")
+
+
+def load(key):
+    """The arrays stored under `key` as a dict, or None on a miss."""
+    path = cache_path(key)
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return None
+    try:
+        os.utime(path)      # recently used: last to be evicted
+    except OSError:
+        pass
+    return arrays
+
+
+def store(key, arrays):
+    """
+    Write `arrays` (name -> ndarray) under `key` and prune the cache.
+    Safe to call from a worker thread: the file is written under a
+    temporary name and moved into place atomically.
+    """
+    path = cache_path(key)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    prune(keep=path)
+    return path
+
+
+def prune(max_bytes=None, max_age=None, keep=None):
+    """
+    Drop entries unused for longer than `max_age` seconds, then the least
+    recently used ones until the cache fits in `max_bytes` (defaults from
+    MODEL_CACHE_CONFIG). `keep` is never removed. Returns the number of
+    entries removed.
+    """
+    max_bytes = MODEL_CACHE_CONFIG['max_bytes'] if max_bytes is None else max_bytes
+    max_age = MODEL_CACHE_CONFIG['max_age'] if max_age is None else max_age
+
+    entries = []
+    try:
+        names = os.listdir(CACHE_DIR)
+    except OSError:
+        return 0
+    for name in names:
+        full = os.path.join(CACHE_DIR, name)
+        if not name.endswith(".npz") or full == keep:
+            continue
+        try:
+            stat = os.stat(full)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, full))
+    entries.sort()
+
+    total = sum(size for _, size, _ in entries)
+    if keep is not None and os.path.exists(keep):
+        total += os.path.getsize(keep)
+
+    cutoff = time.time() - max_age
+    removed = 0
+    for mtime, size, full in entries:
+        if mtime >= cutoff and total <= max_bytes:
+            break
+        try:
+            os.unlink(full)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def clear():
+    """Remove every cached model."""
+    return prune(max_bytes=0, max_age=0)
@@ -0,0 +1,230 @@
+# product_search.py
+# ----------------------------------------------------
+# In-memory typeahead index over product names
+# ----------------------------------------------------
+# Prefix queries bisect a sorted array of case-folded names; substring
+# queries go through a trigram index, so a keystroke never walks the whole
+# catalog. Exact lookups by name or id are plain dict hits.
+#
+#     index = ProductSearchIndex(products)        # (id, name, price) tuples
+#     index.search("bolt")                        # ranked, capped tuples
+#     index.by_name("Hex Bolt M8")
+
+from array import array
+from bisect import bisect_left, insort
+from functools import partial
+from itertools import islice
+
+
+NGRAM = 3
+SEARCH_LIMIT = 25
+
+
+def _fold(name):
+    return name.casefold()
+
+
+def _grams(folded):
+    return {folded[i:i + NGRAM] for i in range(len(folded) - NGRAM + 1)}
+
+
+def _add_grams(grams, folded, product_id):
+    for gram in _grams(folded):
+        postings = grams.get(gram)
+        if postings is None:
+            grams[gram] = postings = array("q")
+        postings.append(product_id)
+
+
+def _build_grams(entries):
+    """Trigram -> ids for (folded name, id) `entries`; postings follow their order."""
+    grams = {}
+    for folded, product_id in entries:
+        _add_grams(grams, folded, product_id)
+    return grams
+
+
+class ProductSearchIndex:
+    """
+    Search index over (id, name, price) product tuples.
+
+    search() ranks an exact match first, then prefix matches, then
+    substring matches (earlier and word-start matches first, shorter names
+    first) and returns at most `limit` products. Substring candidates are
+    verified in name order until enough matches are found, so the ranking
+    applies to the first matches rather than to every one; a query with
+    few matches reads the whole posting list of its rarest trigram.
+    upsert() and remove()
+    keep the index current for live updates (see delta_sync).
+
+    Building the trigram index takes seconds for very large catalogs, so
+    with ngrams=False only the prefix index is built; search() is then
+    prefix-only until the trigram index is built, e.g. off the Tk thread
+    with ngram_builder().
+
+    Postings are never shrunk: remove() and renames leave the old ids in
+    place, and every candidate is checked against its current name anyway.
+    A stale id costs one dict lookup per query until the next load().
+    """
+
+    def __init__(self, products=(), ngrams=True):
+        self._products = {}         # id -> (id, name, price)
+        self._folded = {}           # id -> case-folded name
+        self._by_name = {}          # exact name -> id
+        self._sorted = []           # (folded name, id), ascending
+        self._grams = None          # trigram -> array of ids, once built
+        self._pending = None        # (folded, id) added during a background build
+        self.load(products, ngrams)
+
+    def load(self, products, ngrams=True):
+        """Replace the indexed products."""
+        self._products = {p[0]: tuple(p) for p in products}
+        self._folded = {pid: _fold(p[1]) for pid, p in self._products.items()}
+        self._by_name = {}
+        for product_id, name, _ in self._products.values():
+            self._by_name.setdefault(name, product_id)
+        self._sorted = sorted((folded, pid) for pid, folded in self._folded.items())
+        self._grams = None
+        self._pending = None
+        if ngrams:
+            self.build_ngrams()
+
+    def build_ngrams(self):
+        """Build the substring index now; postings are kept in name order."""
+        build, publish = self.ngram_builder()
+        publish(build())
+
+    def ngram_builder(self):
+        """
+        (build, publish) for building the substring index off the Tk thread.
+        build() works on a copy of the names taken now and may run on any
+        thread; publish(grams), called on the Tk thread with its result,
+        adds the products upserted since and installs the index. A build
+        overtaken by load() or a later ngram_builder() publishes nothing.
+        """
+        entries = list(self._sorted)
+        pending = self._pending = []
+
+        def publish(grams):
+            if self._pending is not pending:
+                return
+            for folded, product_id in pending:
+                _add_grams(grams, folded, product_id)
+            self._grams, self._pending = grams, None
+
+        return partial(_build_grams, entries), publish
+
+    @property
+    def substring_ready(self):
+        return self._grams is not None
+
+    def __len__(self):
+        return len(self._products)
+
+    # ----------------------------------------------------
+    # Exact lookups
+    # ----------------------------------------------------
+    def get(self, product_id):
+        return self._products.get(product_id)
+
+    def by_name(self, name):
+        product_id = self._by_name.get(name)
+        return self._products.get(product_id) if product_id is not None else None
+
+    def names(self, limit=SEARCH_LIMIT):
+        """The first `limit` names in alphabetical order (the empty query)."""
+        return [self._products[pid][1] for _, pid in self._sorted[:limit]]
+
+    # ----------------------------------------------------
+    # Search
+    # ----------------------------------------------------
+    def search(self, text, limit=SEARCH_LIMIT):
+        """Products matching `text`, best first, at most `limit` of them."""
+        query = _fold(text.strip())
+        if not query:
+            return [self._products[pid] for _, pid in self._sorted[:limit]]
+
+        results, seen = [], set()
+
+        # Exact and prefix matches come straight off the sorted array
+        start = bisect_left(self._sorted, (query,))
+        for folded, product_id in self._sorted[start:start + limit]:
+            if not folded.startswith(query):
+                break
+            seen.add(product_id)
+            results.append((0 if folded == query else 1, 0, len(folded), folded, product_id))
+
+        if len(results) < limit and len(query) >= NGRAM and self._grams is not None:
+            results.extend(self._substring_matches(query, seen, limit - len(results)))
+
+        results.sort()
+        return [self._products[r[-1]] for r in results[:limit]]
+
+    def _substring_matches(self, query, seen, wanted):
+        postings = []
+        for gram in _grams(query):
+            found = self._grams.get(gram)
+            if found is None:
+                return []
+            postings.append(found)
+        # Verify candidates from the rarest trigram only
+        candidates = min(postings, key=len)
+
+        matches = []
+        for product_id in candidates:
+            folded = self._folded.get(product_id)
+            if folded is None or product_id in seen:
+                continue
+            seen.add(product_id)    # a renamed product can be posted twice
+            at = folded.find(query)
+            if at < 0:
+                continue
+            word_start = at == 0 or not folded[at - 1].isalnum()
+            matches.append((2 if word_start else 3, at, len(folded), folded, product_id))
+            if len(matches) >= wanted:
+                break
+        return matches
+
+    # ----------------------------------------------------
+    # Live updates
+    # ----------------------------------------------------
+    def upsert(self, product):
+        """Add a product or apply a change to its name/price."""
+        product = tuple(product)
+        old = self._products.get(product[0])
+        if old is not None and old[1] == product[1]:
+            self._products[product[0]] = product
+            return
+        if old is not None:
+            self.remove(product[0])
+
+        product_id, name, _ = product
+        folded = _fold(name)
+        self._products[product_id] = product
+        self._folded[product_id] = folded
+        self._by_name.setdefault(name, product_id)
+        insort(self._sorted, (folded, product_id))
+        if self._grams is not None:
+            _add_grams(self._grams, folded, product_id)
+        elif self._pending is not None:
+            self._pending.append((folded, product_id))
+
+    def remove(self, product_id):
+        product = self._products.pop(product_id, None)
+        if product is None:
+            return
+        name = product[1]
+        folded = self._folded.pop(product_id)
+        at = bisect_left(self._sorted, (folded, product_id))
+        if at < len(self._sorted) and self._sorted[at] == (folded, product_id):
+            del self._sorted[at]
+        if self._by_name.get(name) == product_id:
+            del self._by_name[name]
+            # Another product may share the name
+            for other_folded, other in islice(self._sorted, bisect_left(self._sorted, (folded,)), None):
+                if other_folded != folded:
+                    break
+                if self._products[other][1] == name:
+                    self._by_name[name] = other
+                    break
+        # Its trigram postings are left alone (see the class docstring)
@@ -0,0 +1,255 @@
+# replenish.py
+# ----------------------------------------------------
+# Batch reorder points and automatic restock requests
+# ----------------------------------------------------
+# Computes a reorder point and an order quantity for every product at once
+# and raises restock_request orders for those that have fallen to it:
+#
+#     daily demand    d, sd_d   daily units over the last 'demand_days' days
+#                               (product_sales_daily; days without sales
+#                               count as zero)
+#     lead time       L, sd_L   days from created_at to fulfilled_at of the
+#                               supplier's delivered restock orders
+#     safety stock    z * sqrt(L * sd_d^2 + d^2 * sd_L^2)
+#     reorder point   max(d * L + safety stock, min_stock)
+#     order up to     reorder point + d * 'cover_days'
+#
+# A product is reordered when its stock plus the units of its open restock
+# orders is at or below the reorder point, so repeated runs do not order
+# twice. All restock orders of a run are written in one transaction,
+# grouped per supplier. Runs headless, e.g. nightly from cron:
+#
+#     python replenish.py                   # raise restock requests
+#     python replenish.py --dry-run         # print what would be ordered
+#
+# Run one instance at a time: two concurrent runs can both see a product
+# as uncovered and order it twice.
+
+import math
+import sys
+from collections import namedtuple
+from datetime import date, timedelta
+from statistics import NormalDist
+
+import numpy as np
+
+import db
+
+
+REPLENISH_CONFIG = {
+    'demand_days': 90,              # Days of sales the demand rate is measured over
+    'lead_history_days': 365,       # Days of delivered restocks the lead time is measured over
+    'default_lead_days': 7.0,       # Lead time of suppliers without delivered restocks
+    'service_level': 0.95,          # Chance stock lasts until a restock arrives
+    'cover_days': 30,               # Days of demand one restock covers beyond the reorder point
+}
+
+ReorderLine = namedtuple(
+    "ReorderLine",
+    "product_id supplier_id stock_count on_order daily_demand lead_days safety_stock reorder_point units"
+)
+
+
+# -----------------------
+# Inputs
+# -----------------------
+# Current stock is read directly: the catalog cache may be a minute old
+PRODUCT_STOCK_SQL = """
+    SELECT id, supplier_id, stock_count, min_stock FROM products
+    ORDER BY id
+"""
+
+DAILY_DEMAND_SQL = """
+    SELECT product_id, SUM(units), SUM(units * units)
+    FROM product_sales_daily
+    WHERE day >= %s AND day < %s
+    GROUP BY product_id
+"""
+
+# Restock units ordered but not yet delivered
+ON_ORDER_SQL = """
+    SELECT product_id, SUM(units) FROM orders
+    WHERE type = 'restock_request' AND status <> 'Delivered' AND product_id IS NOT NULL
+    GROUP BY product_id
+"""
+
+# Days between two timestamps, per dialect
+_LEAD_DAYS = {
+    'sqlite': "(julianday(fulfilled_at) - julianday(created_at))",
+    'mysql': "(TIMESTAMPDIFF(SECOND, created_at, fulfilled_at) / 86400)",
+}
+
+
+def lead_time_sql():
+    """(supplier_id, deliveries, mean days, mean squared days) of restocks created since %s."""
+    days = _LEAD_DAYS[db.dialect()]
+    return f"""
+        SELECT supplier_id, COUNT(*), AVG({days}), AVG({days} * {days})
+        FROM orders
+        WHERE type = 'restock_request' AND created_at >= %s
+          AND fulfilled_at IS NOT NULL AND supplier_id IS NOT NULL
+        GROUP BY supplier_id
+    """
+
+
+def _lookup(ids, keys, values, default=0.0):
+    """values[k] for each id, where keys[k] == id; `default` for ids not in keys."""
+    found = np.full(len(ids), default, dtype=np.float64)
+    if len(keys):
+        order = np.argsort(keys)
+        keys, values = keys[order], values[order]
+        at = np.minimum(np.searchsorted(keys, ids), len(keys) - 1)
+        hit = keys[at] == ids
+        found[hit] = values[at][hit]
+    return found
+
+
+def _column(rows, i):
+    return np.array([row[i] for row in rows], dtype=np.float64)
+
+
+# -----------------------
+# Reorder points
+# -----------------------
+def reorder_points(stock, on_order, min_stock, demand, demand_var, lead, lead_var,
+                   service_level=None, cover_days=None):
+    """
+    Reorder point and order quantity for every product (all arguments are
+    arrays aligned by product; demand in units per day, lead time in days).
+
+    Returns (safety stock, reorder point, units to order); units are zero
+    where stock plus open orders still covers the reorder point.
+    """
+    service_level = REPLENISH_CONFIG['service_level'] if service_level is None else service_level
+    cover_days = REPLENISH_CONFIG['cover_days'] if cover_days is None else cover_days
+
+    z = NormalDist().inv_cdf(service_level)
+    safety = z * np.sqrt(lead * demand_var + demand ** 2 * lead_var)
+    reorder_point = np.maximum(np.ceil(demand * lead + safety), min_stock)
+    order_up_to = reorder_point + np.ceil(demand * cover_days)
+
+    position = stock + on_order
+    units = np.where(position <= reorder_point, order_up_to - position, 0.0)
+    return safety, reorder_point, np.maximum(units, 0.0)
+
+
+def plan(today=None):
+    """
+    Restock lines for every product at or below its reorder point, as
+    {supplier_id: [ReorderLine, ...]}. Products without a supplier are
+    skipped. `today` (default: date.today()) ends the demand window.
+    """
+    today = today or date.today()
+    demand_days = REPLENISH_CONFIG['demand_days']
+    lead_since = today - timedelta(days=REPLENISH_CONFIG['lead_history_days'])
+
+    with db.pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(PRODUCT_STOCK_SQL)
+            products = [row for row in cur.fetchall() if row[1] is not None]
+            cur.execute(DAILY_DEMAND_SQL, (today - timedelta(days=demand_days), today))
+            sales = cur.fetchall()
+            cur.execute(ON_ORDER_SQL)
+            open_orders = cur.fetchall()
+            cur.execute(lead_time_sql(), (lead_since,))
+            deliveries = cur.fetchall()
+        finally:
+            cur.close()
+    if not products:
+        return {}
+
+    ids = _column(products, 0)
+    supplier_ids = _column(products, 1)
+
+    sales_ids = _column(sales, 0)
+    demand = _lookup(ids, sales_ids, _column(sales, 1)) / demand_days
+    demand_var = np.maximum(_lookup(ids, sales_ids, _column(sales, 2)) / demand_days - demand ** 2, 0.0)
+
+    lead_ids = _column(deliveries, 0)
+    lead = _lookup(supplier_ids, lead_ids, _column(deliveries, 2), REPLENISH_CONFIG['default_lead_days'])
+    lead_var = np.maximum(_lookup(supplier_ids, lead_ids, _column(deliveries, 3)) - lead ** 2, 0.0)
+
+    stock = _column(products, 2)
+    on_order = _lookup(ids, _column(open_orders, 0), _column(open_orders, 1))
+    safety, reorder_point, units = reorder_points(
+        stock, on_order, _column(products, 3), demand, demand_var, lead, lead_var
+    )
+
+    lines = {}
+    for i in np.flatnonzero(units > 0).tolist():
+        line = ReorderLine(
+            int(ids[i]), int(supplier_ids[i]), int(stock[i]), int(on_order[i]), float(demand[i]),
+            float(lead[i]), float(safety[i]), int(reorder_point[i]), int(units[i])
+        )
+        lines.setdefault(line.supplier_id, []).append(line)
+    return lines
+
+
+# -----------------------
+# Restock requests
+# -----------------------
+def restock_orders(lines, today=None):
+    """insert_orders() rows for a plan(), supplier by supplier."""
+    today = today or date.today()
+    orders = []
+    for supplier_id in sorted(lines):
+        for line in lines[supplier_id]:
+            orders.append({
+                'order_type': 'restock_request',
+                'product_id': line.product_id,
+                'supplier_id': supplier_id,
+                'units': line.units,
+                'delivery_date': today + timedelta(days=math.ceil(line.lead_days)),
+                'note': f"Auto-replenishment: stock {line.stock_count}, reorder point {line.reorder_point}",
+            })
+    return orders
+
+
+def run(dry_run=False, today=None):
+    """
+    Plan and (unless `dry_run`) raise the restock requests in one
+    transaction. Returns the plan, or None if writing it failed.
+    """
+    lines = plan(today)
+    if dry_run or not lines:
+        return lines
+    return lines if db.insert_orders(restock_orders(lines, today)) else None
+
+
+def summary(lines):
+    units = sum(line.units for group in lines.values() for line in group)
+    count = sum(len(group) for group in lines.values())
+    return f"{count:,} restock requests ({units:,} units) for {len(lines):,} suppliers"
+
+
+# -----------------------
+# Standalone Run
+# -----------------------
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Zodiac automatic replenishment")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without ordering")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default=None,
+                        help="override DB_BACKEND for this run")
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        db.configure_backend(args.backend)
+
+    lines = run(args.dry_run)
+    if lines is None:
+        print("Replenishment failed: no restock requests were written.")
+        return 1
+    for supplier_id in sorted(lines):
+        print(f"  supplier {supplier_id}:")
+        for line in lines[supplier_id]:
+            print(f"    product {line.product_id:>8}  stock {line.stock_count:>6} + {line.on_order:<6}"
+                  f"reorder point {line.reorder_point:>6}  order {line.units:>6}")
+    print(("Would raise " if args.dry_run else "Raised ") + summary(lines) + ".")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
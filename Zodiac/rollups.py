@@ -0,0 +1,173 @@
+# rollups.py
+# ----------------------------------------------------
+# Rebuild the daily / monthly sales rollups from orders
+# ----------------------------------------------------
+# The db write paths keep product_sales_daily and product_sales_monthly
+# current as customer orders are written (see db.py, SALES ROLLUPS). This
+# module rebuilds them from the orders table: after an import that bypassed
+# the data layer, after manual fixes to orders, or to verify them.
+#
+#     python rollups.py rebuild             # clear and rebuild, chunk by chunk
+#     python rollups.py check               # compare rollup totals with orders
+#
+# Orders are read in primary-key ranges of ROLLUP_CONFIG['chunk_orders']
+# rows and committed per chunk, so a rebuild never holds one huge
+# transaction. Run it while no orders are being placed: orders written
+# during a rebuild can be counted twice or not at all.
+
+import sys
+
+import db
+
+
+ROLLUP_CONFIG = {
+    'chunk_orders': 50_000,     # Order ids aggregated per chunk
+}
+
+ORDER_ID_RANGE_SQL = """
+    SELECT MIN(id), MAX(id) FROM orders
+"""
+
+# First day of the month of `day`, per dialect
+_MONTH_OF_DAY = {
+    'sqlite': "DATE(day, 'start of month')",
+    'mysql': "DATE_SUB(day, INTERVAL DAYOFMONTH(day) - 1 DAY)",
+}
+
+
+def _daily_chunk_sql(dialect):
+    # DATE() exists in both SQLite and MySQL; WHERE keeps SQLite's upsert parse unambiguous
+    return f"""
+        INSERT INTO product_sales_daily (product_id, day, units, order_count)
+        SELECT product_id, DATE(created_at), SUM(units), COUNT(*)
+        FROM orders
+        WHERE id >= %s AND id < %s AND type = 'customer_request'
+          AND product_id IS NOT NULL AND created_at IS NOT NULL
+        GROUP BY product_id, DATE(created_at)
+        {db.sales_conflict_clause('day', dialect)}
+    """
+
+
+def _monthly_sql(dialect):
+    return f"""
+        INSERT INTO product_sales_monthly (product_id, month, units, order_count)
+        SELECT product_id, {_MONTH_OF_DAY[dialect]}, SUM(units), SUM(order_count)
+        FROM product_sales_daily
+        WHERE product_id IS NOT NULL
+        GROUP BY product_id, {_MONTH_OF_DAY[dialect]}
+    """
+
+
+def backfill(cur, dialect, chunk_orders=None, on_chunk=None):
+    """
+    Empty both rollups and refill them from orders on `cur`.
+
+    Each chunk of order ids is aggregated and added to the daily rollup
+    by one INSERT ... SELECT; the monthly rollup is then summed from the
+    daily one. on_chunk(done_ids, total_ids), if given, runs after every
+    chunk; the CLI commits there. Returns (daily rows, monthly rows).
+    """
+    chunk_orders = chunk_orders or ROLLUP_CONFIG['chunk_orders']
+    for table, _ in db.SALES_ROLLUPS:
+        cur.execute(f"DELETE FROM {table}")
+
+    cur.execute(ORDER_ID_RANGE_SQL)
+    low, high = cur.fetchone()
+    if low is None:
+        return 0, 0
+
+    daily_sql = _daily_chunk_sql(dialect)
+    for start in range(low, high + 1, chunk_orders):
+        cur.execute(daily_sql, (start, start + chunk_orders))
+        if on_chunk is not None:
+            on_chunk(min(start + chunk_orders, high + 1) - low, high + 1 - low)
+    cur.execute(_monthly_sql(dialect))
+
+    counts = []
+    for table, _ in db.SALES_ROLLUPS:
+        cur.execute(f"SELECT COUNT(*) FROM {table}")
+        counts.append(cur.fetchone()[0])
+    return tuple(counts)
+
+
+def rebuild(chunk_orders=None, progress=None):
+    """
+    Rebuild the rollups of the configured database, committing per chunk.
+    progress(done_ids, total_ids) is called after each chunk.
+    """
+    with db.pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            def chunk_done(done, total):
+                conn.commit()
+                if progress is not None:
+                    progress(done, total)
+
+            counts = backfill(cur, db.dialect(), chunk_orders, chunk_done)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    db.invalidate_catalog()
+    return counts
+
+
+def check():
+    """
+    Compare total units / order counts in each rollup with orders.
+    Returns {table: (rollup totals, order totals)}.
+    """
+    with db.pooled_connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                SELECT COALESCE(SUM(units), 0), COUNT(*) FROM orders
+                WHERE type = 'customer_request' AND product_id IS NOT NULL AND created_at IS NOT NULL
+            """)
+            expected = tuple(int(v) for v in cur.fetchone())
+            found = {}
+            for table, _ in db.SALES_ROLLUPS:
+                cur.execute(f"SELECT COALESCE(SUM(units), 0), COALESCE(SUM(order_count), 0) FROM {table}")
+                found[table] = (tuple(int(v) for v in cur.fetchone()), expected)
+            return found
+        finally:
+            cur.close()
+
+
+# -----------------------
+# Standalone Run
+# -----------------------
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Zodiac sales rollups")
+    parser.add_argument("command", choices=("rebuild", "check"))
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default=None,
+                        help="override DB_BACKEND for this run")
+    parser.add_argument("--chunk", type=int, default=None, help="order ids per chunk")
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        db.configure_backend(args.backend)
+
+    if args.command == "check":
+        ok = True
+        for table, (found, expected) in check().items():
+            status = "ok" if found == expected else "MISMATCH"
+            ok = ok and found == expected
+            print(f"  {status:<9}{table}: {found[0]:,} units / {found[1]:,} orders "
+                  f"(orders table: {expected[0]:,} / {expected[1]:,})")
+        return 0 if ok else 1
+
+    def progress(done, total):
+        print(f"\r  {done:,} / {total:,} order ids", end="", flush=True)
+
+    daily, monthly = rebuild(args.chunk, progress)
+    print(f"\nRebuilt rollups: {daily:,} daily rows, {monthly:,} monthly rows.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+# schema.py
+# ----------------------------------------------------
+# Versioned schema and migrations for Zodiac
+# ----------------------------------------------------
+# Every change to the database structure is a numbered migration. Applied
+# versions are recorded in `schema_migrations`, and every step is written
+# to be idempotent, so running migrate() against a new database, an older
+# one, or one that was created by hand before this module existed always
+# ends in the same state.
+#
+# Migrations are not atomic on MySQL: every CREATE TABLE / CREATE INDEX
+# commits implicitly, so one that fails partway leaves its earlier DDL in
+# place and is not recorded in `schema_migrations`. Steps therefore check
+# before they act (IF NOT EXISTS, index_exists) and run their data changes
+# after their DDL, in the transaction that records the version; running
+# migrate() again once the cause is fixed finishes the migration. On
+# SQLite a migration is applied or rolled back as a whole, except for a
+# backfill, which commits per chunk (see Migration.backfill).
+#
+#     python schema.py                  # migrate the configured database
+#     python schema.py status           # show applied / pending versions
+#
+# SQLite databases are migrated automatically on first connection
+# (see db_sqlite.connect); MySQL databases are migrated with the CLI, and
+# the app refuses to connect to one that is behind (see db.check_schema).
+
+import sys
+from collections import namedtuple
+from datetime import datetime
+
+
+# -----------------------
+# Base tables
+# -----------------------
+SQLITE_TABLES = """
+CREATE TABLE IF NOT EXISTS suppliers (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    name            TEXT NOT NULL,
+    email           TEXT,
+    phone           TEXT
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    name            TEXT NOT NULL,
+    supplier_id     INTEGER REFERENCES suppliers(id),
+    price_per_unit  REAL NOT NULL DEFAULT 0,
+    stock_count     INTEGER NOT NULL DEFAULT 0,
+    min_stock       INTEGER NOT NULL DEFAULT 0,
+    last_updated    TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    monthly_sales   INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    username        TEXT NOT NULL,
+    email           TEXT NOT NULL,
+    password_hash   TEXT,
+    password        TEXT,
+    role            TEXT NOT NULL DEFAULT 'customer',
+    phone           TEXT,
+    created_at      TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE TABLE IF NOT EXISTS admin_credentials (
+    admin_id        TEXT PRIMARY KEY,
+    password_hash   TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS supplier_credentials (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    supplier_id     TEXT NOT NULL,
+    name            TEXT,
+    email           TEXT,
+    password        TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    type            TEXT NOT NULL,
+    product_id      INTEGER REFERENCES products(id),
+    supplier_id     INTEGER REFERENCES suppliers(id),
+    customer_id     INTEGER REFERENCES users(id),
+    units           INTEGER NOT NULL DEFAULT 0,
+    delivery_date   DATE,
+    note            TEXT,
+    status          TEXT NOT NULL DEFAULT 'Pending',
+    created_at      TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+    fulfilled_at    TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS restock_requests (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    stock_name      TEXT NOT NULL,
+    units_required  INTEGER NOT NULL,
+    delivery_date   DATE,
+    note            TEXT,
+    supplier_name   TEXT NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'Pending'
+);
+"""
+
+MYSQL_TABLES = """
+CREATE TABLE IF NOT EXISTS suppliers (
+    id              INT AUTO_INCREMENT PRIMARY KEY,
+    name            VARCHAR(255) NOT NULL,
+    email           VARCHAR(255),
+    phone           VARCHAR(32)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS products (
+    id              INT AUTO_INCREMENT PRIMARY KEY,
+    name            VARCHAR(255) NOT NULL,
+    supplier_id     INT,
+    price_per_unit  DECIMAL(10, 2) NOT NULL DEFAULT 0,
+    stock_count     INT NOT NULL DEFAULT 0,
+    min_stock       INT NOT NULL DEFAULT 0,
+    last_updated    TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+    monthly_sales   INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (supplier_id) REFERENCES suppliers(id)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS users (
+    id              INT AUTO_INCREMENT PRIMARY KEY,
+    username        VARCHAR(100) NOT NULL,
+    email           VARCHAR(255) NOT NULL,
+    password_hash   CHAR(64),
+    password        VARCHAR(255),
+    role            VARCHAR(20) NOT NULL DEFAULT 'customer',
+    phone           VARCHAR(32),
+    created_at      TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS admin_credentials (
+    admin_id        VARCHAR(64) PRIMARY KEY,
+    password_hash   CHAR(64) NOT NULL
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS supplier_credentials (
+    id              INT AUTO_INCREMENT PRIMARY KEY,
+    supplier_id     VARCHAR(64) NOT NULL,
+    name            VARCHAR(255),
+    email           VARCHAR(255),
+    password        VARCHAR(255) NOT NULL
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS orders (
+    id              INT AUTO_INCREMENT PRIMARY KEY,
+    type            VARCHAR(32) NOT NULL,
+    product_id      INT,
+    supplier_id     INT,
+    customer_id     INT,
+    units           INT NOT NULL DEFAULT 0,
+    delivery_date   DATE,
+    note            TEXT,
+    status          VARCHAR(32) NOT NULL DEFAULT 'Pending',
+    created_at      TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+    fulfilled_at    TIMESTAMP NULL,
+    FOREIGN KEY (product_id) REFERENCES products(id),
+    FOREIGN KEY (supplier_id) REFERENCES suppliers(id),
+    FOREIGN KEY (customer_id) REFERENCES users(id)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS restock_requests (
+    id              INT AUTO_INCREMENT PRIMARY KEY,
+    stock_name      VARCHAR(255) NOT NULL,
+    units_required  INT NOT NULL,
+    delivery_date   DATE,
+    note            TEXT,
+    supplier_name   VARCHAR(255) NOT NULL,
+    status          VARCHAR(32) NOT NULL DEFAULT 'Pending'
+) ENGINE=InnoDB;
+"""
+
+
+# -----------------------
+# Sales rollups
+# -----------------------
+# Units and order counts of customer orders per product per day / month
+# (month = its first day). Kept current by the db write paths and rebuilt
+# from orders by rollups.py; products.monthly_sales is no longer read.
+SQLITE_ROLLUP_TABLES = """
+CREATE TABLE IF NOT EXISTS product_sales_daily (
+    product_id      INTEGER NOT NULL,
+    day             DATE NOT NULL,
+    units           INTEGER NOT NULL DEFAULT 0,
+    order_count     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, day)
+);
+
+CREATE TABLE IF NOT EXISTS product_sales_monthly (
+    product_id      INTEGER NOT NULL,
+    month           DATE NOT NULL,
+    units           INTEGER NOT NULL DEFAULT 0,
+    order_count     INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, month)
+);
+"""
+
+MYSQL_ROLLUP_TABLES = """
+CREATE TABLE IF NOT EXISTS product_sales_daily (
+    product_id      INT NOT NULL,
+    day             DATE NOT NULL,
+    units           INT NOT NULL DEFAULT 0,
+    order_count     INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, day)
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS product_sales_monthly (
+    product_id      INT NOT NULL,
+    month           DATE NOT NULL,
+    units           INT NOT NULL DEFAULT 0,
+    order_count     INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, month)
+) ENGINE=InnoDB;
+"""
+
+ROLLUP_INDEXES = [
+    ("idx_sales_daily_day", "product_sales_daily", "day"),          # all products over a day range
+    ("idx_sales_monthly_month", "product_sales_monthly", "month"),  # all products over a month range
+]
+
+
+# -----------------------
+# Indexes
+# -----------------------
+# (name, table, columns) for the filters and sort orders the app runs
+HOT_INDEXES = [
+    ("idx_products_name", "products", "name"),                  # keyset paging, name lookups
+    ("idx_products_last_updated", "products", "last_updated"),  # delta refresh
+    ("idx_orders_type_created", "orders", "type, created_at"),  # order lists by type, newest first
+    ("idx_restock_supplier_status", "restock_requests", "supplier_name, status"),
+    ("idx_users_email", "users", "email"),                      # customer login / registration
+    ("idx_supplier_credentials_supplier", "supplier_credentials", "supplier_id"),
+    ("idx_suppliers_name", "suppliers", "name"),                # get_supplier_by_name
+]
+
+SUPPLIER_QUEUE_INDEXES = [
+    ("idx_orders_supplier_status", "orders", "supplier_id, status"),  # a supplier's pending restocks
+]
+
+
+# -----------------------
+# Migration steps
+# -----------------------
+def _statements(script):
+    return [s.strip() for s in script.split(";") if s.strip()]
+
+
+def _create_tables(cur, dialect):
+    for statement in _statements(SQLITE_TABLES if dialect == "sqlite" else MYSQL_TABLES):
+        cur.execute(statement)
+
+
+def index_exists(cur, dialect, table, name):
+    if dialect == "sqlite":
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = %s", (name,))
+    else:
+        cur.execute("""
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+            LIMIT 1
+        """, (table, name))
+    return cur.fetchone() is not None
+
+
+def create_indexes(indexes):
+    """Migration step creating each (name, table, columns) index that is missing."""
+    def step(cur, dialect):
+        for name, table, columns in indexes:
+            # MySQL has no CREATE INDEX IF NOT EXISTS
+            if not index_exists(cur, dialect, table, name):
+                cur.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+    return step
+
+
+def _create_rollups(cur, dialect):
+    for statement in _statements(SQLITE_ROLLUP_TABLES if dialect == "sqlite" else MYSQL_ROLLUP_TABLES):
+        cur.execute(statement)
+    create_indexes(ROLLUP_INDEXES)(cur, dialect)
+
+
+def _backfill_rollups(cur, dialect, commit):
+    # Existing orders are rolled up in chunks of order ids, committing each;
+    # an interrupted backfill starts over (it empties the rollups first)
+    import rollups
+    rollups.backfill(cur, dialect, on_chunk=lambda done, total: commit())
+
+
+# Pending rows of the legacy restock_requests queue (keyed by product name and
+# supplier login) with the product and supplier ids the order queue uses
+LEGACY_RESTOCK_SQL = """
+    SELECT r.id, MIN(p.id), MIN(s.id), r.units_required, r.delivery_date, r.note
+    FROM restock_requests r
+    JOIN products p ON p.name = r.stock_name
+    JOIN supplier_credentials c ON c.supplier_id = r.supplier_name
+    JOIN suppliers s ON s.name = c.name
+    WHERE r.status = 'Pending'
+    GROUP BY r.id, r.units_required, r.delivery_date, r.note
+"""
+
+
+def _create_supplier_queue(cur, dialect):
+    create_indexes(SUPPLIER_QUEUE_INDEXES)(cur, dialect)
+    # Carry pending legacy requests over as restock orders. Only 'Pending'
+    # rows are read and each copied row is marked 'Moved' in the same
+    # transaction (no DDL follows to commit it early), so a re-run after a
+    # failure copies exactly the rows that were not moved
+    cur.execute(LEGACY_RESTOCK_SQL)
+    legacy = cur.fetchall()
+    if not legacy:
+        return
+    now = datetime.now()
+    cur.executemany("""
+        INSERT INTO orders (type, product_id, supplier_id, units, delivery_date, note, status, created_at)
+        VALUES ('restock_request', %s, %s, %s, %s, %s, 'Pending', %s)
+    """, [(*row[1:], now) for row in legacy])
+    cur.executemany("UPDATE restock_requests SET status = 'Moved' WHERE id = %s", [(row[0],) for row in legacy])
+
+
+# apply(cur, dialect) makes the schema change; backfill(cur, dialect, commit),
+# if given, then fills the new tables, calling commit() as it goes. The
+# version is recorded once both have finished.
+Migration = namedtuple("Migration", "version description apply backfill", defaults=(None,))
+
+MIGRATIONS = [
+    Migration(1, "Base tables", _create_tables),
+    Migration(2, "Indexes for the hot query paths", create_indexes(HOT_INDEXES)),
+    Migration(3, "Daily and monthly sales rollups", _create_rollups, _backfill_rollups),
+    Migration(4, "Supplier restock queue on order ids", _create_supplier_queue),
+]
+
+
+# -----------------------
+# Runner
+# -----------------------
+VERSION_TABLE = {
+    "sqlite": """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at  TIMESTAMP NOT NULL
+        )
+    """,
+    "mysql": """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version     INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at  TIMESTAMP NOT NULL
+        ) ENGINE=InnoDB
+    """,
+}
+
+
+def applied_versions(conn, dialect):
+    cur = conn.cursor()
+    try:
+        cur.execute(VERSION_TABLE[dialect])
+        cur.execute("SELECT version FROM schema_migrations ORDER BY version")
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+def pending_migrations(conn, dialect):
+    done = set(applied_versions(conn, dialect))
+    return [m for m in MIGRATIONS if m.version not in done]
+
+
+def migrate(conn, dialect, target=None):
+    """
+    Apply every pending migration up to `target` (default: latest) on
+    `conn`, a Zodiac connection for `dialect` ('mysql' or 'sqlite').
+    Returns the versions applied.
+
+    Each migration commits with its version record. On MySQL its DDL has
+    already committed if it fails (see the module notes); re-run once the
+    cause is fixed.
+    """
+    applied = []
+    for migration in pending_migrations(conn, dialect):
+        if target is not None and migration.version > target:
+            break
+        cur = conn.cursor()
+        try:
+            migration.apply(cur, dialect)
+            if migration.backfill is not None:
+                conn.commit()
+                migration.backfill(cur, dialect, conn.commit)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, %s)",
+                (migration.version, migration.description, datetime.now())
+            )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            if dialect == "mysql":
+                print(f"[DB] Migration {migration.version} ({migration.description}) failed: {e}; "
+                      f"its schema changes so far are kept. Fix the cause and migrate again.")
+            raise
+        finally:
+            cur.close()
+        applied.append(migration.version)
+    return applied
+
+
+def latest_version():
+    return MIGRATIONS[-1].version
+
+
+# -----------------------
+# Standalone Run
+# -----------------------
+def main(argv=None):
+    import argparse
+    import db
+
+    parser = argparse.ArgumentParser(description="Zodiac schema migrations")
+    parser.add_argument("command", nargs="?", choices=("migrate", "status"), default="migrate")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default=None,
+                        help="override DB_BACKEND for this run")
+    parser.add_argument("--target", type=int, default=None, help="stop after this version")
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        db.configure_backend(args.backend)
+    # A connection of its own: the pool refuses a MySQL schema that is behind
+    conn = db._open_raw_connection()
+    try:
+        if args.command == "status":
+            done = set(applied_versions(conn, db.dialect()))
+            for m in MIGRATIONS:
+                print(f"  {'applied' if m.version in done else 'pending'}  {m.version:>3}  {m.description}")
+            return 0
+        applied = migrate(conn, db.dialect(), args.target)
+    finally:
+        conn.close()
+    print(f"Applied migrations: {applied}" if applied else "Schema is up to date.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+# slowlog.py
+# ----------------------------------------------------
+# Slow-query log with EXPLAIN capture
+# ----------------------------------------------------
+# Every statement run on a pooled cursor is timed (see instrumentation.py).
+# Those taking at least SLOW_QUERY_CONFIG['threshold_ms'] are written to a
+# rotating log file, one JSON object per line, with their parameters, the
+# line that ran them (e.g. dashboard_admin.fetch_orders:52) and the plan
+# the database reports for them:
+#
+#     ZODIAC_SLOW_QUERY_MS=100 python main.py
+#     python slowlog.py                     # statements ranked by total time
+#     python slowlog.py --plans --top 5     # ... with their latest plan
+#
+# The EXPLAIN and the write happen on a background thread over a
+# connection of its own, so a slow statement is not made slower by being
+# logged and the EXPLAIN does not show up in the metrics. The plan is
+# captured a moment after the statement ran, outside its transaction.
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sys
+import threading
+from datetime import datetime
+
+
+SLOW_QUERY_LOG = os.environ.get(
+    "ZODIAC_SLOW_QUERY_LOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "slow_queries.log")
+)
+
+SLOW_QUERY_CONFIG = {
+    'threshold_ms': float(os.environ.get("ZODIAC_SLOW_QUERY_MS", 250)),   # Log statements at least this slow
+    'explain': True,            # Capture the plan of logged statements
+    'log_params': True,         # Include parameter values in the log
+    'max_param_chars': 200,     # Longer parameter values are cut
+    'max_bytes': 5_000_000,     # Rotate the log file at this size
+    'backups': 5,               # Rotated files kept (slow_queries.log.1, .2, ...)
+    'queue_size': 1000,         # Entries waiting for EXPLAIN; beyond this they are dropped
+}
+
+# Statements EXPLAIN accepts on both backends
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+_PLACEHOLDER_RUN = re.compile(r"%s(\s*,\s*%s)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def threshold():
+    """Slow-query threshold in seconds."""
+    return SLOW_QUERY_CONFIG['threshold_ms'] / 1000
+
+
+def normalize(sql):
+    """`sql` on one line, with placeholder lists of any length shown as '%s, ...'."""
+    return _PLACEHOLDER_RUN.sub("%s, ...", _WHITESPACE.sub(" ", sql).strip())
+
+
+# -----------------------
+# Recording
+# -----------------------
+_queue = queue.Queue(maxsize=SLOW_QUERY_CONFIG['queue_size'])
+_worker = None
+_worker_lock = threading.Lock()
+_logger = None
+
+
+def _short(value):
+    text = repr(value)
+    limit = SLOW_QUERY_CONFIG['max_param_chars']
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def observe(site, sql, params, seconds, rows=0, many=False):
+    """
+    Queue a slow statement for logging (called by instrumentation for
+    statements over the threshold; `seconds` includes fetching its `rows`).
+    With `many`, params is the sequence passed to executemany(): only its
+    first row is kept.
+    """
+    batch_rows = None
+    if many:
+        batch = params if isinstance(params, (list, tuple)) else None
+        batch_rows = len(batch) if batch is not None else None
+        params = batch[0] if batch else None
+    if isinstance(params, dict):
+        params = None       # not used by the app; nothing to EXPLAIN with
+    params = tuple(params) if params is not None else None
+
+    entry = {
+        'time': datetime.now().isoformat(" ", "milliseconds"),
+        'ms': round(seconds * 1000, 3),
+        'site': site,
+        'rows': rows,
+        'sql': normalize(sql),
+        'params': [_short(p) for p in params] if params is not None and SLOW_QUERY_CONFIG['log_params'] else None,
+    }
+    if batch_rows is not None:
+        entry['batch_rows'] = batch_rows
+    try:
+        _queue.put_nowait((entry, sql, params))
+    except queue.Full:
+        return
+    _start_worker()
+
+
+def _start_worker():
+    global _worker
+    if _worker is not None:
+        return
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_drain, name="slowlog", daemon=True)
+            _worker.start()
+
+
+def _log():
+    global _logger
+    if _logger is None:
+        os.makedirs(os.path.dirname(SLOW_QUERY_LOG), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_CONFIG['max_bytes'],
+            backupCount=SLOW_QUERY_CONFIG['backups'], encoding="utf-8", delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger = logging.getLogger("zodiac.slowlog")
+        _logger.propagate = False
+        _logger.setLevel(logging.INFO)
+        _logger.addHandler(handler)
+    return _logger
+
+
+def _drain():
+    while True:
+        item = _queue.get()
+        try:
+            if item is None:
+                return
+            entry, sql, params = item
+            if SLOW_QUERY_CONFIG['explain'] and _EXPLAINABLE.match(sql) and (params is not None or "%s" not in sql):
+                try:
+                    entry['plan'] = explain(sql, params or ())
+                except Exception as e:
+                    entry['explain_error'] = str(e)
+            _log().info(json.dumps(entry, default=str))
+        except Exception as e:
+            print(f"[DB] Slow-query log error: {e}")
+        finally:
+            _queue.task_done()
+
+
+@atexit.register
+def flush():
+    """Wait for queued entries to be written."""
+    if _worker is not None and _worker.is_alive():
+        _queue.join()
+
+
+def explain(sql, params=()):
+    """Plan lines of `sql` with `params` on the active backend, over a connection of its own."""
+    import db     # db imports instrumentation, which imports this module
+
+    raw = db._open_raw_connection()
+    try:
+        cur = raw.cursor()
+        try:
+            if db.dialect() == "sqlite":
+                cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+                return [row[3] for row in cur.fetchall()]
+            cur.execute("EXPLAIN " + sql, params)
+            columns = cur.column_names
+            return [
+                ", ".join(f"{k}={v}" for k, v in zip(columns, row) if v is not None)
+                for row in cur.fetchall()
+            ]
+        finally:
+            cur.close()
+            raw.rollback()
+    finally:
+        raw.close()
+
+
+# -----------------------
+# Reading
+# -----------------------
+def entries(path=None):
+    """Logged entries, oldest first, from the log file and its rotated backups."""
+    path = path or SLOW_QUERY_LOG
+    files = [f"{path}.{i}" for i in range(SLOW_QUERY_CONFIG['backups'], 0, -1)] + [path]
+    for name in files:
+        try:
+            f = open(name, encoding="utf-8")
+        except OSError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue    # line cut short by a crash
+
+
+def summarize(logged):
+    """
+    Logged entries grouped by (site, statement), ranked by total time:
+    dicts of site, sql, count, total_ms, max_ms, last (the latest entry).
+    """
+    groups = {}
+    for entry in logged:
+        key = (entry['site'], entry['sql'])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {'site': entry['site'], 'sql': entry['sql'], 'count': 0,
+                                   'total_ms': 0.0, 'max_ms': 0.0}
+        group['count'] += 1
+        group['total_ms'] += entry['ms']
+        group['max_ms'] = max(group['max_ms'], entry['ms'])
+        group['last'] = entry
+    return sorted(groups.values(), key=lambda g: -g['total_ms'])
+
+
+# -----------------------
+# Standalone Run
+# -----------------------
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Zodiac slow-query log summary")
+    parser.add_argument("--log", default=SLOW_QUERY_LOG, help="log file (rotated backups are read too)")
+    parser.add_argument("--top", type=int, default=20, help="statements to show")
+    parser.add_argument("--plans", action="store_true", help="show each statement's latest plan and params")
+    args = parser.parse_args(argv)
+
+    groups = summarize(entries(args.log))
+    if not groups:
+        print(f"No slow queries logged in {args.log}.")
+        return 0
+
+    print(f"{'total ms':>10} {'count':>6} {'mean ms':>9} {'max ms':>9}  statement")
+    for group in groups[:args.top]:
+        print(f"{group['total_ms']:>10.1f} {group['count']:>6} {group['total_ms'] / group['count']:>9.1f} "
+              f"{group['max_ms']:>9.1f}  {group['site']}")
+        print(f"{'':>38}{group['sql'][:120]}")
+        if args.plans:
+            last = group['last']
+            if last.get('params'):
+                print(f"{'':>38}params: {', '.join(last['params'])}")
+            for line in last.get('plan', []):
+                print(f"{'':>38}plan:   {line}")
+            if 'explain_error' in last:
+                print(f"{'':>38}EXPLAIN failed: {last['explain_error']}")
+    print(f"\n{sum(g['count'] for g in groups):,} slow statements, {len(groups):,} distinct, "
+          f"{sum(g['total_ms'] for g in groups) / 1000:,.1f} s in total.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+# snapshots.py
+# ----------------------------------------------------
+# Columnar Parquet snapshots of orders and products
+# ----------------------------------------------------
+# Analyses that would otherwise rescan the live database read these files
+# instead. Orders are written as Parquet, partitioned by the month of
+# created_at (orders/month=2025-06/part-*.parquet), and appended
+# incrementally: each export only reads orders with an id above the last
+# one exported. Products, which change in place, are rewritten whole.
+#
+#     python snapshots.py export            # append new orders, refresh products
+#     python snapshots.py status            # what the snapshot holds
+#
+# Readers ask for the columns and months they need, so only those column
+# chunks of only those partitions are read from disk:
+#
+#     read_orders(["product_id", "units", "created_at"], start=date(2024, 7, 1))
+#
+# Orders are snapshotted as they were when first exported: later status
+# or fulfilled_at changes are not carried over. created_at, type, product
+# and units never change after an order is placed, which is what the
+# forecasts read. Needs pyarrow.
+
+import json
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import db
+
+
+SNAPSHOT_DIR = os.environ.get(
+    "ZODIAC_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+)
+
+SNAPSHOT_CONFIG = {
+    'batch_rows': 100_000,      # Orders read per server-side batch and written per part file
+}
+
+# Partition of orders without a created_at
+UNDATED = "undated"
+
+ORDER_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("type", pa.string()),
+    ("product_id", pa.int64()),
+    ("supplier_id", pa.int64()),
+    ("customer_id", pa.int64()),
+    ("units", pa.int64()),
+    ("delivery_date", pa.string()),     # free text on some databases
+    ("note", pa.string()),
+    ("status", pa.string()),
+    ("created_at", pa.timestamp("us")),
+    ("fulfilled_at", pa.timestamp("us")),
+])
+
+PRODUCT_SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("name", pa.string()),
+    ("supplier_id", pa.int64()),
+    ("price_per_unit", pa.float64()),
+    ("stock_count", pa.int64()),
+    ("min_stock", pa.int64()),
+    ("last_updated", pa.timestamp("us")),
+])
+
+NEW_ORDERS_SQL = f"""
+    SELECT {', '.join(ORDER_SCHEMA.names)} FROM orders
+    WHERE id > %s
+    ORDER BY id
+"""
+
+PRODUCTS_SQL = f"""
+    SELECT {', '.join(PRODUCT_SCHEMA.names)} FROM products
+    ORDER BY id
+"""
+
+_PARTITIONING = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+
+def _orders_dir():
+    return os.path.join(SNAPSHOT_DIR, "orders")
+
+
+def _products_path():
+    return os.path.join(SNAPSHOT_DIR, "products.parquet")
+
+
+def _state_path():
+    return os.path.join(SNAPSHOT_DIR, "state.json")
+
+
+def _month(moment):
+    return moment.strftime("%Y-%m") if isinstance(moment, datetime) else UNDATED
+
+
+# -----------------------
+# State
+# -----------------------
+def state():
+    """{'orders_last_id', 'orders', 'products', 'exported_at'} of the snapshot (empty if none)."""
+    try:
+        with open(_state_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(values):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=SNAPSHOT_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(values, f, indent=2)
+    os.replace(tmp, _state_path())
+
+
+def _drop_unrecorded_parts(last_id):
+    """Remove part files written after `last_id` by an export that did not finish."""
+    for root, _, names in os.walk(_orders_dir()):
+        for name in names:
+            if name.startswith("part-") and int(name.split("-")[1]) > last_id:
+                os.remove(os.path.join(root, name))
+
+
+# -----------------------
+# Export
+# -----------------------
+def _write_atomic(table, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _order_columns(rows):
+    columns = list(zip(*rows))
+    # delivery_date is a DATE on MySQL but may be free text on SQLite
+    columns[6] = [None if v is None else v.isoformat() if isinstance(v, date) else str(v) for v in columns[6]]
+    return columns
+
+
+def _write_orders(rows):
+    """Write one batch of order rows (ascending ids), one part file per month."""
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(_month(row[9]), []).append(row)
+    for month, month_rows in by_month.items():
+        table = pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(_order_columns(month_rows), ORDER_SCHEMA)],
+            schema=ORDER_SCHEMA
+        )
+        name = f"part-{month_rows[0][0]:012d}-{month_rows[-1][0]:012d}.parquet"
+        _write_atomic(table, os.path.join(_orders_dir(), f"month={month}", name))
+
+
+def export_orders(progress=None):
+    """
+    Append orders created since the last export. The recorded last id
+    only advances once a batch is on disk, so an interrupted export picks
+    up where it stopped. progress(orders written) is called per batch.
+    Returns the number of orders appended.
+    """
+    current = state()
+    last_id = current.get("orders_last_id", 0)
+    _drop_unrecorded_parts(last_id)
+
+    written = 0
+    for rows in db.stream_query(NEW_ORDERS_SQL, (last_id,), batch_size=SNAPSHOT_CONFIG['batch_rows'],
+                                row_mode='tuple', raise_errors=True):
+        _write_orders(rows)
+        written += len(rows)
+        current.update(orders_last_id=rows[-1][0], orders=current.get("orders", 0) + len(rows))
+        _save_state(current)
+        if progress is not None:
+            progress(written)
+    return written
+
+
+def export_products():
+    """Rewrite the products snapshot batch by batch; returns the number of products."""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=SNAPSHOT_DIR, suffix=".tmp")
+    os.close(fd)
+    count = 0
+    try:
+        with pq.ParquetWriter(tmp, PRODUCT_SCHEMA) as writer:
+            for rows in db.stream_query(PRODUCTS_SQL, batch_size=SNAPSHOT_CONFIG['batch_rows'],
+                                        row_mode='tuple', raise_errors=True):
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(zip(*rows), PRODUCT_SCHEMA)],
+                    schema=PRODUCT_SCHEMA
+                ))
+                count += len(rows)
+        os.replace(tmp, _products_path())
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    _save_state(dict(state(), products=count))
+    return count
+
+
+def export(progress=None):
+    """Append new orders and refresh products; returns (orders appended, products)."""
+    appended = export_orders(progress)
+    products = export_products()
+    _save_state(dict(state(), exported_at=datetime.now().isoformat(" ", "seconds")))
+    return appended, products
+
+
+# -----------------------
+# Read
+# -----------------------
+def available():
+    """True once orders have been exported."""
+    return bool(state().get("orders_last_id"))
+
+
+def order_months():
+    """Sorted 'YYYY-MM' partitions holding dated orders."""
+    try:
+        names = os.listdir(_orders_dir())
+    except OSError:
+        return []
+    return sorted(n[len("month="):] for n in names if n.startswith("month=") and n != f"month={UNDATED}")
+
+
+def read_orders(columns, start=None, end=None, order_type=None):
+    """
+    Orders from the snapshot as a pyarrow Table of just `columns`.
+
+    `start` / `end` (dates) keep the months in [start's month, end's
+    month); whole partitions outside them are never opened. `order_type`
+    filters on type.
+    """
+    if not os.path.isdir(_orders_dir()):
+        return ORDER_SCHEMA.empty_table().select(columns)
+    dataset = ds.dataset(_orders_dir(), format="parquet", partitioning=_PARTITIONING,
+                         schema=ORDER_SCHEMA.append(pa.field("month", pa.string())))
+
+    clauses = []
+    if start is not None:
+        clauses.append(ds.field("month") >= start.strftime("%Y-%m"))
+    if end is not None:
+        clauses.append(ds.field("month") < end.strftime("%Y-%m"))
+    if start is not None or end is not None:
+        clauses.append(ds.field("month") != UNDATED)
+    if order_type is not None:
+        clauses.append(ds.field("type") == order_type)
+    condition = None
+    for clause in clauses:
+        condition = clause if condition is None else condition & clause
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+def read_products(columns):
+    """The products snapshot as a pyarrow Table of just `columns`."""
+    if not os.path.exists(_products_path()):
+        return PRODUCT_SCHEMA.empty_table().select(columns)
+    return pq.read_table(_products_path(), columns=columns)
+
+
+# -----------------------
+# Standalone Run
+# -----------------------
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Zodiac Parquet snapshots")
+    parser.add_argument("command", nargs="?", choices=("export", "status"), default="export")
+    parser.add_argument("--backend", choices=("mysql", "sqlite"), default=None,
+                        help="override DB_BACKEND for this run")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        current = state()
+        if not current:
+            print(f"No snapshot in {SNAPSHOT_DIR}.")
+            return 0
+        months = order_months()
+        print(f"Snapshot in {SNAPSHOT_DIR}, exported {current.get('exported_at', 'partially')}:")
+        print(f"  {current.get('orders', 0):,} orders up to id {current.get('orders_last_id', 0)}"
+              + (f", months {months[0]} to {months[-1]}" if months else ""))
+        print(f"  {current.get('products', 0):,} products")
+        return 0
+
+    if args.backend:
+        db.configure_backend(args.backend)
+    appended, products = export(lambda done: print(f"\r  {done:,} orders", end="", flush=True))
+    print(f"\nAppended {appended:,} orders and wrote {products:,} products to {SNAPSHOT_DIR}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
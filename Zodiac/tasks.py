@@ -0,0 +1,206 @@
+# tasks.py
+# ----------------------------------------------------
+# Off-main-thread execution of data-layer calls for Zodiac
+# ----------------------------------------------------
+# Tk widgets may only be touched from the main thread, so blocking work
+# (queries, model fits) runs on a shared worker pool and its results are
+# handed back through a queue that the window drains with after().
+#
+#     scope = TaskScope(window)
+#     scope.submit(db.get_suppliers, on_done=fill_combo, busy=[refresh_btn])
+#
+# Destroying the window cancels everything still queued for it and drops
+# late results, so callbacks never run against dead widgets.
+
+import queue
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+import db
+
+
+POLL_INTERVAL_MS = 25
+LOADING_TEXT = "Loading…"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide worker pool, sized to match the connection pool."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=db.POOL_CONFIG['size'], thread_name_prefix="zodiac-db"
+            )
+        return _executor
+
+
+def shutdown():
+    """Stop the worker pool (queued work is cancelled)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TaskCancelled(Exception):
+    """Raised inside a worker by progress() once its window has gone away."""
+
+
+class TaskScope:
+    """
+    Runs blocking calls in the background on behalf of one Tk window.
+
+    Callbacks (on_done, on_error, on_progress) always run on the Tk thread.
+    While any task is in flight the window shows a busy cursor, the widgets
+    passed as `busy` are disabled and `status` reads LOADING_TEXT.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.status = tk.StringVar(master=window, value="")
+        self._results = queue.SimpleQueue()
+        self._pending = set()
+        self._quiet = set()
+        self._busy_widgets = {}
+        self._polling = False
+        self.closed = False
+        window.bind("<Destroy>", self._on_destroy, add="+")
+
+    # ----------------------------------------------------
+    # Submitting work
+    # ----------------------------------------------------
+    def submit(self, fn, *args, on_done=None, on_error=None, on_progress=None, busy=(),
+               quiet=False, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the worker pool.
+
+        Quiet tasks (e.g. periodic refreshes) do not switch the window into
+        its loading state.
+
+        If on_progress is given, fn also receives a `progress` keyword: a
+        callable that ships intermediate results to on_progress on the Tk
+        thread (and raises TaskCancelled once the window is closed).
+        Returns the Future, or None if the window is already closed.
+        """
+        if self.closed:
+            return None
+        if on_progress is not None:
+            kwargs["progress"] = self._progress_sender(on_progress)
+
+        future = get_executor().submit(fn, *args, **kwargs)
+        self._pending.add(future)
+        if quiet:
+            self._quiet.add(future)
+        self._set_busy(future, busy)
+        future.add_done_callback(lambda f: self._results.put(("done", f, on_done, on_error)))
+        self._ensure_polling()
+        return future
+
+    def _progress_sender(self, on_progress):
+        def progress(item):
+            if self.closed:
+                raise TaskCancelled()
+            self._results.put(("progress", item, on_progress, None))
+        return progress
+
+    def cancel_all(self):
+        """Cancel queued tasks; running ones finish but their results are dropped."""
+        for future in list(self._pending):
+            future.cancel()
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    # ----------------------------------------------------
+    # Delivering results on the Tk thread
+    # ----------------------------------------------------
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.window.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        if self.closed:
+            return
+        while True:
+            try:
+                kind, payload, callback, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                callback(payload)
+            else:
+                self._finish(payload, callback, on_error)
+            if self.closed:
+                return
+
+        if self._pending:
+            self.window.after(POLL_INTERVAL_MS, self._poll)
+        else:
+            self._polling = False
+
+    def _finish(self, future, on_done, on_error):
+        self._pending.discard(future)
+        self._quiet.discard(future)
+        self._clear_busy(future)
+        try:
+            result = future.result()
+        except (CancelledError, TaskCancelled):
+            return
+        except Exception as e:
+            (on_error or self._report_error)(e)
+            return
+        if on_done is not None:
+            on_done(result)
+
+    def _report_error(self, error):
+        messagebox.showerror("Database Error", f"The request failed:\n{error}", parent=self.window)
+
+    # ----------------------------------------------------
+    # Loading state
+    # ----------------------------------------------------
+    def _set_busy(self, future, widgets):
+        widgets = [w for w in widgets if w is not None]
+        self._busy_widgets[future] = widgets
+        for widget in widgets:
+            _set_enabled(widget, False)
+        self._update_indicator()
+
+    def _clear_busy(self, future):
+        released = self._busy_widgets.pop(future, [])
+        still_busy = {w for ws in self._busy_widgets.values() for w in ws}
+        for widget in released:
+            if widget not in still_busy:
+                _set_enabled(widget, True)
+        self._update_indicator()
+
+    def _update_indicator(self):
+        busy = bool(self._pending - self._quiet)
+        self.status.set(LOADING_TEXT if busy else "")
+        try:
+            self.window.configure(cursor="watch" if busy else "")
+        except Exception:
+            pass
+
+    def _on_destroy(self, event):
+        if event.widget is self.window:
+            self.closed = True
+            self.cancel_all()
+
+
+def _set_enabled(widget, enabled):
+    try:
+        if isinstance(widget, ttk.Widget):
+            widget.state(["!disabled"] if enabled else ["disabled"])
+        else:
+            widget.configure(state="normal" if enabled else "disabled")
+    except Exception:
+        # Widget already destroyed
+        pass
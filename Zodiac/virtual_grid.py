@@ -0,0 +1,409 @@
+# virtual_grid.py
+# ----------------------------------------------------
+# Virtual-scrolling grid over ttk.Treeview
+# ----------------------------------------------------
+# Only the visible rows (plus a prefetch margin on either side) are
+# fetched and kept in memory. The Treeview holds a fixed set of row items
+# that are recycled as the user scrolls, so open time and memory stay flat
+# no matter how large the underlying table is.
+#
+# Jumps (scrollbar drags, Home / End) seek from sampled anchor keys, one
+# every `anchor_every` rows, so landing anywhere in the table reads at most
+# that many extra rows instead of OFFSET-scanning up to the target.
+#
+# Given a tasks.TaskScope, every query runs on the worker pool: scrolling
+# redraws at once from the cached rows and asks for the missing ones, with
+# at most one page load in flight. Events arriving meanwhile (a scrollbar
+# drag sends dozens) only move the target, and the load that follows is
+# for wherever the view ended up.
+
+from tkinter import ttk
+
+
+class VirtualGrid:
+    """
+    Treeview that pages rows in from a keyset-paginated source.
+
+    Args:
+        parent: container widget; pack/grid `grid.frame` to place the grid.
+        columns: Treeview column identifiers.
+        count: callable() -> total number of rows.
+        fetch: callable(after=key|None, before=key|None, limit=int) -> rows in
+            ascending key order (see db.get_products_page).
+        key_at: callable(offset) -> key of the row at that offset, or None;
+            used for jumps until the anchors are loaded.
+        key: callable(row) -> the row's keyset key, e.g. (name, id).
+        format_row: callable(row) -> tuple of display values.
+        height: visible rows.
+        prefetch: rows fetched beyond each edge of the visible window.
+        anchors: callable(every) -> keys at offsets every - 1, 2 * every - 1,
+            ... (see db.get_product_anchor_keys), or None.
+        anchor_every: rows between anchors.
+        tasks: tasks.TaskScope running the queries, or None to run them
+            inline (refresh(tasks) also sets it).
+    """
+
+    def __init__(self, parent, columns, count, fetch, key_at, key, format_row,
+                 height=12, prefetch=None, anchors=None, anchor_every=500, tasks=None, **tree_kwargs):
+        self._count = count
+        self._fetch = fetch
+        self._key_at = key_at
+        self._key = key
+        self._load_anchors = anchors
+        self.anchor_every = anchor_every
+        self._anchors = None        # loaded for _anchors_total rows
+        self._anchors_total = None
+        self._format = format_row
+        self._tasks = tasks
+        self.height = height
+        self.prefetch = prefetch if prefetch is not None else 2 * height
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings",
+                                 height=height, **tree_kwargs)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # Fixed pool of row items, recycled on every scroll
+        self._slots = [self.tree.insert("", "end", iid=f"slot{i}") for i in range(height)]
+        self._attached = set(self._slots)
+        self._slot_rows = {}
+
+        self.total = 0
+        self.top = 0                # offset of the first visible row
+        self._block = []            # cached rows, ascending
+        self._block_start = 0       # offset of _block[0]
+        self._generation = 0        # bumped whenever _block changes shape
+        self._loading = False       # a page load is in flight
+        self._selected_key = None
+        self._rendering = False
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        for widget in (self.tree, self.scrollbar):
+            widget.bind("<MouseWheel>", self._on_mousewheel)
+            widget.bind("<Button-4>", lambda e: self.scroll(-3))
+            widget.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda e: self._on_arrow(1))
+        self.tree.bind("<Prior>", lambda e: self._scroll_break(-self.height))
+        self.tree.bind("<Next>", lambda e: self._scroll_break(self.height))
+        self.tree.bind("<Home>", lambda e: self._scroll_break(-self.total))
+        self.tree.bind("<End>", lambda e: self._scroll_break(self.total))
+
+    # ----------------------------------------------------
+    # Public API
+    # ----------------------------------------------------
+    def refresh(self, tasks=None):
+        """
+        Re-count and re-fetch around the current position (after edits).
+
+        With a tasks.TaskScope the queries run in the background and the
+        grid is redrawn when they complete.
+        """
+        tasks = tasks or self._tasks
+        if tasks is None:
+            self.total = self._count()
+            if self._anchors_stale():
+                self._set_anchors(self.total, self._load_anchors(self.anchor_every))
+            self._block = []
+            self.scroll_to(self.top)
+            return
+
+        top = self.top
+        anchors = self._anchors
+
+        def load():
+            total = self._count()
+            offset = max(0, min(top, max(0, total - self.height)))
+            lo = max(0, offset - self.prefetch)
+            hi = min(total, offset + self.height + self.prefetch)
+            return total, offset, lo, self._read_window(lo, hi, anchors)
+
+        def apply(result):
+            moved = self.top != top
+            self.total, offset, self._block_start, self._block = result
+            self._generation += 1
+            # Scrolled while loading: stay where the user went
+            self.scroll_to(self.top if moved else offset)
+            if self._anchors_stale():
+                total = self.total
+                tasks.submit(self._load_anchors, self.anchor_every, quiet=True,
+                             on_done=lambda keys: self._set_anchors(total, keys))
+
+        self._tasks = tasks
+        tasks.submit(load, on_done=apply)
+
+    def patch(self, rows, ident=lambda row: row["id"], tasks=None):
+        """
+        Apply changed rows (e.g. from delta_sync.DeltaFeed) in place.
+
+        Rows already cached with an unchanged sort key are swapped in and
+        only the slots showing them are redrawn. Uncached rows that sort
+        outside the block are dropped: they cannot change what it holds (a
+        product added before it shifts offsets by one, and the row count is
+        off by one, until the next refresh). Only a cached row whose key
+        changed, or an uncached one landing inside the block's key range,
+        or beyond an end of the block that is also an end of the table,
+        falls back to refresh(tasks). Keys are compared in Python order,
+        which can differ from the database collation for mixed-case names.
+        """
+        if not self._block:
+            self.refresh(tasks)
+            return
+        positions = {ident(row): index for index, row in enumerate(self._block)}
+        first, last = self._key(self._block[0]), self._key(self._block[-1])
+        at_start = self._block_start == 0
+        at_end = self._block_start + len(self._block) >= self.total
+        updates = {}
+        for row in rows:
+            index = positions.get(ident(row))
+            key = self._key(row)
+            if index is None:
+                if (at_start or key >= first) and (at_end or key <= last):
+                    self.refresh(tasks)
+                    return
+                continue
+            if self._key(self._block[index]) != key:
+                self.refresh(tasks)
+                return
+            updates[index] = row
+
+        # Nothing is drawn while the visible rows are still loading (see visible_rows)
+        start = self.top - self._block_start
+        visible = range(start, start + self.height) if start >= 0 else range(0)
+        for index, row in updates.items():
+            if self._block[index] == row:
+                continue
+            self._block[index] = row
+            if index in visible:
+                slot = self._slots[index - visible.start]
+                self.tree.item(slot, values=self._format(row))
+                self._slot_rows[slot] = row
+
+    def scroll_to(self, offset):
+        """Show rows starting at `offset` (clamped to the valid range)."""
+        offset = max(0, min(int(offset), max(0, self.total - self.height)))
+        self.top = offset
+        if self._tasks is None:
+            self._ensure(offset)
+        else:
+            self._request()
+        self._render()
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+
+    def row_for_item(self, iid):
+        """Row currently displayed by a Treeview item, or None."""
+        return self._slot_rows.get(iid)
+
+    def visible_rows(self):
+        """Cached rows of the visible window (fewer, or none, while they load)."""
+        start = self.top - self._block_start
+        return self._block[start:start + self.height] if start >= 0 else []
+
+    def cached_rows(self):
+        """All rows currently held in memory (visible window + prefetch)."""
+        return list(self._block)
+
+    # ----------------------------------------------------
+    # Anchors
+    # ----------------------------------------------------
+    def _anchors_stale(self):
+        """True when anchors are used but missing or were sampled at another row count."""
+        return self._load_anchors is not None and self._anchors_total != self.total
+
+    def _set_anchors(self, total, keys):
+        self._anchors, self._anchors_total = keys, total
+
+    def _read_window(self, lo, hi, anchors):
+        """
+        Rows [lo, hi) in key order: read from the nearest anchor at or before
+        `lo` (skipping fewer than anchor_every rows), else via key_at(). Rows
+        added or removed since the anchors were sampled shift the landing
+        point by as many rows until the next refresh resamples them.
+        """
+        if lo <= 0:
+            return self._fetch(after=None, limit=hi)
+        index = lo // self.anchor_every
+        if anchors is not None and index <= len(anchors):
+            skip = lo - index * self.anchor_every
+            anchor = anchors[index - 1] if index else None
+            return self._fetch(after=anchor, limit=skip + hi - lo)[skip:]
+        return self._fetch(after=self._key_at(lo - 1), limit=hi - lo)
+
+    # ----------------------------------------------------
+    # Block management
+    # ----------------------------------------------------
+    def _plan(self, offset):
+        """
+        The next page load the window at `offset` needs, or None:
+        ("jump", lo, hi, anchors) replaces the block, ("after", key, limit)
+        and ("before", key, limit) extend it by at least a prefetch chunk.
+        """
+        want_lo = max(0, offset - self.prefetch)
+        want_hi = min(self.total, offset + self.height + self.prefetch)
+        block_lo = self._block_start
+        block_hi = block_lo + len(self._block)
+
+        # Jumped away from the cached block (scrollbar drag, Home/End): re-anchor
+        if not self._block or want_hi < block_lo or want_lo > block_hi:
+            return ("jump", want_lo, want_hi, self._anchors) if want_hi > want_lo else None
+        if want_hi > block_hi:
+            return ("after", self._key(self._block[-1]), max(want_hi - block_hi, self.prefetch))
+        if want_lo < block_lo:
+            return ("before", self._key(self._block[0]), min(max(block_lo - want_lo, self.prefetch), block_lo))
+        return None
+
+    def _load(self, job):
+        """Rows for a _plan() job; touches no grid state, so safe on a worker thread."""
+        if job[0] == "jump":
+            return self._read_window(job[1], job[2], job[3])
+        if job[0] == "after":
+            return self._fetch(after=job[1], limit=job[2])
+        return self._fetch(before=job[1], limit=job[2])
+
+    def _apply(self, job, rows):
+        if job[0] == "jump":
+            self._block = rows
+            self._block_start = job[1]
+        elif job[0] == "after":
+            self._block.extend(rows)
+        else:
+            self._block[:0] = rows
+            self._block_start -= len(rows)
+        self._generation += 1
+
+    def _ensure(self, offset):
+        """Make sure the block covers the window at `offset` plus the prefetch margin (inline)."""
+        for _ in range(2):      # a jump, or an extension forward then backward
+            job = self._plan(offset)
+            if job is None:
+                break
+            self._apply(job, self._load(job))
+        self._trim(offset)
+
+    def _request(self):
+        """
+        Load what the window at self.top lacks in the background. With a
+        load already in flight nothing is queued: when it lands, the window
+        is checked again at wherever self.top has moved to by then.
+        """
+        if self._loading:
+            return
+        job = self._plan(self.top)
+        if job is None:
+            self._trim(self.top)
+            return
+        self._loading = True
+        generation, top = self._generation, self.top
+
+        def loaded(rows):
+            self._loading = False
+            if generation != self._generation:
+                self._request()     # the block changed under the load (refresh): plan again
+                return
+            self._apply(job, rows)
+            self._trim(self.top)
+            self._render()
+            # A short page means the table ended early; do not ask again for the same rows
+            wanted = job[2] - job[1] if job[0] == "jump" else job[2]
+            if len(rows) >= wanted or self.top != top:
+                self._request()
+
+        def failed(error):
+            self._loading = False
+            print(f"[Zodiac] Grid page load failed: {error}")
+
+        self._tasks.submit(self._load, job, on_done=loaded, on_error=failed, quiet=True)
+
+    def _trim(self, offset):
+        """Drop rows far outside the margin so memory stays bounded."""
+        keep_lo = max(self._block_start, offset - 2 * self.prefetch)
+        keep_hi = offset + self.height + 2 * self.prefetch
+        if keep_lo > self._block_start:
+            del self._block[:keep_lo - self._block_start]
+            self._block_start = keep_lo
+            self._generation += 1
+        if self._block_start + len(self._block) > keep_hi:
+            del self._block[max(0, keep_hi - self._block_start):]
+            self._generation += 1
+
+    # ----------------------------------------------------
+    # Rendering
+    # ----------------------------------------------------
+    def _render(self):
+        rows = self.visible_rows()
+        self._rendering = True
+        try:
+            self._slot_rows = {}
+            reselect = None
+            for index, slot in enumerate(self._slots):
+                if index < len(rows):
+                    row = rows[index]
+                    self.tree.item(slot, values=self._format(row))
+                    self._slot_rows[slot] = row
+                    if slot not in self._attached:
+                        self.tree.move(slot, "", index)
+                        self._attached.add(slot)
+                    if self._selected_key is not None and self._key(row) == self._selected_key:
+                        reselect = slot
+                elif slot in self._attached:
+                    self.tree.detach(slot)
+                    self._attached.discard(slot)
+
+            if reselect:
+                self.tree.selection_set(reselect)
+                self.tree.focus(reselect)
+            elif self.tree.selection():
+                self.tree.selection_remove(*self.tree.selection())
+        finally:
+            self._rendering = False
+
+        if self.total:
+            self.scrollbar.set(self.top / self.total, min(1.0, (self.top + self.height) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # ----------------------------------------------------
+    # Event handlers
+    # ----------------------------------------------------
+    def _on_select(self, event):
+        if self._rendering:
+            return
+        selection = self.tree.selection()
+        row = self._slot_rows.get(selection[0]) if selection else None
+        self._selected_key = self._key(row) if row else None
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * self.total)
+        elif action == "scroll":
+            step = self.height if unit == "pages" else 1
+            self.scroll(int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        steps = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll(-3 * steps)
+        return "break"
+
+    def _on_arrow(self, direction):
+        focus = self.tree.focus()
+        index = self._slots.index(focus) if focus in self._slots else -1
+        target = index + direction
+        if 0 <= target < len(self._slot_rows):
+            slot = self._slots[target]
+        else:
+            self.scroll(direction)
+            slot = self._slots[max(0, min(index, len(self._slot_rows) - 1))]
+        if slot in self._slot_rows:
+            self.tree.selection_set(slot)
+            self.tree.focus(slot)
+            self.tree.event_generate("<<TreeviewSelect>>")
+        return "break"
+
+    def _scroll_break(self, rows):
+        self.scroll(rows)
+        return "break"